@@ -1,6 +1,54 @@
-from .topsis_calc import run_topsis, validate_inputs, topsis_score_calc
+import importlib
 
 __version__ = "1.0.3"
 __author__ = "Naman Singh"
 
-__all__ = ['run_topsis', 'validate_inputs', 'topsis_score_calc']
+# Public names and the submodule each comes from. Submodules (and pandas)
+# are imported on first use, so importing the package itself stays cheap.
+_EXPORTS = {
+    'run_topsis': 'topsis_calc',
+    'validate_inputs': 'topsis_calc',
+    'topsis_score_calc': 'topsis_calc',
+    'compute_topsis': 'topsis_calc',
+    'ParsedInput': 'inputs',
+    'parse_inputs': 'inputs',
+    'run_topsis_chunked': 'streaming',
+    'run_topsis_mapped': 'mapped',
+    'load_matrix': 'mapped',
+    'ResultCache': 'cache',
+    'MemoryBackend': 'cache',
+    'DiskBackend': 'cache',
+    'IncrementalTopsis': 'incremental',
+    'topsis_kernel': 'engine',
+    'rank_scores': 'engine',
+    'batch_topsis': 'engine',
+    'grouped_topsis': 'engine',
+    'NORMALIZATIONS': 'engine',
+    'DISTANCES': 'engine',
+    'register_normalization': 'engine',
+    'register_distance': 'engine',
+    'run_topsis_small': 'fastpath',
+    'run_sensitivity': 'sensitivity',
+    'sample_weights': 'sensitivity',
+    'run_batch': 'batch',
+    'read_manifest': 'batch',
+    'glob_jobs': 'batch',
+    'sheet_jobs': 'batch',
+    'read_sheet': 'excel',
+    'read_sheets': 'excel',
+    'ExternalRanker': 'extsort',
+    'Profiler': 'profiling',
+    'StageStats': 'profiling',
+}
+
+__all__ = list(_EXPORTS)
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{_EXPORTS[name]}", __name__), name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
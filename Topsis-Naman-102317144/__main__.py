@@ -1,21 +1,257 @@
+import re
 import sys
-from .topsis_calc import run_topsis, validate_inputs
+import argparse
 
-def main():
-    if len(sys.argv) != 5:
-        print("Error: Incorrect number of parameters")
-        print("Usage: topsis <InputDataFile> <Weights> <Impacts> <ResultFileName>")
+USAGE = ("topsis <InputDataFile> <Weights> <Impacts> <ResultFileName> [options]\n"
+         "       topsis --batch <Manifest> [options]\n"
+         "       topsis --batch <InputGlob> <Weights> <Impacts> <OutputDir> [options]\n"
+         "       topsis --serve [--host HOST] [--port PORT]")
+
+MISSING_ARGUMENTS = "missing arguments"
+
+class _Parser(argparse.ArgumentParser):
+    def error(self, message):
+        if message == MISSING_ARGUMENTS:
+            print("Error: Incorrect number of parameters")
+        else:
+            print(f"Error: {message}")
+        print(f"Usage: {USAGE}")
         print("Example: topsis data.csv \"1,1,1,2\" \"+,+,-,+\" result.csv")
         sys.exit(1)
+
+# Weights and impacts such as "-1,2" or "-,+,+" start with a dash, which
+# argparse would take for an option; they are masked while parsing
+DASH_VALUE = re.compile(r'-[\d.,+\-\s]*')
+
+def _is_dash_value(arg):
+    return DASH_VALUE.fullmatch(arg) is not None and re.search(r'[\d,]', arg)
+
+def parse_args(parser, argv=None):
+    """parser.parse_args, reading dash-led weights and impacts as values"""
+    argv = sys.argv[1:] if argv is None else list(argv)
+    masked = {}
+    for i, arg in enumerate(argv):
+        if _is_dash_value(arg):
+            argv[i] = f' {arg}'
+            masked[argv[i]] = arg
+    args = parser.parse_args(argv)
+    for name, value in vars(args).items():
+        if isinstance(value, str) and value in masked:
+            setattr(args, name, masked[value])
+    return args
+
+def build_parser():
+    parser = _Parser(prog='topsis', usage=USAGE,
+                     description="TOPSIS multi-criteria ranking. Input and "
+                                 "output formats follow the file extensions "
+                                 "(.csv, .xlsx, .parquet, .feather/.arrow, "
+                                 ".npy/.npz).")
+    parser.add_argument('input_file', nargs='?')
+    parser.add_argument('weights', nargs='?')
+    parser.add_argument('impacts', nargs='?')
+    parser.add_argument('output_file', nargs='?')
+    parser.add_argument('--columns',
+                        help="comma-separated columns to read, name column first")
+    parser.add_argument('--sheet',
+                        help="worksheet of an Excel input (default the first); "
+                             "a comma-separated list, or * for every sheet, "
+                             "scores each one to <output>_<sheet>.<ext>")
+    parser.add_argument('--chunksize', type=int,
+                        help="stream a CSV input in chunks of this many rows")
+    parser.add_argument('--external-sort', nargs='?', const=True,
+                        metavar='TMPDIR',
+                        help="with --chunksize, rank by an external merge "
+                             "sort through temporary files (in TMPDIR if "
+                             "given) so memory does not grow with the rows")
+    parser.add_argument('--mmap', action='store_true',
+                        help="memory-map a .npy or raw float64 criteria matrix")
+    parser.add_argument('--workers', type=int,
+                        help="score row blocks on this many threads")
+    parser.add_argument('--top-k', type=int,
+                        help="write only the best K alternatives")
+    parser.add_argument('--cache-dir',
+                        help="reuse scores cached in this directory")
+    parser.add_argument('--normalization', default='vector',
+                        help="vector (default), minmax, max or sum")
+    parser.add_argument('--distance', default='euclidean',
+                        help="euclidean (default), manhattan, chebyshev or "
+                             "minkowski:P")
+    parser.add_argument('--dtype', choices=['float32', 'float64'],
+                        help="score in this precision; float32 halves the "
+                             "working memory (default: float64)")
+    parser.add_argument('--precision', type=int, metavar='DIGITS',
+                        help="decimals written for float cells in CSV output")
+    parser.add_argument('--compression', choices=['gzip', 'zstd'],
+                        help="compress CSV output (implied by a .csv.gz or "
+                             ".csv.zst output name; zstd needs zstandard)")
+    parser.add_argument('--group-by', metavar='COLUMN',
+                        help="rank the alternatives separately within each "
+                             "value of this column (with --chunksize, the "
+                             "input must be sorted by it)")
+    parser.add_argument('--profile', action='store_true',
+                        help="print the time, CPU time and peak memory of "
+                             "each stage")
+    parser.add_argument('--sensitivity', type=int, metavar='SAMPLES',
+                        help="write rank stability over this many sampled "
+                             "weight vectors instead of the ranking (P(top "
+                             "K) uses --top-k, default 1)")
+    parser.add_argument('--perturb', choices=['dirichlet', 'uniform'],
+                        default='dirichlet',
+                        help="how --sensitivity samples weights")
+    parser.add_argument('--spread', type=float, default=0.1,
+                        help="relative weight variation for --sensitivity "
+                             "(default 0.1)")
+    parser.add_argument('--seed', type=int,
+                        help="random seed for --sensitivity")
+    parser.add_argument('--batch', action='store_true',
+                        help="run every job in a manifest (CSV or JSON lines "
+                             "of input, weights, impacts, output), or every "
+                             "file matching a glob, in one process")
+    parser.add_argument('--jobs', type=int,
+                        help="files --batch processes at once (default: up "
+                             "to 8, one per CPU)")
+    parser.add_argument('--processes', action='store_true',
+                        help="run --batch and multi-sheet jobs in worker "
+                             "processes instead of threads (Excel parsing "
+                             "holds the GIL)")
+    parser.add_argument('--serve', action='store_true',
+                        help="run the HTTP scoring service instead")
+    parser.add_argument('--host', default='127.0.0.1',
+                        help="address for --serve (default 127.0.0.1)")
+    parser.add_argument('--port', type=int, default=8000,
+                        help="port for --serve (default 8000)")
+    parser.add_argument('--max-concurrency', type=int, default=64,
+                        help="requests --serve handles at once before "
+                             "answering 503")
+    return parser
+
+def run_batch_cli(args):
+    """Run a --batch invocation, print a summary and return the exit status"""
+    import time
+    from .batch import BatchJob, read_manifest, glob_jobs, sheet_jobs, run_batch
+    from .cache import ResultCache, DiskBackend
+    
+    try:
+        if not args.batch:
+            jobs = [BatchJob(args.input_file, args.weights, args.impacts,
+                             args.output_file)]
+        elif args.weights is None:
+            jobs = read_manifest(args.input_file)
+        else:
+            jobs = glob_jobs(args.input_file, args.weights, args.impacts,
+                             args.output_file)
+        if args.sheet:
+            jobs = sheet_jobs(jobs, args.sheet.split(','))
+    except Exception as e:
+        print(f"Error: {e}")
+        return 1
+    
+    cache = ResultCache(DiskBackend(args.cache_dir)) if args.cache_dir else None
+    start = time.perf_counter()
+    results = run_batch(jobs, args.jobs, args.processes,
+                        columns=args.columns.split(',') if args.columns else None,
+                        chunksize=args.chunksize, mmap=args.mmap,
+                        workers=args.workers, top_k=args.top_k, cache=cache,
+                        normalization=args.normalization,
+                        distance=args.distance, dtype=args.dtype,
+                        group_by=args.group_by, precision=args.precision,
+                        compression=args.compression,
+                        external_sort=args.external_sort)
+    elapsed = time.perf_counter() - start
+    
+    for r in results:
+        if r.error:
+            print(f"FAILED {r.seconds:8.3f}s  {r.job.input_file}: {r.error}")
+        else:
+            print(f"ok     {r.seconds:8.3f}s  {r.job.input_file} -> "
+                  f"{r.job.output_file} ({r.rows} rows)")
+    
+    failed = sum(1 for r in results if r.error)
+    rows = sum(r.rows for r in results)
+    print(f"{len(results)} jobs ({failed} failed), {rows} rows in {elapsed:.3f}s: "
+          f"{len(results) / elapsed:.1f} jobs/s, {rows / elapsed:.0f} rows/s")
+    return 1 if failed else 0
+
+def run_sensitivity_cli(args):
+    """Run a --sensitivity invocation and return the exit status"""
+    from .inputs import parse_inputs
+    from .formats import write_table
+    from .sensitivity import run_sensitivity
+    
+    try:
+        parsed = parse_inputs(args.input_file, args.weights, args.impacts,
+                              args.columns.split(',') if args.columns else None,
+                              sheet=args.sheet)
+        result = run_sensitivity(parsed.matrix, parsed.weights, parsed.impacts,
+                                 samples=args.sensitivity, method=args.perturb,
+                                 spread=args.spread, top_k=args.top_k or 1,
+                                 names=parsed.df.iloc[:, 0].to_numpy(),
+                                 criteria=list(parsed.df.columns[1:]),
+                                 seed=args.seed, workers=args.workers,
+                                 normalization=args.normalization,
+                                 distance=args.distance)
+        write_table(result.ranks, args.output_file)
+    except Exception as e:
+        print(f"Error: {e}")
+        return 1
+    
+    print("Weight changes that alter the top alternative (factor, new best):")
+    print(result.thresholds.to_string(index=False))
+    print(f"Rank stability saved to {args.output_file}")
+    return 0
+
+def main():
+    parser = build_parser()
+    args = parse_args(parser)
+    
+    if args.serve:
+        from .server import serve
+        serve(args.host, args.port, max_concurrency=args.max_concurrency)
+        return
+    if args.batch:
+        if args.input_file is None or (args.weights and not args.output_file):
+            parser.error(MISSING_ARGUMENTS)
+        sys.exit(run_batch_cli(args))
+    if args.output_file is None:
+        parser.error(MISSING_ARGUMENTS)
+    if args.sensitivity:
+        sys.exit(run_sensitivity_cli(args))
+    if args.sheet and (args.sheet == '*' or ',' in args.sheet):
+        sys.exit(run_batch_cli(args))
     
-    input_file = sys.argv[1]
-    weights = sys.argv[2]
-    impacts = sys.argv[3]
-    output_file = sys.argv[4]
+    # Plain runs on small CSVs skip pandas; anything else falls through
+    plain = not (args.columns or args.chunksize is not None
+                 or args.external_sort or args.mmap
+                 or args.workers is not None or args.top_k is not None
+                 or args.cache_dir or args.dtype
+                 or args.profile or args.group_by or args.sheet
+                 or args.precision is not None or args.compression)
     
     try:
-        run_topsis(input_file, weights, impacts, output_file)
-        print(f"Results saved to {output_file}")
+        if plain:
+            from .fastpath import run_topsis_small
+            if run_topsis_small(args.input_file, args.weights, args.impacts,
+                                args.output_file, args.normalization,
+                                args.distance) is not None:
+                print(f"Results saved to {args.output_file}")
+                return
+        
+        from .topsis_calc import run_topsis
+        from .cache import ResultCache, DiskBackend
+        from .profiling import Profiler
+        columns = args.columns.split(',') if args.columns else None
+        cache = ResultCache(DiskBackend(args.cache_dir)) if args.cache_dir else None
+        profiler = Profiler() if args.profile else None
+        run_topsis(args.input_file, args.weights, args.impacts, args.output_file,
+                   chunksize=args.chunksize, columns=columns, mmap=args.mmap,
+                   workers=args.workers, top_k=args.top_k, cache=cache,
+                   normalization=args.normalization, distance=args.distance,
+                   dtype=args.dtype, profile=profiler, group_by=args.group_by,
+                   precision=args.precision, compression=args.compression,
+                   sheet=args.sheet, external_sort=args.external_sort)
+        print(f"Results saved to {args.output_file}")
+        if profiler:
+            print(profiler.report())
     except Exception as e:
         print(f"Error: {e}")
         sys.exit(1)
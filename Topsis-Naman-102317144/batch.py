@@ -0,0 +1,135 @@
+import os
+import csv
+import glob
+import json
+import time
+from itertools import repeat
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+try:
+    from .fastpath import run_topsis_small
+    from .topsis_calc import run_topsis
+    from .formats import EXCEL
+    from .excel import sheet_names
+except ImportError:
+    from fastpath import run_topsis_small
+    from topsis_calc import run_topsis
+    from formats import EXCEL
+    from excel import sheet_names
+
+MANIFEST_FIELDS = ('input', 'weights', 'impacts', 'output')
+JSON_LINES = ('.jsonl', '.ndjson', '.json')
+
+BatchJob = namedtuple('BatchJob', ['input_file', 'weights', 'impacts',
+                                   'output_file', 'sheet'], defaults=(None,))
+JobResult = namedtuple('JobResult', ['job', 'rows', 'seconds', 'error'])
+
+
+def _manifest_records(path):
+    with open(path, newline='', encoding='utf-8') as f:
+        if path.lower().endswith(JSON_LINES):
+            for line_no, line in enumerate(f, 1):
+                if line.strip():
+                    yield line_no, json.loads(line)
+        else:
+            for line_no, record in enumerate(csv.DictReader(f), 2):
+                yield line_no, record
+
+def read_manifest(path):
+    """Jobs listed in a CSV or JSON-lines manifest
+
+    Each record has input, weights, impacts and output fields, and an
+    optional sheet for Excel inputs. Relative paths are taken relative to
+    the manifest's directory.
+    """
+    base = os.path.dirname(os.path.abspath(path))
+    jobs = []
+    for line_no, record in _manifest_records(path):
+        missing = [k for k in MANIFEST_FIELDS if not record.get(k)]
+        if missing:
+            raise ValueError(f"Manifest line {line_no}: missing "
+                             f"{', '.join(missing)}")
+        jobs.append(BatchJob(os.path.join(base, str(record['input'])),
+                             str(record['weights']), str(record['impacts']),
+                             os.path.join(base, str(record['output'])),
+                             record.get('sheet') or None))
+    return jobs
+
+def glob_jobs(pattern, weights, impacts, output_dir):
+    """One job per file matching pattern, all with the same weights and impacts
+
+    Results go to output_dir as result_<input name>.
+    """
+    paths = sorted(glob.glob(pattern))
+    if not paths:
+        raise ValueError(f"No input files match '{pattern}'")
+    os.makedirs(output_dir, exist_ok=True)
+    return [BatchJob(path, weights, impacts,
+                     os.path.join(output_dir, f"result_{os.path.basename(path)}"))
+            for path in paths]
+
+def sheet_jobs(jobs, sheets):
+    """Split the Excel jobs into one job per worksheet
+
+    sheets is a list of sheet names, or ['*'] for every sheet of each
+    workbook. Each sheet's result goes to <output stem>_<sheet><ext>; a
+    single named sheet keeps the output name. Other jobs are unchanged.
+    """
+    sheets = list(sheets)
+    split = []
+    for job in jobs:
+        if not job.input_file.lower().endswith(EXCEL):
+            split.append(job)
+            continue
+        if len(sheets) == 1 and sheets != ['*']:
+            split.append(job._replace(sheet=sheets[0]))
+            continue
+        names = sheet_names(job.input_file) if sheets == ['*'] else sheets
+        stem, ext = os.path.splitext(job.output_file)
+        split.extend(job._replace(output_file=f"{stem}_{name}{ext}", sheet=name)
+                     for name in names)
+    return split
+
+def run_job(job, normalization='vector', distance='euclidean', **options):
+    """Run one job and return the number of rows written"""
+    # Only run_topsis's defaults (None or False) allow the fast path;
+    # precision=0 is an option even though it is falsy
+    plain = all(value is None or value is False for value in options.values())
+    if job.sheet is None and plain:
+        rows = run_topsis_small(*job[:4], normalization, distance)
+        if rows is not None:
+            return rows
+    result = run_topsis(*job[:4], normalization=normalization,
+                        distance=distance, sheet=job.sheet, **options)
+    return result if isinstance(result, int) else len(result)
+
+def _timed(job, options):
+    start = time.perf_counter()
+    try:
+        rows, error = run_job(job, **options), None
+    except Exception as e:
+        rows, error = 0, str(e)
+    return JobResult(job, rows, time.perf_counter() - start, error)
+
+def run_batch(jobs, max_jobs=None, processes=False, **options):
+    """Run jobs on a thread pool in one process, returning JobResults in order
+
+    max_jobs bounds how many files are processed at once. The other options
+    (columns, chunksize, workers, top_k, cache, normalization, ...) are
+    passed to run_topsis for every job, so a ResultCache is shared by all of
+    them. A failing job is reported in its JobResult and does not stop the
+    others.
+
+    With processes set, jobs run in a pool of worker processes instead.
+    Parsing Excel (and the other pure-Python readers) holds the GIL, so
+    this is what lets several workbooks or sheets be read at once. The
+    options are then pickled to each process; a cache needs a DiskBackend.
+    """
+    max_jobs = max_jobs or min(8, os.cpu_count() or 1)
+    if processes:
+        with ProcessPoolExecutor(max_workers=max_jobs) as pool:
+            return list(pool.map(_timed, jobs, repeat(options)))
+    with ThreadPoolExecutor(max_workers=max_jobs,
+                            thread_name_prefix='topsis-batch') as pool:
+        return list(pool.map(_timed, jobs, repeat(options)))
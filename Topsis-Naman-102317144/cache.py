@@ -0,0 +1,176 @@
+import os
+import json
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+try:
+    from .engine import (impact_mask, column_stats, scaling, distance_order,
+                         working_dtype, ideal_solutions, score_rows,
+                         score_blocks)
+except ImportError:
+    from engine import (impact_mask, column_stats, scaling, distance_order,
+                        working_dtype, ideal_solutions, score_rows,
+                        score_blocks)
+
+
+def matrix_key(matrix):
+    """Content hash of a numeric matrix (shape, dtype and values)"""
+    matrix = np.ascontiguousarray(matrix, dtype=float)
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(repr(matrix.shape).encode())
+    digest.update(memoryview(matrix).cast('B'))
+    return digest.hexdigest()
+
+def criteria_key(weights, impacts):
+    """Hash of the weights, scaled to unit sum (scores are scale-free), and impacts"""
+    weights = np.asarray(weights, dtype=float)
+    total = np.abs(weights).sum()
+    if total:
+        weights = weights / total
+    payload = json.dumps([[float(w) for w in weights], list(impacts)])
+    return hashlib.blake2b(payload.encode(), digest_size=20).hexdigest()
+
+
+class MemoryBackend:
+    """In-process LRU store of arrays, bounded by item count and bytes"""
+
+    def __init__(self, max_items=1024, max_bytes=256 << 20):
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self._items = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._items.get(key)
+            if value is not None:
+                self._items.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        value.setflags(write=False)
+        with self._lock:
+            if key in self._items:
+                self._bytes -= self._items.pop(key).nbytes
+            self._items[key] = value
+            self._bytes += value.nbytes
+            while self._items and (len(self._items) > self.max_items
+                                   or self._bytes > self.max_bytes):
+                self._bytes -= self._items.popitem(last=False)[1].nbytes
+
+
+class DiskBackend:
+    """Directory of .npy files, evicting least recently used above max_bytes"""
+
+    def __init__(self, directory, max_bytes=1 << 30):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.npy")
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            value = np.load(path, allow_pickle=False)
+        except (OSError, ValueError):
+            return None
+        try:
+            os.utime(path)  # mark as recently used
+        except OSError:
+            pass  # evicted meanwhile, or a read-only cache
+        return value
+
+    def set(self, key, value):
+        fd, tmp = tempfile.mkstemp(suffix='.tmp', dir=self.directory)
+        with os.fdopen(fd, 'wb') as f:
+            np.save(f, value, allow_pickle=False)
+        os.replace(tmp, self._path(key))
+        self._evict()
+
+    def _evict(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith('.npy'):
+                path = os.path.join(self.directory, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+
+
+class ResultCache:
+    """Cache of TOPSIS scores keyed on matrix content, weights and impacts.
+
+    Column statistics (the normalization) are cached per matrix as well, so
+    a weight or impact change on a known matrix skips straight to scoring.
+    """
+
+    def __init__(self, backend=None):
+        self.backend = backend if backend is not None else MemoryBackend()
+        self.hits = 0
+        self.misses = 0
+
+    def column_stats(self, matrix, key=None):
+        """column_stats of the matrix as a (4, criteria) array"""
+        key = f"colstats-{key or matrix_key(matrix)}"
+        stats = self.backend.get(key)
+        if stats is None:
+            stats = np.stack(column_stats(np.asarray(matrix, dtype=float)))
+            self.backend.set(key, stats)
+        return stats
+
+    def scores(self, matrix, weights, impacts, normalization='vector',
+               distance='euclidean', dtype=None):
+        """TOPSIS scores of the matrix, computed only on a cache miss
+
+        With dtype, a miss is scored in that precision (see score_blocks)
+        and cached apart from the float64 scores.
+        """
+        p = distance_order(distance)
+        mkey = matrix_key(matrix)
+        key = f"scores-{mkey}-{criteria_key(weights, impacts)}"
+        if (normalization, p) != ('vector', 2):
+            key += f"-{normalization}-{p:g}"
+        if dtype is not None:
+            dtype = working_dtype(dtype)
+            key += f"-{dtype.name}"
+        scores = self.backend.get(key)
+        if scores is not None:
+            self.hits += 1
+            return scores
+
+        self.misses += 1
+        stats = self.column_stats(matrix, mkey)
+        shift, scale = scaling(stats, normalization)
+        weights = np.asarray(weights, dtype=float)
+        ideal_best, ideal_worst = ideal_solutions(scale, stats[1], stats[2],
+                                                  weights, impact_mask(impacts),
+                                                  shift)
+        if dtype is not None:
+            scores = score_blocks(np.asarray(matrix), scale, weights,
+                                  ideal_best, ideal_worst,
+                                  np.empty(len(matrix)), shift=shift, p=p,
+                                  dtype=dtype)
+        else:
+            scores = score_rows(np.asarray(matrix, dtype=float), scale,
+                                weights, ideal_best, ideal_worst, shift, p)
+        self.backend.set(key, scores)
+        return scores
@@ -0,0 +1,185 @@
+import os
+import re
+import gzip
+import queue
+import threading
+
+import numpy as np
+
+# Rows formatted per write; the text of one chunk is written in one call
+CHUNK_ROWS = 100_000
+BUFFER_BYTES = 1 << 22
+COMPRESSIONS = {'.gz': 'gzip', '.zst': 'zstd'}
+# Fast levels: the formatting, not the ratio, should set the pace
+GZIP_LEVEL = 1
+ZSTD_LEVEL = 3
+
+# Cells that csv.QUOTE_MINIMAL (and so DataFrame.to_csv) puts in quotes
+_NEEDS_QUOTES = re.compile(r'[,"\r\n]')
+
+
+def compression_for(path, compression=None):
+    """'gzip', 'zstd' or None: the given compression, else the path suffix's"""
+    if compression is None:
+        return COMPRESSIONS.get(os.path.splitext(path)[1].lower())
+    if compression not in ('gzip', 'zstd'):
+        raise ValueError("Compression must be gzip or zstd")
+    return compression
+
+def open_output(path, append=False, compression=None):
+    """Binary file for path, gzip- or zstd-compressed if asked"""
+    mode = 'ab' if append else 'wb'
+    if compression == 'gzip':
+        return gzip.open(path, mode, compresslevel=GZIP_LEVEL)
+    if compression == 'zstd':
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError("zstd output needs the zstandard package: "
+                              "pip install Topsis-Naman-102317144[zstd]")
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).stream_writer(
+            open(path, mode, buffering=BUFFER_BYTES), closefd=True)
+    return open(path, mode, buffering=BUFFER_BYTES)
+
+class _BackgroundWriter:
+    """Writes (and compresses) chunks on a thread while the next is formatted
+
+    zlib, zstd and file writes release the GIL, so they overlap with the
+    Python formatting of the following chunk. Errors surface on the next
+    write or on close.
+    """
+
+    def __init__(self, file):
+        self._file = file
+        self._chunks = queue.Queue(maxsize=2)
+        self._error = None
+        self._thread = threading.Thread(target=self._run, daemon=True,
+                                        name='topsis-csv-writer')
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            data = self._chunks.get()
+            if data is None:
+                return
+            if self._error is None:
+                try:
+                    self._file.write(data)
+                except BaseException as e:
+                    self._error = e
+
+    def write(self, data):
+        if self._error is not None:
+            raise self._error
+        self._chunks.put(data)
+
+    def close(self):
+        self._chunks.put(None)
+        self._thread.join()
+        self._file.close()
+        if self._error is not None:
+            raise self._error
+
+
+def _quote(text):
+    if _NEEDS_QUOTES.search(text):
+        return '"' + text.replace('"', '""') + '"'
+    return text
+
+def _quote_all(cells):
+    """Quote the cells that need it; one scan when none do"""
+    if _NEEDS_QUOTES.search('\x00'.join(cells)):
+        return [_quote(c) for c in cells]
+    return cells
+
+def _object_cell(value):
+    # float_format does not reach floats in object columns in pandas either
+    if isinstance(value, str):
+        return value
+    if value is None or (isinstance(value, float) and value != value):
+        return ''
+    text = str(value)
+    return '' if text in ('<NA>', 'NaT') else text
+
+def _format_column(series, float_format=None):
+    """Cells of one column as DataFrame.to_csv writes them"""
+    dtype = series.dtype
+    if isinstance(dtype, np.dtype) and dtype.kind in 'iub':
+        return list(map(str, series.to_numpy().tolist()))
+
+    if isinstance(dtype, np.dtype) and dtype.kind == 'f':
+        values = series.to_numpy()
+        if float_format is not None:
+            cells = list(map(float_format, values.tolist()))
+        elif dtype.itemsize == 8:
+            cells = list(map(repr, values.tolist()))
+        else:
+            cells = values.astype(str).tolist()
+        for i in np.flatnonzero(np.isnan(values)):
+            cells[i] = ''
+        return cells
+
+    if isinstance(dtype, np.dtype) and dtype.kind in 'Mm':
+        # Dates only, times only etc. follow pandas' own formatting rules;
+        # a lone empty field comes back quoted, which it is not in a row
+        cells = series.to_frame().to_csv(header=False, index=False,
+                                         lineterminator='\n').split('\n')[:-1]
+        return ['' if c == '""' else c for c in cells]
+
+    return _quote_all([_object_cell(v)
+                       for v in series.to_numpy(dtype=object).tolist()])
+
+
+class CsvWriter:
+    """Streams tables to a CSV file in large formatted chunks.
+
+    The output matches DataFrame.to_csv(index=False) unless precision is
+    set, in which case float cells are written with that many decimals (like
+    float_format='%.<precision>f'). Rows are formatted CHUNK_ROWS at a time
+    into one string per chunk, which a background thread writes through a
+    large buffer, gzip or zstd (see compression_for) while the next chunk
+    is formatted. Use as a context manager, or call close().
+    """
+
+    def __init__(self, path, precision=None, compression=None, append=False):
+        self.float_format = (None if precision is None
+                             else f'%.{int(precision)}f'.__mod__)
+        self._file = _BackgroundWriter(
+            open_output(path, append, compression_for(path, compression)))
+        self._header = not append
+
+    def write(self, df, extra=None):
+        """Write the rows of df, then the extra columns (name -> 1-D array)
+
+        extra lets results be appended as columns without copying df.
+        """
+        import pandas as pd
+
+        extra = {name: pd.Series(values) for name, values in (extra or {}).items()}
+        if self._header:
+            names = [str(c) for c in df.columns] + list(extra)
+            self._file.write((','.join(_quote_all(names)) + os.linesep).encode('utf-8'))
+            self._header = False
+
+        columns = [df.iloc[:, j] for j in range(df.shape[1])] + list(extra.values())
+        for start in range(0, len(df), CHUNK_ROWS):
+            cells = [_format_column(col.iloc[start:start + CHUNK_ROWS],
+                                    self.float_format) for col in columns]
+            text = os.linesep.join(map(','.join, zip(*cells))) + os.linesep
+            self._file.write(text.encode('utf-8'))
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+def write_csv(df, path, precision=None, compression=None, extra=None):
+    """Write df (plus extra columns) with a CsvWriter"""
+    with CsvWriter(path, precision, compression) as writer:
+        writer.write(df, extra)
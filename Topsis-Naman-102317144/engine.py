@@ -0,0 +1,559 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+BLOCK_BYTES = 8 << 20
+
+
+def impact_mask(impacts):
+    """Boolean mask, True where the criterion is a benefit ('+')"""
+    return np.asarray(impacts) == '+'
+
+
+def column_stats(matrix):
+    """Per-column sum of squares, min, max and sum of the raw matrix"""
+    return (np.square(matrix).sum(axis=-2),
+            matrix.min(axis=-2),
+            matrix.max(axis=-2),
+            matrix.sum(axis=-2))
+
+
+def _minmax(sum_sq, col_min, col_max, col_sum):
+    """Shift by the column min and scale by its range. A constant column
+    has no range; it scales by 1, so it is all zeros and adds no distance.
+    """
+    col_range = col_max - col_min
+    return col_min, np.where(col_range == 0, 1.0, col_range)
+
+
+# Normalizations map column_stats to a per-column (shift, scale); the
+# normalized matrix is (x - shift) / scale, with shift None for no shift.
+NORMALIZATIONS = {
+    'vector': lambda sum_sq, col_min, col_max, col_sum: (None, np.sqrt(sum_sq)),
+    'minmax': _minmax,
+    'max': lambda sum_sq, col_min, col_max, col_sum: (None, col_max),
+    'sum': lambda sum_sq, col_min, col_max, col_sum: (None, col_sum),
+}
+
+# Distances are weighted Minkowski distances, registered by their order p
+DISTANCES = {'euclidean': 2.0, 'manhattan': 1.0, 'chebyshev': np.inf}
+
+
+def register_normalization(name, func):
+    """Add a normalization: func(sum_sq, col_min, col_max, col_sum) -> (shift, scale)"""
+    NORMALIZATIONS[name] = func
+
+
+def register_distance(name, p):
+    """Add a named Minkowski distance of order p (np.inf for Chebyshev)"""
+    DISTANCES[name] = float(p)
+
+
+def normalizer(normalization='vector'):
+    """Registered normalization function, checking the name"""
+    if normalization not in NORMALIZATIONS:
+        raise ValueError(f"Unknown normalization '{normalization}', choose from "
+                         f"{', '.join(NORMALIZATIONS)}")
+    return NORMALIZATIONS[normalization]
+
+
+def scaling(stats, normalization='vector'):
+    """Per-column (shift, scale) of a normalization, from column_stats"""
+    return normalizer(normalization)(*stats)
+
+
+def distance_order(distance='euclidean'):
+    """Minkowski order p of a registered distance name or of 'minkowski:p'"""
+    if distance in DISTANCES:
+        return DISTANCES[distance]
+    name, _, order = str(distance).partition(':')
+    try:
+        p = float(order) if name == 'minkowski' else None
+    except ValueError:
+        p = None
+    if p is None or not p >= 1:
+        raise ValueError(f"Unknown distance '{distance}', choose from "
+                         f"{', '.join(DISTANCES)} or minkowski:<p> with p >= 1")
+    return p
+
+
+def working_dtype(dtype):
+    """Floating dtype for reduced-precision scoring, checking the name"""
+    try:
+        dtype = np.dtype(dtype)
+    except TypeError:
+        dtype = None
+    if dtype is None or not np.issubdtype(dtype, np.floating):
+        raise ValueError("dtype must be a floating type such as float32 or float64")
+    return dtype
+
+
+def weigh(matrix, scale, weights, shift=None):
+    """Normalize by column shift and scale and apply weights"""
+    if shift is not None:
+        matrix = matrix - np.asarray(shift)[..., None, :]
+    scale = np.asarray(scale)[..., None, :]
+    weights = np.asarray(weights)[..., None, :]
+    return matrix / scale * weights
+
+
+def ideal_solutions(scale, col_min, col_max, weights, benefit, shift=None):
+    """Ideal best and worst points of the weighted matrix from column extremes"""
+    if shift is not None:
+        col_min, col_max = col_min - shift, col_max - shift
+    lo = col_min / scale * weights
+    hi = col_max / scale * weights
+    upper = np.maximum(lo, hi)
+    lower = np.minimum(lo, hi)
+    return np.where(benefit, upper, lower), np.where(benefit, lower, upper)
+
+
+def euclidean_dist(weighted, ideal):
+    """Row-wise euclidean distance from an ideal point"""
+    ideal = np.asarray(ideal)[..., None, :]
+    return np.sqrt(np.square(weighted - ideal).sum(axis=-1))
+
+
+def minkowski_dist(weighted, ideal, p=2.0):
+    """Row-wise Minkowski distance of order p from an ideal point"""
+    if p == 2:
+        return euclidean_dist(weighted, ideal)
+    diff = np.abs(weighted - np.asarray(ideal)[..., None, :])
+    if p == 1:
+        return diff.sum(axis=-1)
+    if np.isinf(p):
+        return diff.max(axis=-1)
+    return np.power(np.power(diff, p).sum(axis=-1), 1 / p)
+
+
+def _dist_into(work, ideal, p, scratch):
+    """minkowski_dist of a 2-D work buffer, using scratch for the deviations"""
+    np.subtract(work, np.asarray(ideal, dtype=work.dtype), out=scratch)
+    if p == 2:
+        np.square(scratch, out=scratch)
+        return np.sqrt(scratch.sum(axis=-1))
+    np.abs(scratch, out=scratch)
+    if p == 1:
+        return scratch.sum(axis=-1)
+    if np.isinf(p):
+        return scratch.max(axis=-1)
+    np.power(scratch, p, out=scratch)
+    return np.power(scratch.sum(axis=-1), 1 / p)
+
+
+def closeness(dist_best, dist_worst):
+    """Relative closeness to the ideal solution"""
+    return dist_worst / (dist_best + dist_worst)
+
+
+def merge_stats(stats, other):
+    """Combine the column_stats of two row blocks"""
+    if stats is None:
+        return other
+    return (stats[0] + other[0],
+            np.minimum(stats[1], other[1]),
+            np.maximum(stats[2], other[2]),
+            stats[3] + other[3])
+
+
+def score_rows(matrix, scale, weights, ideal_best, ideal_worst, shift=None,
+               p=2.0):
+    """Score rows against ideal points computed over the whole matrix"""
+    weighted = weigh(matrix, scale, weights, shift)
+    return closeness(minkowski_dist(weighted, ideal_best, p),
+                     minkowski_dist(weighted, ideal_worst, p))
+
+
+def score_rows_inplace(work, scale, weights, ideal_best, ideal_worst,
+                       shift=None, p=2.0):
+    """score_rows on a private 2-D buffer, overwriting it with the weighted rows
+
+    The arithmetic stays in work's dtype (e.g. float32) and both distances
+    share one scratch buffer, so no full-size float64 temporaries are made.
+    """
+    dtype = work.dtype
+    if shift is not None:
+        work -= np.asarray(shift, dtype=dtype)
+    work *= np.asarray(np.asarray(weights) / scale, dtype=dtype)
+    scratch = np.empty_like(work)
+    return closeness(_dist_into(work, ideal_best, p, scratch),
+                     _dist_into(work, ideal_worst, p, scratch))
+
+
+def topsis_kernel(matrix, weights, impacts, normalization='vector',
+                  distance='euclidean', dtype=None):
+    """Score a float matrix of shape (..., alternatives, criteria)
+
+    normalization and distance name entries of NORMALIZATIONS and
+    DISTANCES (or 'minkowski:p'). With dtype (e.g. 'float32') a 2-D matrix
+    is scored block by block in that precision, see topsis_blockwise.
+    """
+    if dtype is not None:
+        return topsis_blockwise(np.asarray(matrix), weights, impacts,
+                                normalization=normalization,
+                                distance=distance, dtype=dtype)
+    matrix = np.asarray(matrix, dtype=float)
+    weights = np.asarray(weights, dtype=float)
+    benefit = impact_mask(impacts)
+    p = distance_order(distance)
+
+    stats = column_stats(matrix)
+    shift, scale = scaling(stats, normalization)
+    ideal_best, ideal_worst = ideal_solutions(scale, stats[1], stats[2],
+                                              weights, benefit, shift)
+    return score_rows(matrix, scale, weights, ideal_best, ideal_worst, shift, p)
+
+
+def block_rows_for(num_criteria, itemsize=8):
+    """Rows per block so that one block stays around BLOCK_BYTES"""
+    return max(1, BLOCK_BYTES // max(1, num_criteria * itemsize))
+
+
+def _map_blocks(func, num_rows, block_rows, workers=None):
+    """Apply func to each (start, stop) row span, in span order.
+
+    With workers > 1 the spans run on a thread pool; NumPy releases the GIL
+    inside its array loops, so blocks score in parallel over shared memory.
+    """
+    spans = [(start, min(start + block_rows, num_rows))
+             for start in range(0, num_rows, block_rows)]
+    if workers and workers > 1 and len(spans) > 1:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(func, spans))
+    return [func(span) for span in spans]
+
+
+def block_stats(block):
+    """column_stats of a block in any float dtype, with float64 sums"""
+    return (np.square(block).sum(axis=-2, dtype=float),
+            block.min(axis=-2).astype(float),
+            block.max(axis=-2).astype(float),
+            block.sum(axis=-2, dtype=float))
+
+
+def blockwise_stats(matrix, block_rows=None, workers=None, dtype=None):
+    """column_stats of a 2-D matrix read one block of rows at a time
+
+    With dtype, each block is converted to that dtype rather than float64.
+    """
+    dtype = float if dtype is None else dtype
+    block_rows = block_rows or block_rows_for(matrix.shape[1],
+                                              np.dtype(dtype).itemsize)
+    partials = _map_blocks(
+        lambda span: block_stats(np.asarray(matrix[span[0]:span[1]],
+                                            dtype=dtype)),
+        len(matrix), block_rows, workers)
+    # Merging in block order keeps the result independent of scheduling
+    stats = None
+    for partial in partials:
+        stats = merge_stats(stats, partial)
+    return stats
+
+
+def score_blocks(matrix, scale, weights, ideal_best, ideal_worst, out,
+                 block_rows=None, workers=None, shift=None, p=2.0,
+                 dtype=None):
+    """score_rows over blocks of a 2-D matrix, writing into out
+
+    With dtype, each block is copied once into a working buffer of that
+    dtype and scored in place (see score_rows_inplace).
+    """
+    itemsize = 8 if dtype is None else np.dtype(dtype).itemsize
+    block_rows = block_rows or block_rows_for(matrix.shape[1], itemsize)
+
+    def score_span(span):
+        if dtype is not None:
+            work = np.array(matrix[span[0]:span[1]], dtype=dtype)
+            out[span[0]:span[1]] = score_rows_inplace(
+                work, scale, weights, ideal_best, ideal_worst, shift, p)
+            return
+        block = np.asarray(matrix[span[0]:span[1]], dtype=float)
+        out[span[0]:span[1]] = score_rows(block, scale, weights, ideal_best,
+                                          ideal_worst, shift, p)
+
+    _map_blocks(score_span, len(matrix), block_rows, workers)
+    return out
+
+
+def topsis_blockwise(matrix, weights, impacts, out=None, block_rows=None,
+                     workers=None, normalization='vector',
+                     distance='euclidean', dtype=None):
+    """Score a 2-D matrix, e.g. an np.memmap, one block of rows at a time.
+
+    Only a block per worker is materialized at once; scores go to out
+    (which may itself be a memmap) or a new array. The column reductions
+    finish before any block is scored, and results do not depend on the
+    number of workers. dtype (e.g. 'float32') sets the precision blocks are
+    converted to and scored in; column reductions still add up in float64.
+    """
+    weights = np.asarray(weights, dtype=float)
+    benefit = impact_mask(impacts)
+    p = distance_order(distance)
+    if dtype is not None:
+        dtype = working_dtype(dtype)
+    itemsize = 8 if dtype is None else dtype.itemsize
+    block_rows = block_rows or block_rows_for(matrix.shape[1], itemsize)
+
+    stats = blockwise_stats(matrix, block_rows, workers, dtype)
+    shift, scale = scaling(stats, normalization)
+    ideal_best, ideal_worst = ideal_solutions(scale, stats[1], stats[2],
+                                              weights, benefit, shift)
+
+    if out is None:
+        out = np.empty(len(matrix))
+    return score_blocks(matrix, scale, weights, ideal_best, ideal_worst, out,
+                        block_rows, workers, shift, p, dtype)
+
+
+def check_scores(scores):
+    """Raise ValueError on NaN scores, which no rank order would be right for"""
+    if np.isnan(scores).any():
+        raise ValueError("TOPSIS scores are undefined (NaN); check the criteria "
+                         "for missing values or all-zero columns")
+    return scores
+
+
+def rank_scores(scores):
+    """Rank along the last axis, best first; ties get the truncated mean rank"""
+    scores = check_scores(np.asarray(scores, dtype=float))
+    n = scores.shape[-1]
+    # Equal scores share a rank, so their order within a tie does not matter
+    order = np.argsort(-scores, axis=-1)
+    ordered = np.take_along_axis(scores, order, axis=-1)
+    pos = np.broadcast_to(np.arange(n), scores.shape)
+
+    first = np.ones(scores.shape, dtype=bool)
+    first[..., 1:] = ordered[..., 1:] != ordered[..., :-1]
+    last = np.ones(scores.shape, dtype=bool)
+    last[..., :-1] = first[..., 1:]
+
+    start = np.maximum.accumulate(np.where(first, pos, 0), axis=-1)
+    end = np.flip(np.minimum.accumulate(
+        np.flip(np.where(last, pos, n - 1), axis=-1), axis=-1), axis=-1)
+
+    ranks = np.empty(scores.shape, dtype=np.int64)
+    np.put_along_axis(ranks, order, ((start + end) / 2 + 1).astype(np.int64),
+                      axis=-1)
+    return ranks
+
+
+def select_top_k(scores, k):
+    """Positions of the k highest scores, in position order.
+
+    Ties at the cut-off favour earlier positions, so the selection is
+    deterministic.
+    """
+    scores = check_scores(np.asarray(scores, dtype=float))
+    if k <= 0:
+        raise ValueError("top_k must be a positive integer")
+    if k >= len(scores):
+        return np.arange(len(scores))
+    kth = -np.partition(-scores, k - 1)[k - 1]
+    above = np.flatnonzero(scores > kth)
+    at = np.flatnonzero(scores == kth)[:k - len(above)]
+    return np.sort(np.concatenate([above, at]))
+
+
+def top_k_ranks(top_scores, ties_outside=0):
+    """Ranks of selected top scores within the full set of scores.
+
+    ties_outside counts unselected scores equal to the lowest selected one;
+    everything better than that is known to be selected.
+    """
+    top_scores = np.asarray(top_scores, dtype=float)
+    ordered = np.sort(top_scores)
+    right = np.searchsorted(ordered, top_scores, side='right')
+    greater = len(top_scores) - right
+    equal = right - np.searchsorted(ordered, top_scores, side='left')
+    if len(top_scores):
+        equal = equal + np.where(top_scores == ordered[0], ties_outside, 0)
+    return (greater + (equal + 1) / 2).astype(np.int64)
+
+
+def best_k(scores, k):
+    """Positions and exact ranks of the k best scores, best first.
+
+    Uses partial selection, so the full score vector is never sorted.
+    """
+    scores = np.asarray(scores, dtype=float)
+    keep = select_top_k(scores, k)
+    top = scores[keep]
+    ties_outside = 0
+    if len(top):
+        lowest = top.min()
+        ties_outside = (np.count_nonzero(scores == lowest)
+                        - np.count_nonzero(top == lowest))
+    order = np.argsort(-top, kind='stable')
+    return keep[order], top_k_ranks(top, ties_outside)[order]
+
+
+def segment_starts(groups):
+    """Start positions of the runs of equal labels in a 1-D array"""
+    groups = np.asarray(groups)
+    if not len(groups):
+        return np.zeros(0, dtype=np.intp)
+    return np.flatnonzero(np.concatenate([[True], groups[1:] != groups[:-1]]))
+
+
+def segment_stats(matrix, starts):
+    """column_stats of each row segment, shape (segments, criteria), float64"""
+    return (np.add.reduceat(np.square(matrix), starts, axis=0, dtype=float),
+            np.minimum.reduceat(matrix, starts, axis=0).astype(float),
+            np.maximum.reduceat(matrix, starts, axis=0).astype(float),
+            np.add.reduceat(matrix, starts, axis=0, dtype=float))
+
+
+def rank_segments(scores, starts):
+    """rank_scores within each segment of a 1-D score array"""
+    scores = check_scores(np.asarray(scores, dtype=float))
+    n = len(scores)
+    seg = np.repeat(np.arange(len(starts), dtype=np.min_scalar_type(len(starts))),
+                    np.diff(np.append(starts, n)))
+    # Order by score, then stably by segment; ties share a rank, so the
+    # score sort need not be stable, and small segment ids radix-sort
+    order = np.argsort(-scores)
+    order = order[np.argsort(seg[order], kind='stable')]
+    ordered, ordered_seg = scores[order], seg[order]
+    pos = np.arange(n)
+
+    first = np.ones(n, dtype=bool)
+    first[1:] = ((ordered[1:] != ordered[:-1])
+                 | (ordered_seg[1:] != ordered_seg[:-1]))
+    last = np.ones(n, dtype=bool)
+    last[:-1] = first[1:]
+
+    start = np.maximum.accumulate(np.where(first, pos, 0))
+    end = np.minimum.accumulate(np.where(last, pos, n - 1)[::-1])[::-1]
+    offset = np.asarray(starts)[ordered_seg]
+
+    ranks = np.empty(n, dtype=np.int64)
+    ranks[order] = ((start + end - 2 * offset) / 2 + 1).astype(np.int64)
+    return ranks
+
+
+def grouped_topsis(matrix, groups, weights, impacts, normalization='vector',
+                   distance='euclidean', dtype=None):
+    """Score every group of rows of a 2-D matrix as its own TOPSIS problem.
+
+    groups holds one sortable label per row. Each group gets its own
+    normalization and ideal points; the per-group reductions are segmented
+    (reduceat) over the rows sorted by group, so all groups are scored in
+    one vectorized pass. Returns (scores, ranks) in row order, ranks
+    counting within the group. dtype is as in topsis_blockwise.
+    """
+    matrix = np.asarray(matrix)
+    weights = np.asarray(weights, dtype=float)
+    benefit = impact_mask(impacts)
+    p = distance_order(distance)
+    dtype = float if dtype is None else working_dtype(dtype)
+
+    order = np.argsort(np.asarray(groups), kind='stable')
+    work = np.array(matrix[order], dtype=dtype)
+    starts = segment_starts(np.asarray(groups)[order])
+    if not len(starts):
+        return np.empty(0), np.empty(0, dtype=np.int64)
+    stats = segment_stats(work, starts)
+    shift, scale = scaling(stats, normalization)
+    ideal_best, ideal_worst = ideal_solutions(scale, stats[1], stats[2],
+                                              weights, benefit, shift)
+
+    # Spread the per-group parameters over the rows, then weigh in place
+    seg = np.repeat(np.arange(len(starts)), np.diff(np.append(starts, len(work))))
+    if shift is not None:
+        work -= shift[seg].astype(dtype)
+    work /= scale[seg].astype(dtype)
+    work *= weights.astype(dtype)
+    scratch = np.empty_like(work)
+    sorted_scores = closeness(_dist_into(work, ideal_best[seg], p, scratch),
+                              _dist_into(work, ideal_worst[seg], p, scratch))
+
+    scores = np.empty(len(work))
+    ranks = np.empty(len(work), dtype=np.int64)
+    scores[order] = sorted_scores
+    ranks[order] = rank_segments(sorted_scores, starts)
+    return scores, ranks
+
+
+def _powered(values, p):
+    """|values| ** p, or |values| for p = inf (combined with max, not sum)"""
+    if p == 2:
+        return np.square(values)
+    if p == 1 or np.isinf(p):
+        return np.abs(values)
+    return np.power(np.abs(values), p)
+
+
+def _root(powered, p):
+    """Undo _powered on a sum of powered terms"""
+    if p == 2:
+        return np.sqrt(powered)
+    if p == 1 or np.isinf(p):
+        return powered
+    return np.power(powered, 1 / p)
+
+
+def deviation_tables(matrix, normalization='vector', p=2.0):
+    """Powered distances of the normalized matrix to the column max and min.
+
+    Returned transposed, shape (criteria, alternatives), ready to be
+    weighted by batch_lp_dists.
+    """
+    stats = column_stats(matrix)
+    shift, scale = scaling(stats, normalization)
+    col_min, col_max = stats[1], stats[2]
+    if shift is not None:
+        matrix, col_min, col_max = matrix - shift, col_min - shift, col_max - shift
+    normalized = matrix / scale
+    return (_powered(normalized - col_max / scale, p).T,
+            _powered(normalized - col_min / scale, p).T)
+
+
+def batch_lp_dists(dev_hi, dev_lo, weight_sets, benefit, p=2.0):
+    """Powered distances to the ideal best and worst for every weight vector
+
+    Returns dist ** p for finite p (the distances themselves for p = inf),
+    shaped (scenarios, alternatives).
+    """
+    best_at_hi = benefit == (weight_sets >= 0)
+    if np.isinf(p):
+        w = np.abs(weight_sets)
+        shape = (len(weight_sets), dev_hi.shape[1])
+        dist_best, dist_worst = np.zeros(shape), np.zeros(shape)
+        for j in range(len(dev_hi)):
+            hi = w[:, j, None] * dev_hi[j]
+            lo = w[:, j, None] * dev_lo[j]
+            at_hi = best_at_hi[:, j, None]
+            np.maximum(dist_best, np.where(at_hi, hi, lo), out=dist_best)
+            np.maximum(dist_worst, np.where(at_hi, lo, hi), out=dist_worst)
+        return dist_best, dist_worst
+
+    # |w * (x - b)| ** p == |w| ** p * |x - b| ** p, so every scenario's
+    # powered distance is a weighted sum over the same two deviation tables.
+    # One product against both tables stacked writes each result once,
+    # instead of adding up two products over half the criteria.
+    w_p = _powered(weight_sets, p)
+    to_hi = np.where(best_at_hi, w_p, 0.0)
+    to_lo = np.where(best_at_hi, 0.0, w_p)
+    dev = np.concatenate([dev_hi, dev_lo])
+    return (np.concatenate([to_hi, to_lo], axis=1) @ dev,
+            np.concatenate([to_lo, to_hi], axis=1) @ dev)
+
+
+def batch_topsis(matrix, weight_sets, impacts, normalization='vector',
+                 distance='euclidean'):
+    """Score one matrix under many weight vectors in a single pass.
+
+    weight_sets has shape (scenarios, criteria). impacts is either shared by
+    every scenario or given per scenario. Returns (scores, ranks), both
+    shaped (scenarios, alternatives).
+    """
+    matrix = np.asarray(matrix, dtype=float)
+    weight_sets = np.atleast_2d(np.asarray(weight_sets, dtype=float))
+    benefit = np.broadcast_to(impact_mask(impacts), weight_sets.shape)
+    p = distance_order(distance)
+
+    dev_hi, dev_lo = deviation_tables(matrix, normalization, p)
+    dist_best, dist_worst = batch_lp_dists(dev_hi, dev_lo, weight_sets,
+                                           benefit, p)
+    scores = closeness(_root(dist_best, p), _root(dist_worst, p))
+    return scores, rank_scores(scores)
@@ -0,0 +1,143 @@
+# Cell texts pandas reads as missing, plus the Excel error values
+NA_TEXT = frozenset(['', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN',
+                     '-NaN', '-nan', '1.#IND', '1.#QNAN', '<NA>', 'N/A', 'NA',
+                     'NULL', 'NaN', 'None', 'n/a', 'nan', 'null', '#NULL!',
+                     '#DIV/0!', '#VALUE!', '#REF!', '#NAME?', '#NUM!'])
+
+
+def _open(path):
+    import openpyxl
+
+    return openpyxl.load_workbook(path, read_only=True, data_only=True,
+                                  keep_links=False)
+
+def _worksheet(book, sheet):
+    """The sheet named sheet, the sheet at that position, or the first one"""
+    if sheet is None:
+        return book.worksheets[0]
+    if isinstance(sheet, int):
+        if not -len(book.worksheets) <= sheet < len(book.worksheets):
+            raise ValueError(f"Worksheet index {sheet} is out of range")
+        return book.worksheets[sheet]
+    if sheet not in book.sheetnames:
+        raise ValueError(f"Worksheet '{sheet}' not found")
+    return book[sheet]
+
+def sheet_names(path):
+    """Names of the worksheets of an .xlsx workbook, in order"""
+    book = _open(path)
+    try:
+        return list(book.sheetnames)
+    finally:
+        book.close()
+
+def _column(values):
+    """Values of one column as the Series pd.read_excel would build"""
+    import numpy as np
+    import pandas as pd
+
+    series = pd.Series(values)
+    if len(series) and series.isna().all():
+        return series.astype(np.float64)  # an empty column is all NaN
+    if series.dtype == np.float64:
+        # pandas reads integral floats (a stored 2.0) as ints
+        data = series.to_numpy()
+        if len(data) and np.array_equal(data, np.trunc(data)):
+            series = series.astype(np.int64)
+    elif not pd.api.types.is_numeric_dtype(series.dtype):
+        texts = series.map(lambda v: isinstance(v, str), na_action='ignore')
+        if texts.any():
+            series = series.mask(series.isin(NA_TEXT))
+            try:
+                series = pd.to_numeric(series)
+            except (ValueError, TypeError):
+                pass
+    return series
+
+def _header(cells):
+    """Column names as pd.read_excel makes them: Unnamed: i, A.1 for repeats"""
+    names = []
+    seen = {}
+    for i, cell in enumerate(cells):
+        name = f'Unnamed: {i}' if cell is None else cell
+        if name in seen:
+            seen[name] += 1
+            name = f'{name}.{seen[name]}'
+        seen.setdefault(name, 0)
+        names.append(name)
+    return names
+
+def _width(row):
+    """Number of cells up to the last non-empty one"""
+    for i in range(len(row) - 1, -1, -1):
+        if row[i] is not None:
+            return i + 1
+    return 0
+
+def read_sheet(path, sheet=None, columns=None):
+    """One worksheet of an .xlsx file as a DataFrame, like pd.read_excel
+
+    The workbook is opened read-only and rows are streamed as bare values;
+    only the selected columns (names, first one the alternative names) are
+    turned into Series, without the per-cell conversion pandas does. sheet
+    is a name, a position, or None for the first sheet. As in pandas, the
+    first row is the header even if blank, trailing blank rows are dropped
+    while other blank rows become rows of missing values, texts such as
+    'NA' or '#DIV/0!' are missing values, and a column whose texts all
+    parse as numbers is read as numbers.
+    """
+    import pandas as pd
+
+    book = _open(path)
+    try:
+        ws = _worksheet(book, sheet)
+        ws.reset_dimensions()  # stored dimensions can be stale
+        rows = list(ws.iter_rows(values_only=True))
+    finally:
+        book.close()
+
+    while rows and not _width(rows[-1]):
+        rows.pop()
+    # Columns past the header are kept (as Unnamed: i) if any row uses them
+    width = max(map(_width, rows), default=0)
+    first = rows[0][:width] if rows else ()
+    header = _header(first + (None,) * (width - len(first)))
+
+    if columns is None:
+        keep = list(range(len(header)))
+    else:
+        missing = [c for c in columns if c not in header]
+        if missing:
+            raise ValueError(f"Columns not found in the sheet: {missing}")
+        keep = [header.index(c) for c in columns]
+
+    data = [row if len(row) >= width else row + (None,) * (width - len(row))
+            for row in rows[1:]]
+    cells = list(zip(*data)) if data else [()] * width
+    return pd.DataFrame({header[j]: _column(cells[j]) for j in keep})
+
+def _read_one(job):
+    path, sheet, columns = job
+    return read_sheet(path, sheet, columns)
+
+def read_sheets(path, sheets=None, columns=None, workers=None):
+    """Several worksheets of a workbook as {sheet name: DataFrame}
+
+    sheets lists names or positions (None for every sheet). With workers
+    above 1 the sheets are parsed in that many processes, since parsing
+    holds the GIL and threads would not overlap.
+    """
+    book = _open(path)
+    try:
+        names = [_worksheet(book, s).title
+                 for s in (book.sheetnames if sheets is None else sheets)]
+    finally:
+        book.close()
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    jobs = [(path, name, columns) for name in names]
+    if not workers or workers < 2 or len(jobs) < 2:
+        return dict(zip(names, map(_read_one, jobs)))
+    with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+        return dict(zip(names, pool.map(_read_one, jobs)))
@@ -0,0 +1,168 @@
+import os
+import tempfile
+
+import numpy as np
+
+try:
+    from .engine import check_scores
+except ImportError:
+    from engine import check_scores
+
+# Scores sorted in memory per spilled run, and records held while merging
+RUN_ROWS = 1 << 20
+MERGE_ROWS = 1 << 20
+
+# A run record: sort key (the negated score, so best comes first) and row
+RUN_DTYPE = np.dtype([('key', np.float64), ('row', np.int64)])
+
+
+def merge_runs(runs, merge_rows=MERGE_ROWS):
+    """k-way merge of sorted runs, yielding (keys, rows) blocks in key order
+
+    runs are RUN_DTYPE arrays (usually memmaps) sorted by key. Each round
+    looks at the next window of every run and emits everything up to the
+    smallest key that ends a window, so about merge_rows records are read
+    into memory at a time. The run that set the bound is emitted whole,
+    so every round makes progress. Equal keys can be split over blocks.
+    """
+    window = max(1, merge_rows // max(len(runs), 1))
+    pos = [0] * len(runs)
+    while True:
+        live = [i for i in range(len(runs)) if pos[i] < len(runs[i])]
+        if not live:
+            return
+        ends = [min(pos[i] + window, len(runs[i])) for i in live]
+        bound = min((runs[i]['key'][end - 1] for i, end in zip(live, ends)
+                     if end < len(runs[i])), default=np.inf)
+
+        parts = []
+        for i, end in zip(live, ends):
+            take = np.searchsorted(runs[i]['key'][pos[i]:end], bound,
+                                   side='right')
+            parts.append(runs[i][pos[i]:pos[i] + take])
+            pos[i] += take
+        block = np.concatenate(parts)
+        block = block[np.argsort(block['key'], kind='stable')]
+        yield block['key'], block['row']
+
+
+class ExternalRanker:
+    """Exact ranks of a score stream too long to rank in memory
+
+    add() takes the scores in row order, one chunk at a time. They are
+    appended to a scores file, and every run_rows of them are sorted and
+    spilled as a run. ranks() k-way merges the runs (see merge_runs) and
+    scatters each group of equal scores' rank into a ranks file in row
+    order. Ranks follow engine.rank_scores: best first, ties get the
+    truncated mean rank, and NaN scores are rejected by add().
+
+    scores() and ranks() return memmaps over files in a temporary directory
+    (under directory, default the system one), removed by close(); use it
+    as a context manager. Memory stays around run_rows + merge_rows records
+    whatever the number of rows, and the rank scatter goes through the page
+    cache.
+    """
+
+    def __init__(self, directory=None, run_rows=RUN_ROWS, merge_rows=MERGE_ROWS):
+        self.run_rows = run_rows
+        self.merge_rows = merge_rows
+        self._tmp = tempfile.TemporaryDirectory(prefix='topsis-rank-',
+                                                dir=directory)
+        self._scores = open(self._path('scores.f8'), 'wb')
+        self._runs = []
+        self._pending = []
+        self._pending_rows = 0
+        self.rows = 0
+
+    def _path(self, name):
+        return os.path.join(self._tmp.name, name)
+
+    def add(self, scores):
+        """Append the scores of the next rows"""
+        scores = check_scores(np.asarray(scores, dtype=np.float64))
+        scores.tofile(self._scores)
+
+        records = np.empty(len(scores), dtype=RUN_DTYPE)
+        records['key'] = -scores
+        records['row'] = np.arange(self.rows, self.rows + len(scores))
+        self._pending.append(records)
+        self._pending_rows += len(records)
+        self.rows += len(scores)
+        if self._pending_rows >= self.run_rows:
+            self._spill()
+
+    def _spill(self):
+        run = np.concatenate(self._pending)
+        run = run[np.argsort(run['key'], kind='stable')]
+        path = self._path(f'run{len(self._runs)}.bin')
+        run.tofile(path)
+        self._runs.append((path, len(run)))
+        self._pending = []
+        self._pending_rows = 0
+
+    def _memmap(self, name, dtype, mode='r'):
+        """Memmap of rows values in a file (np.memmap cannot map 0 bytes)"""
+        if not self.rows:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(self._path(name), dtype=dtype, mode=mode,
+                         shape=(self.rows,))
+
+    def scores(self):
+        """All added scores, in row order"""
+        self._scores.flush()
+        return self._memmap('scores.f8', np.float64)
+
+    def ranks(self):
+        """Rank of every added score, in row order"""
+        if self._pending_rows:
+            self._spill()
+        ranks = self._memmap('ranks.i8', np.int64, 'w+')
+        runs = [np.memmap(path, dtype=RUN_DTYPE, mode='r', shape=(size,))
+                for path, size in self._runs if size]
+        # Row at each sorted position, to revisit groups that span blocks
+        order = self._memmap('order.i8', np.int64, 'w+')
+
+        def close_group(stop):
+            """Rank the open group, sorted positions open_start to stop"""
+            rank = open_start + (stop - open_start + 1) // 2
+            for lo in range(open_start, stop, self.merge_rows):
+                ranks[order[lo:min(stop, lo + self.merge_rows)]] = rank
+
+        # Rank of a group = the positions before it + (its size + 1) // 2
+        position = 0
+        open_start, open_key = 0, None
+        for keys, rows in merge_runs(runs, self.merge_rows):
+            size = len(keys)
+            order[position:position + size] = rows
+            new = np.empty(size, dtype=bool)
+            new[0] = open_key is None or keys[0] != open_key
+            new[1:] = keys[1:] != keys[:-1]
+            starts = np.flatnonzero(new)
+            if open_key is not None and len(starts):
+                close_group(position + starts[0])
+
+            if len(starts) > 1:
+                # Groups that start and end within this block
+                first = position + starts[:-1]
+                counts = np.diff(starts)
+                ranks[rows[starts[0]:starts[-1]]] = np.repeat(
+                    first + (counts + 1) // 2, counts)
+            if len(starts):
+                open_start, open_key = position + starts[-1], keys[starts[-1]]
+            position += size
+        if open_key is not None:
+            close_group(position)
+        if isinstance(ranks, np.memmap):
+            ranks.flush()
+        return ranks
+
+    def close(self):
+        self._scores.close()
+        self._tmp.cleanup()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
@@ -0,0 +1,126 @@
+import os
+import re
+import csv
+
+import numpy as np
+
+try:
+    from .engine import topsis_kernel, rank_scores
+    from .inputs import parse_criteria
+except ImportError:
+    from engine import topsis_kernel, rank_scores
+    from inputs import parse_criteria
+
+# CSV inputs up to this size are read with the csv module, without pandas
+FAST_PATH_BYTES = 1 << 20
+
+_INT = re.compile(r'[-+]?\d{1,18}\Z')
+# Plain decimals that pandas' default float parser reads exactly like float()
+_DECIMAL = re.compile(r'[-+]?\d+(\.\d+)?\Z')
+_MAX_DIGITS = 12
+# Cells pandas would read as missing or boolean rather than as text
+_SPECIAL = {'', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN',
+            '-nan', '1.#IND', '1.#QNAN', '<NA>', 'N/A', 'NA', 'NULL', 'NaN',
+            'None', 'n/a', 'nan', 'null', 'True', 'False', 'TRUE', 'FALSE',
+            'true', 'false'}
+
+
+class _Irregular(Exception):
+    """The table needs pandas to be read the way read_table reads it"""
+
+
+def _is_number(text):
+    try:
+        float(text)
+    except ValueError:
+        return False
+    return True
+
+def _float_text(value):
+    """A float as pandas writes it to CSV (NaN as an empty cell)"""
+    value = float(value)
+    return repr(value) if value == value else ''
+
+def _column(cells):
+    """Values and output text of one criteria column, formatted as pandas does"""
+    if all(_INT.match(c) for c in cells):
+        values = [int(c) for c in cells]
+        return values, [str(v) for v in values]
+
+    for c in cells:
+        if not _DECIMAL.match(c) or len(c.lstrip('+-0.').replace('.', '')) > _MAX_DIGITS:
+            raise _Irregular(c)
+    values = [float(c) for c in cells]
+    return values, [repr(v) for v in values]
+
+def read_small_csv(input_file):
+    """Header, names, matrix and formatted columns of a plain CSV, or None
+
+    Returns None whenever pandas could read the file differently: blank or
+    ragged rows, missing or boolean-like cells, duplicate or empty headers,
+    numeric-looking names, or numbers outside the exactly-parsed range.
+    """
+    try:
+        with open(input_file, newline='', encoding='utf-8') as f:
+            rows = list(csv.reader(f))
+    except (OSError, UnicodeDecodeError, csv.Error):
+        return None
+
+    if len(rows) < 2:
+        return None
+    header, body = rows[0], rows[1:]
+    width = len(header)
+    if (len(set(header)) != width or '' in header
+            or header[0].startswith('\ufeff')
+            or any(len(row) != width for row in body)):
+        return None
+
+    names = [row[0] for row in body]
+    if any(n in _SPECIAL or n != n.strip() or _is_number(n) for n in names):
+        return None
+
+    try:
+        columns = [_column([row[j] for row in body]) for j in range(1, width)]
+    except _Irregular:
+        return None
+
+    matrix = np.array([values for values, _ in columns], dtype=float).T
+    return header, names, matrix, [text for _, text in columns]
+
+def run_topsis_small(input_file, weights, impacts, output_file,
+                     normalization='vector', distance='euclidean'):
+    """Score a small CSV into a CSV without importing pandas
+
+    Writes the same file as run_topsis and returns the number of rows, or
+    returns None (writing nothing) when the input is not a small, plain CSV
+    and the caller should fall back to run_topsis.
+    """
+    if not (input_file.lower().endswith('.csv')
+            and output_file.lower().endswith('.csv')):
+        return None
+    try:
+        if os.path.getsize(input_file) > FAST_PATH_BYTES:
+            return None
+    except OSError:
+        return None
+
+    table = read_small_csv(input_file)
+    if table is None:
+        return None
+    header, names, matrix, columns = table
+
+    if len(header) < 3:
+        raise ValueError("Input file must have at least 3 columns")
+    weight_list, impact_list = parse_criteria(weights, impacts, len(header) - 1)
+
+    scores = topsis_kernel(matrix, weight_list, impact_list, normalization,
+                           distance)
+    ranks = rank_scores(scores)
+
+    with open(output_file, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f, lineterminator=os.linesep)
+        writer.writerow(header + ['Topsis Score', 'Rank'])
+        for i, name in enumerate(names):
+            writer.writerow([name] + [text[i] for text in columns]
+                            + [_float_text(scores[i]), str(ranks[i])])
+    return len(names)
@@ -0,0 +1,129 @@
+import os
+
+import numpy as np
+
+try:
+    from .csvwriter import write_csv
+    from .excel import read_sheet
+except ImportError:
+    from csvwriter import write_csv
+    from excel import read_sheet
+
+CSV = ('.csv',)
+COMPRESSED_CSV = ('.csv.gz', '.csv.zst')
+EXCEL = ('.xlsx',)
+PARQUET = ('.parquet', '.pq')
+FEATHER = ('.feather', '.arrow', '.ipc')
+NUMPY = ('.npy', '.npz')
+SUPPORTED = CSV + COMPRESSED_CSV + EXCEL + PARQUET + FEATHER + NUMPY
+# A .npy result holds just these columns, as a (rows, 2) float64 array
+NPY_COLUMNS = ['Topsis Score', 'Rank']
+
+
+def file_format(path):
+    """Lower-case extension of a path, checked against the supported formats
+
+    Compressed CSV (.csv.gz, .csv.zst) counts as .csv.
+    """
+    if path.lower().endswith(COMPRESSED_CSV):
+        return '.csv'
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in SUPPORTED:
+        raise ValueError("File must be CSV, Excel, Parquet, Feather/Arrow "
+                         "or NumPy (.npy/.npz) format")
+    return ext
+
+def check_top_k_output(path, top_k):
+    """Reject a top_k run into .npy
+
+    top_k rows are written best first, and a .npy result (NPY_COLUMNS) has
+    no column saying which alternative each row is.
+    """
+    if top_k is not None and str(path).lower().endswith('.npy'):
+        raise ValueError("top_k results cannot be written to .npy, which does "
+                         "not record the alternatives; use .npz or CSV")
+
+def _matrix_frame(matrix, names=None, columns=None):
+    """Wrap a bare numeric matrix in the name + criteria table layout"""
+    import pandas as pd
+
+    matrix = np.asarray(matrix)
+    if matrix.ndim != 2:
+        raise ValueError("NumPy input must be a 2-D matrix")
+    if columns is None:
+        columns = [f'C{j + 1}' for j in range(matrix.shape[1])]
+    if names is None:
+        names = np.arange(1, len(matrix) + 1)
+    df = pd.DataFrame(matrix, columns=[str(c) for c in columns])
+    df.insert(0, 'Alternative', names)
+    return df
+
+def _read_npz(path):
+    import pandas as pd
+
+    with np.load(path, allow_pickle=False) as data:
+        if 'matrix' in data.files:
+            names = data['names'] if 'names' in data.files else None
+            columns = data['columns'] if 'columns' in data.files else None
+            return _matrix_frame(data['matrix'], names, columns)
+        return pd.DataFrame({key: data[key] for key in data.files})
+
+def read_table(path, columns=None, sheet=None):
+    """Read a table, picking the reader from the file extension.
+
+    columns limits the read to the named columns (the first one being the
+    alternative names); columnar formats then skip the rest entirely.
+    sheet picks the worksheet of an Excel file by name or position (default
+    the first); Excel is read with excel.read_sheet.
+    """
+    import pandas as pd
+
+    ext = file_format(path)
+    if sheet is not None and ext not in EXCEL:
+        raise ValueError("A sheet can only be chosen for Excel input")
+    if ext in CSV:
+        df = pd.read_csv(path, usecols=columns)
+    elif ext in EXCEL:
+        df = read_sheet(path, sheet, columns)
+    elif ext in PARQUET:
+        df = pd.read_parquet(path, columns=columns)
+    elif ext in FEATHER:
+        df = pd.read_feather(path, columns=columns)
+    elif ext == '.npy':
+        df = _matrix_frame(np.load(path, allow_pickle=False))
+    else:
+        df = _read_npz(path)
+
+    if columns is not None:
+        df = df[list(columns)]
+    return df
+
+def write_table(df, path, precision=None, compression=None):
+    """Write a table, picking the writer from the file extension
+
+    CSV goes through csvwriter.write_csv; precision (decimals for float
+    cells) and compression ('gzip' or 'zstd', else from a .gz/.zst suffix)
+    apply to CSV only. A .npy result is the (rows, 2) float64 array of
+    NPY_COLUMNS, as run_topsis_mapped writes it; tables without those
+    columns are saved without their first (name) column. .npz keeps every
+    column.
+    """
+    ext = file_format(path)
+    if ext in CSV:
+        write_csv(df, path, precision, compression)
+    elif ext in EXCEL:
+        df.to_excel(path, index=False)
+    elif ext in PARQUET:
+        df.to_parquet(path, index=False)
+    elif ext in FEATHER:
+        df.reset_index(drop=True).to_feather(path)
+    elif ext == '.npy':
+        values = (df[NPY_COLUMNS] if set(NPY_COLUMNS).issubset(df.columns)
+                  else df.iloc[:, 1:])
+        np.save(path, values.to_numpy(dtype=float))
+    else:
+        arrays = {}
+        for col in df.columns:
+            values = df[col].to_numpy()
+            arrays[str(col)] = values.astype(str) if values.dtype == object else values
+        np.savez(path, **arrays)
@@ -0,0 +1,212 @@
+import numpy as np
+import pandas as pd
+
+try:
+    from .engine import (impact_mask, scaling, normalizer, distance_order,
+                         ideal_solutions, score_rows, rank_scores)
+except ImportError:
+    from engine import (impact_mask, scaling, normalizer, distance_order,
+                        ideal_solutions, score_rows, rank_scores)
+
+
+class IncrementalTopsis:
+    """TOPSIS scorer over a table of alternatives that changes over time.
+
+    Column sums, sums of squares and min/max are kept up to date on every
+    add, update and remove. Scores are refreshed lazily when queried: all rows
+    are rescored only if the normalization's shift or scale, or an ideal
+    point, actually moved; otherwise just the rows that changed.
+    """
+
+    def __init__(self, weights, impacts, capacity=1024, normalization='vector',
+                 distance='euclidean'):
+        self.weights = np.asarray(weights, dtype=float)
+        self.benefit = impact_mask(impacts)
+        if self.benefit.shape != self.weights.shape:
+            raise ValueError("Number of weights doesn't match number of impacts")
+        normalizer(normalization)
+        self.normalization = normalization
+        self.p = distance_order(distance)
+
+        num_criteria = len(self.weights)
+        self._data = np.zeros((capacity, num_criteria))
+        self._scores = np.full(capacity, np.nan)
+        self._active = np.zeros(capacity, dtype=bool)
+        self._keys = [None] * capacity
+        self._slots = {}
+        self._free = []
+        self._size = 0
+
+        self.sum_sq = np.zeros(num_criteria)
+        self.col_sum = np.zeros(num_criteria)
+        self.col_min = np.full(num_criteria, np.inf)
+        self.col_max = np.full(num_criteria, -np.inf)
+
+        self._moved = False     # column stats changed since the last refresh
+        self._scored = None     # (shift, scale, ideal best, ideal worst) in use
+        self._pending = set()
+        self._ranks = None
+
+    def __len__(self):
+        return len(self._slots)
+
+    def __contains__(self, key):
+        return key in self._slots
+
+    def _check_row(self, values):
+        values = np.asarray(values, dtype=float)
+        if values.shape != self.weights.shape:
+            raise ValueError("Number of values doesn't match number of criteria")
+        return values
+
+    def _grow(self):
+        capacity = 2 * len(self._active)
+        self._data = np.resize(self._data, (capacity, self._data.shape[1]))
+        self._scores = np.resize(self._scores, capacity)
+        self._active = np.concatenate(
+            [self._active, np.zeros(capacity - len(self._active), dtype=bool)])
+        self._keys.extend([None] * (capacity - len(self._keys)))
+
+    def _insert(self, key, values):
+        if self._free:
+            slot = self._free.pop()
+        else:
+            if self._size == len(self._active):
+                self._grow()
+            slot = self._size
+            self._size += 1
+
+        self._data[slot] = values
+        self._active[slot] = True
+        self._keys[slot] = key
+        self._slots[key] = slot
+
+        sq = np.square(values)
+        if sq.any():
+            self.sum_sq += sq
+            self.col_sum += values
+            self._moved = True
+        if (values < self.col_min).any() or (values > self.col_max).any():
+            np.minimum(self.col_min, values, out=self.col_min)
+            np.maximum(self.col_max, values, out=self.col_max)
+            self._moved = True
+        self._pending.add(slot)
+        self._ranks = None
+
+    def _delete(self, key):
+        slot = self._slots.pop(key)
+        values = self._data[slot].copy()
+        self._active[slot] = False
+        self._keys[slot] = None
+        self._free.append(slot)
+        self._pending.discard(slot)
+        self._ranks = None
+
+        sq = np.square(values)
+        if sq.any():
+            self.sum_sq -= sq
+            self.col_sum -= values
+            self._moved = True
+
+        # Only a removed extreme forces a rescan, and only of its columns
+        touched = (values == self.col_min) | (values == self.col_max)
+        if touched.any():
+            rows = self._data[:self._size][self._active[:self._size]][:, touched]
+            if len(rows):
+                col_min, col_max = rows.min(axis=0), rows.max(axis=0)
+            else:
+                col_min = np.full(touched.sum(), np.inf)
+                col_max = np.full(touched.sum(), -np.inf)
+            if ((col_min != self.col_min[touched]).any()
+                    or (col_max != self.col_max[touched]).any()):
+                self.col_min[touched] = col_min
+                self.col_max[touched] = col_max
+                self._moved = True
+
+    def add(self, key, values):
+        """Add a new alternative"""
+        if key in self._slots:
+            raise ValueError(f"Alternative '{key}' already exists")
+        self._insert(key, self._check_row(values))
+
+    def update(self, key, values):
+        """Replace the criteria values of an existing alternative"""
+        if key not in self._slots:
+            raise KeyError(key)
+        values = self._check_row(values)
+        if np.array_equal(values, self._data[self._slots[key]]):
+            return
+        self._delete(key)
+        self._insert(key, values)
+
+    def remove(self, key):
+        """Remove an alternative"""
+        if key not in self._slots:
+            raise KeyError(key)
+        self._delete(key)
+
+    def _parameters(self):
+        """Shift, scale and ideal points from the current column stats"""
+        shift, scale = scaling((self.sum_sq, self.col_min, self.col_max,
+                                self.col_sum), self.normalization)
+        ideal_best, ideal_worst = ideal_solutions(
+            scale, self.col_min, self.col_max, self.weights, self.benefit, shift)
+        return shift, scale, ideal_best, ideal_worst
+
+    def _refresh(self):
+        if not self._moved and not self._pending:
+            return
+
+        rows = None
+        if self._moved:
+            # A stat that the normalization ignores (the sum of squares
+            # under minmax, say) leaves the other rows' scores as they are
+            parameters = self._parameters()
+            if self._scored is None or not all(
+                    np.array_equal(old, new)
+                    for old, new in zip(self._scored, parameters)
+                    if old is not None):
+                rows = self._live_slots()
+                # Resync the running sums so repeated removals can't drift
+                self.sum_sq = np.square(self._data[rows]).sum(axis=0)
+                self.col_sum = self._data[rows].sum(axis=0)
+                # Copies: under minmax the shift is col_min itself, and the
+                # stats are updated in place
+                self._scored = tuple(None if p is None else np.copy(p)
+                                     for p in self._parameters())
+        if rows is None:
+            rows = np.fromiter(self._pending, dtype=np.int64)
+
+        if len(rows):
+            shift, scale, ideal_best, ideal_worst = self._scored
+            self._scores[rows] = score_rows(self._data[rows], scale,
+                                            self.weights, ideal_best,
+                                            ideal_worst, shift, self.p)
+
+        self._moved = False
+        self._pending.clear()
+
+    def _live_slots(self):
+        return np.flatnonzero(self._active[:self._size])
+
+    def scores(self):
+        """Current TOPSIS score of every alternative, indexed by key"""
+        self._refresh()
+        slots = self._live_slots()
+        return pd.Series(self._scores[slots],
+                         index=[self._keys[s] for s in slots],
+                         name='Topsis Score')
+
+    def ranks(self):
+        """Current rank of every alternative, indexed by key"""
+        self._refresh()
+        slots = self._live_slots()
+        if self._ranks is None:
+            self._ranks = rank_scores(self._scores[slots])
+        return pd.Series(self._ranks, index=[self._keys[s] for s in slots],
+                         name='Rank')
+
+    def score(self, key):
+        """Current TOPSIS score of one alternative"""
+        self._refresh()
+        return float(self._scores[self._slots[key]])
@@ -0,0 +1,98 @@
+import os
+from collections import namedtuple
+
+import numpy as np
+
+try:
+    from .formats import SUPPORTED, read_table
+except ImportError:
+    from formats import SUPPORTED, read_table
+
+
+class ParsedInput(namedtuple('ParsedInput',
+                             ['df', 'weights', 'impacts', 'group_by'],
+                             defaults=(None,))):
+    """Input table with its weights and impacts, read and checked once
+
+    group_by names a column whose values split the rows into groups that
+    are ranked separately; it is not a criterion.
+    """
+    __slots__ = ()
+
+    @property
+    def matrix(self):
+        """Criteria columns as a float array"""
+        data = self.df.iloc[:, 1:]
+        if self.group_by is not None:
+            data = data.drop(columns=[self.group_by])
+        return data.to_numpy(dtype=float)
+
+    @property
+    def groups(self):
+        """Integer group code of each row (-1 for missing), or None"""
+        if self.group_by is None:
+            return None
+        import pandas as pd
+        return pd.factorize(self.df[self.group_by])[0]
+
+def parse_criteria(weights, impacts, num_criteria):
+    """Parse weight and impact strings and check them against the criteria"""
+    try:
+        weight_list = [float(w.strip()) for w in weights.split(',')]
+        impact_list = [i.strip() for i in impacts.split(',')]
+    except:
+        raise ValueError("Invalid format for weights or impacts")
+    
+    if len(weight_list) != num_criteria:
+        raise ValueError(f"Number of weights doesn't match number of columns")
+    
+    if len(impact_list) != num_criteria:
+        raise ValueError(f"Number of impacts doesn't match number of columns")
+    
+    for imp in impact_list:
+        if imp not in ['+', '-']:
+            raise ValueError(f"Impact must be '+' or '-', got '{imp}'")
+    
+    return weight_list, impact_list
+
+
+def read_input(input_file, columns=None, sheet=None):
+    """Read the input table, optionally just the given columns (or sheet)"""
+    
+    if not os.path.isfile(input_file):
+        raise FileNotFoundError(f"File '{input_file}' not found!")
+    
+    if not input_file.lower().endswith(SUPPORTED):
+        raise ValueError("Input file must be CSV, Excel, Parquet, "
+                         "Feather/Arrow or NumPy (.npy/.npz) format")
+    
+    try:
+        return read_table(input_file, columns, sheet)
+    except Exception as e:
+        raise Exception(f"Error reading file: {e}")
+
+def check_table(df, weights, impacts, group_by=None):
+    """Check a decision table and parse its weights and impacts"""
+    import pandas as pd
+    
+    if group_by is not None and group_by not in df.columns[1:]:
+        raise ValueError(f"Group column '{group_by}' not found")
+    
+    numeric_cols = [c for c in df.columns[1:] if c != group_by]
+    if len(numeric_cols) < 2:
+        raise ValueError("Input file must have at least 3 columns")
+    
+    for col in numeric_cols:
+        if not pd.api.types.is_numeric_dtype(df[col]):
+            raise ValueError(f"Column '{col}' contains non-numeric values")
+        if not np.isfinite(df[col].to_numpy(dtype=float)).all():
+            raise ValueError(f"Column '{col}' contains missing or non-finite values")
+    
+    weight_list, impact_list = parse_criteria(weights, impacts, len(numeric_cols))
+    return ParsedInput(df, weight_list, impact_list, group_by)
+
+def parse_inputs(input_file, weights, impacts, columns=None, group_by=None,
+                 sheet=None):
+    """Read and validate the input file once, returning a ParsedInput"""
+    return check_table(read_input(input_file, columns, sheet), weights, impacts,
+                       group_by)
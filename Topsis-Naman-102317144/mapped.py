@@ -0,0 +1,118 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+try:
+    from .engine import topsis_blockwise, rank_scores, best_k
+    from .inputs import parse_criteria
+    from .formats import write_table, check_top_k_output
+    from .profiling import get_profiler
+except ImportError:
+    from engine import topsis_blockwise, rank_scores, best_k
+    from inputs import parse_criteria
+    from formats import write_table, check_top_k_output
+    from profiling import get_profiler
+
+RAW = ('.f64', '.bin', '.dat')
+
+
+def load_matrix(path, num_criteria=None):
+    """Memory-map a .npy file or a raw float64 file without reading it"""
+    
+    if not os.path.isfile(path):
+        raise FileNotFoundError(f"File '{path}' not found!")
+    
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.npy':
+        matrix = np.load(path, mmap_mode='r')
+    elif ext in RAW:
+        if not num_criteria:
+            raise ValueError("Raw float64 input needs the number of criteria")
+        matrix = np.memmap(path, dtype=np.float64, mode='r')
+        if matrix.size % num_criteria:
+            raise ValueError("Raw input size is not a multiple of the number of criteria")
+        matrix = matrix.reshape(-1, num_criteria)
+    else:
+        raise ValueError("Memory-mapped input must be a .npy or raw float64 "
+                         "(.f64/.bin/.dat) file")
+    
+    if matrix.ndim != 2:
+        raise ValueError("Input matrix must be 2-D")
+    return matrix
+
+def run_topsis_mapped(input_file, weights, impacts, output_file, block_rows=None,
+                      workers=None, top_k=None, normalization='vector',
+                      distance='euclidean', dtype=None, profile=None,
+                      precision=None, compression=None):
+    """TOPSIS over a memory-mapped matrix without building a DataFrame.
+    
+    input_file is a .npy or raw float64 path, or an ndarray/np.memmap, holding
+    only the criteria columns. Normalization and distances run block by
+    block over the mapped buffer. A .npy output is written through a memmap
+    of shape (rows, 2) holding score and rank; other formats get an
+    Alternative / Topsis Score / Rank table. With top_k, only the best top_k
+    rows go to that table, which then cannot be .npy. normalization, distance and dtype are as in
+    topsis_blockwise. profile times the load, score, rank and write stages
+    (see profiling.get_profiler). precision and compression apply to CSV
+    output (see formats.write_table). Returns the number of rows written.
+    """
+    
+    profiler = get_profiler(profile)
+    check_top_k_output(output_file, top_k)
+    with profiler.stage('load') as stage:
+        if isinstance(input_file, np.ndarray):
+            matrix = input_file
+        else:
+            matrix = load_matrix(input_file, len(weights.split(',')))
+        stage.shape(*matrix.shape)
+    rows, cols = matrix.shape
+    
+    if matrix.shape[1] < 2:
+        raise ValueError("Input matrix must have at least 2 criteria")
+    
+    weight_list, impact_list = parse_criteria(weights, impacts, matrix.shape[1])
+    
+    if top_k is not None:
+        with profiler.stage('score', rows, cols):
+            scores = topsis_blockwise(matrix, weight_list, impact_list,
+                                      block_rows=block_rows, workers=workers,
+                                      normalization=normalization,
+                                      distance=distance, dtype=dtype)
+        with profiler.stage('rank', rows):
+            keep, ranks = best_k(scores, top_k)
+        with profiler.stage('write', len(keep), 3):
+            write_table(pd.DataFrame({'Alternative': keep + 1,
+                                      'Topsis Score': scores[keep],
+                                      'Rank': ranks}), output_file,
+                        precision, compression)
+        return len(keep)
+    
+    if output_file.lower().endswith('.npy'):
+        out = np.lib.format.open_memmap(output_file, mode='w+', dtype=np.float64,
+                                        shape=(len(matrix), 2))
+        with profiler.stage('score', rows, cols):
+            scores = topsis_blockwise(matrix, weight_list, impact_list,
+                                      out=out[:, 0], block_rows=block_rows,
+                                      workers=workers,
+                                      normalization=normalization,
+                                      distance=distance, dtype=dtype)
+        with profiler.stage('rank', rows):
+            out[:, 1] = rank_scores(scores)
+        with profiler.stage('write', rows, 2):
+            out.flush()
+    else:
+        with profiler.stage('score', rows, cols):
+            scores = topsis_blockwise(matrix, weight_list, impact_list,
+                                      block_rows=block_rows, workers=workers,
+                                      normalization=normalization,
+                                      distance=distance, dtype=dtype)
+        with profiler.stage('rank', rows):
+            ranks = rank_scores(scores)
+        with profiler.stage('write', rows, 3):
+            write_table(pd.DataFrame({'Alternative': np.arange(1, rows + 1),
+                                      'Topsis Score': scores,
+                                      'Rank': ranks}), output_file,
+                        precision, compression)
+    
+    return len(matrix)
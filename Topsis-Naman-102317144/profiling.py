@@ -0,0 +1,133 @@
+import time
+import tracemalloc
+from collections import namedtuple
+
+StageStats = namedtuple('StageStats', ['name', 'wall', 'cpu', 'peak_bytes',
+                                       'rows', 'cols'])
+
+
+class _Stage:
+    """Context manager timing one stage of a Profiler"""
+
+    def __init__(self, profiler, name, rows, cols):
+        self.profiler = profiler
+        self.name = name
+        self.rows = rows
+        self.cols = cols
+
+    def shape(self, rows, cols=None):
+        """Record the rows and columns the stage worked on"""
+        self.rows = rows
+        if cols is not None:
+            self.cols = cols
+
+    def __enter__(self):
+        self._traced = self.profiler.memory and not tracemalloc.is_tracing()
+        if self._traced:
+            tracemalloc.start()
+        elif self.profiler.memory:
+            tracemalloc.reset_peak()
+        self._base = tracemalloc.get_traced_memory()[0] if self.profiler.memory else 0
+        self._cpu = time.process_time()
+        self._wall = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        wall = time.perf_counter() - self._wall
+        cpu = time.process_time() - self._cpu
+        peak = 0
+        if self.profiler.memory:
+            peak = max(tracemalloc.get_traced_memory()[1] - self._base, 0)
+            if self._traced:
+                tracemalloc.stop()
+        self.profiler.record(StageStats(self.name, wall, cpu, peak,
+                                        self.rows, self.cols))
+        return False
+
+
+class _NullStage:
+    """Stage context that records nothing"""
+
+    def shape(self, rows, cols=None):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class NullProfiler:
+    """Profiler stand-in used when profiling is off; every call is a no-op"""
+    enabled = False
+    stages = ()
+    _stage = _NullStage()
+
+    def stage(self, name, rows=None, cols=None):
+        return self._stage
+
+
+NO_PROFILE = NullProfiler()
+
+
+class Profiler:
+    """Per-stage wall time, CPU time, peak memory and row/column counts
+
+    Use stage(name) as a context manager around each step. Every finished
+    stage is appended to stages as a StageStats and passed to each sink, a
+    callable taking that StageStats (e.g. to forward it to a metrics
+    system). With memory=False, tracemalloc is not used and peak_bytes is 0;
+    tracing roughly doubles the cost of allocation-heavy stages.
+    Stages should not be nested, since each one resets the traced peak.
+    """
+    enabled = True
+
+    def __init__(self, sinks=(), memory=True):
+        self.sinks = [sinks] if callable(sinks) else list(sinks)
+        self.memory = memory
+        self.stages = []
+
+    def stage(self, name, rows=None, cols=None):
+        """Context manager timing the named stage"""
+        return _Stage(self, name, rows, cols)
+
+    def record(self, stats):
+        self.stages.append(stats)
+        for sink in self.sinks:
+            sink(stats)
+
+    def totals(self):
+        """Summed wall and CPU time and the largest peak over all stages"""
+        return StageStats('total', sum(s.wall for s in self.stages),
+                          sum(s.cpu for s in self.stages),
+                          max((s.peak_bytes for s in self.stages), default=0),
+                          None, None)
+
+    def as_records(self):
+        """Stages as a list of dicts, e.g. for JSON or DataFrame.attrs"""
+        return [s._asdict() for s in self.stages]
+
+    def report(self):
+        """The stages as a text table"""
+        lines = [f"{'stage':<12}{'wall s':>10}{'cpu s':>10}{'peak MiB':>10}"
+                 f"{'rows':>12}{'cols':>6}"]
+        for s in self.stages + [self.totals()]:
+            rows = '' if s.rows is None else s.rows
+            cols = '' if s.cols is None else s.cols
+            lines.append(f"{s.name:<12}{s.wall:>10.4f}{s.cpu:>10.4f}"
+                         f"{s.peak_bytes / 2**20:>10.1f}{rows:>12}{cols:>6}")
+        return '\n'.join(lines)
+
+
+def get_profiler(profile=None):
+    """Profiler for a profile argument: None/False, True, a sink or a Profiler"""
+    if not profile:
+        return NO_PROFILE
+    if isinstance(profile, (Profiler, NullProfiler)):
+        return profile
+    if profile is True:
+        return Profiler()
+    if callable(profile):
+        return Profiler(sinks=[profile])
+    raise TypeError("profile must be True, a Profiler or a callable sink")
@@ -0,0 +1,225 @@
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+try:
+    from .engine import (BLOCK_BYTES, impact_mask, distance_order,
+                         deviation_tables, batch_lp_dists, topsis_kernel,
+                         rank_scores)
+except ImportError:
+    from engine import (BLOCK_BYTES, impact_mask, distance_order,
+                        deviation_tables, batch_lp_dists, topsis_kernel,
+                        rank_scores)
+
+METHODS = ('dirichlet', 'uniform')
+
+SensitivityResult = namedtuple('SensitivityResult',
+                               ['ranks', 'thresholds', 'samples'])
+
+
+def sample_weights(weights, samples, method='dirichlet', spread=0.1, rng=None):
+    """Random weight vectors around weights, shape (samples, criteria)
+
+    'uniform' scales each weight by an independent factor in
+    [1 - spread, 1 + spread]. 'dirichlet' draws from a Dirichlet centred on
+    the normalized weights, with a concentration chosen so that a typical
+    weight varies by about spread (relative standard deviation).
+    """
+    weights = np.asarray(weights, dtype=float)
+    rng = np.random.default_rng(rng)
+    if method == 'uniform':
+        return weights * rng.uniform(1 - spread, 1 + spread,
+                                     size=(samples, len(weights)))
+    if method != 'dirichlet':
+        raise ValueError(f"Sampling method must be one of {', '.join(METHODS)}")
+    if np.any(weights <= 0):
+        raise ValueError("Dirichlet sampling needs positive weights")
+
+    share = weights / weights.sum()
+    mean_share = 1 / len(weights)
+    concentration = max((1 - mean_share) / (mean_share * spread ** 2) - 1, 1e-3)
+    return rng.dirichlet(share * concentration, size=samples) * weights.sum()
+
+def _sample_ranks(pow_best, pow_worst):
+    """rank_scores of the closeness scores, from the powered distances
+
+    Closeness falls as pow_best / pow_worst grows, so rows are ordered by
+    that ratio without taking roots. The ratio's bits, with the lowest ones
+    replaced by the alternative's position, sort as plain integers, which
+    is several times faster than an argsort. Rows where two sorted keys
+    are within the position bits of each other (ties, or ratios a few ulps
+    apart) go through rank_scores.
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        key = pow_best / pow_worst
+    np.abs(key, out=key)  # clears the sign bit of a 0 / 0 NaN
+    n = key.shape[-1]
+    low = (1 << max(n - 1, 1).bit_length()) - 1
+    # Non-negative doubles order like their bit patterns read as integers
+    items = key.view(np.int64) & ~low
+    items |= np.arange(n)
+    items.sort(axis=-1)
+    tied = (np.diff(items, axis=-1) <= low).any(axis=-1)
+    items &= low
+    ranks = np.empty(key.shape, dtype=np.int64)
+    np.put_along_axis(ranks, items, np.arange(1, n + 1), axis=-1)
+    if tied.any():
+        ranks[tied] = rank_scores(-key[tied])
+    return ranks
+
+def rank_statistics(matrix, weight_sets, impacts, top_k=1, chunk_rows=None,
+                    workers=None, normalization='vector', distance='euclidean'):
+    """Rank mean, standard deviation, best, worst and P(rank <= top_k)
+
+    Every weight vector in weight_sets is scored, in chunks of chunk_rows
+    vectors (about BLOCK_BYTES of scores each) spread over workers threads.
+    Returns a dict of arrays over the alternatives.
+    """
+    matrix = np.asarray(matrix, dtype=float)
+    weight_sets = np.atleast_2d(np.asarray(weight_sets, dtype=float))
+    benefit = impact_mask(impacts)
+    p = distance_order(distance)
+    dev_hi, dev_lo = deviation_tables(matrix, normalization, p)
+    chunk_rows = chunk_rows or max(1, BLOCK_BYTES // (8 * len(matrix)))
+
+    def chunk_stats(start):
+        ranks = _sample_ranks(*batch_lp_dists(
+            dev_hi, dev_lo, weight_sets[start:start + chunk_rows], benefit, p))
+        return (ranks.sum(axis=0), np.square(ranks).sum(axis=0),
+                ranks.min(axis=0), ranks.max(axis=0),
+                np.count_nonzero(ranks <= top_k, axis=0))
+
+    starts = range(0, len(weight_sets), chunk_rows)
+    if workers and workers > 1 and len(starts) > 1:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            partials = list(pool.map(chunk_stats, starts))
+    else:
+        partials = [chunk_stats(start) for start in starts]
+
+    # Merged in chunk order, so results do not depend on scheduling
+    total, total_sq, best, worst, top = partials[0]
+    for part in partials[1:]:
+        total = total + part[0]
+        total_sq = total_sq + part[1]
+        best = np.minimum(best, part[2])
+        worst = np.maximum(worst, part[3])
+        top = top + part[4]
+
+    count = len(weight_sets)
+    mean = total / count
+    return {'mean': mean,
+            'std': np.sqrt(np.maximum(total_sq / count - mean ** 2, 0)),
+            'best': best, 'worst': worst, 'p_top_k': top / count}
+
+def _best_for(dev_hi, dev_lo, weight_sets, benefit, p):
+    """Position of the top alternative under each weight vector"""
+    pow_best, pow_worst = batch_lp_dists(dev_hi, dev_lo, weight_sets, benefit, p)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.argmin(pow_best / pow_worst, axis=-1)
+
+def weight_thresholds(matrix, weights, impacts, max_factor=10.0, grid=64,
+                      iterations=30, normalization='vector',
+                      distance='euclidean'):
+    """Smallest change of each weight, alone, that changes the top alternative
+
+    Each weight is scaled by factors on a log grid up to max_factor and down
+    to 1 / max_factor; the first factor that moves rank 1 to another
+    alternative is then refined by bisection. Returns a list of
+    (lower_factor, lower_best, upper_factor, upper_best) per criterion, with
+    None where no factor in range changes the top alternative.
+    """
+    matrix = np.asarray(matrix, dtype=float)
+    weights = np.asarray(weights, dtype=float)
+    benefit = impact_mask(impacts)
+    p = distance_order(distance)
+    dev_hi, dev_lo = deviation_tables(matrix, normalization, p)
+
+    def best_for(weight_sets):
+        return _best_for(dev_hi, dev_lo, weight_sets, benefit, p)
+
+    base = best_for(weights[None, :])[0]
+
+    def scaled(j, factors):
+        sets = np.repeat(weights[None, :], len(factors), axis=0)
+        sets[:, j] *= factors
+        return sets
+
+    thresholds = []
+    for j in range(len(weights)):
+        row = []
+        for end in (1 / max_factor, max_factor):
+            factors = np.geomspace(1, end, grid + 1)[1:]
+            best = best_for(scaled(j, factors))
+            changed = np.flatnonzero(best != base)
+            if weights[j] == 0 or not len(changed):
+                row += [None, None]
+                continue
+
+            i = changed[0]
+            inside, outside = (1.0 if i == 0 else factors[i - 1]), factors[i]
+            for _ in range(iterations):
+                mid = np.sqrt(inside * outside)
+                if best_for(scaled(j, [mid]))[0] == base:
+                    inside = mid
+                else:
+                    outside = mid
+            new_best = best_for(scaled(j, [outside]))[0]
+            row += [float(outside), int(new_best)]
+        thresholds.append(tuple(row))
+    return thresholds
+
+def run_sensitivity(matrix, weights, impacts, samples=10000, method='dirichlet',
+                    spread=0.1, top_k=1, names=None, criteria=None, seed=None,
+                    workers=None, max_factor=10.0, normalization='vector',
+                    distance='euclidean'):
+    """Monte Carlo rank stability of a TOPSIS ranking under weight changes
+
+    Draws samples weight vectors around weights (see sample_weights) and
+    scores them all in chunks. Returns a SensitivityResult of
+    - ranks: per alternative, the rank under the given weights, the mean,
+      standard deviation, best and worst rank over the samples, and the
+      share of samples ranking it in the top top_k;
+    - thresholds: per criterion, the factors its weight can be scaled by,
+      alone, before the top alternative changes (see weight_thresholds),
+      NaN where no factor within max_factor changes it;
+    - samples: the sampled weight vectors.
+    """
+    import pandas as pd
+
+    matrix = np.asarray(matrix, dtype=float)
+    weights = np.asarray(weights, dtype=float)
+    if names is None:
+        names = np.arange(1, len(matrix) + 1)
+    if criteria is None:
+        criteria = [f'C{j + 1}' for j in range(matrix.shape[1])]
+    names = np.asarray(names)
+
+    weight_sets = sample_weights(weights, samples, method, spread, seed)
+    stats = rank_statistics(matrix, weight_sets, impacts, top_k,
+                            workers=workers, normalization=normalization,
+                            distance=distance)
+    ranks = pd.DataFrame({
+        'Alternative': names,
+        'Rank': rank_scores(topsis_kernel(matrix, weights, impacts,
+                                          normalization, distance)),
+        'Mean Rank': stats['mean'],
+        'Std Rank': stats['std'],
+        'Best Rank': stats['best'],
+        'Worst Rank': stats['worst'],
+        f'P(Top {top_k})': stats['p_top_k'],
+    })
+
+    rows = []
+    for criterion, weight, (lo, lo_best, hi, hi_best) in zip(
+            criteria, weights,
+            weight_thresholds(matrix, weights, impacts, max_factor,
+                              normalization=normalization, distance=distance)):
+        rows.append({
+            'Criterion': criterion, 'Weight': weight,
+            'Lower Factor': np.nan if lo is None else lo,
+            'Lower Best': None if lo_best is None else names[lo_best],
+            'Upper Factor': np.nan if hi is None else hi,
+            'Upper Best': None if hi_best is None else names[hi_best],
+        })
+    return SensitivityResult(ranks, pd.DataFrame(rows), weight_sets)
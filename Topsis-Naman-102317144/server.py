@@ -0,0 +1,229 @@
+import io
+import json
+import queue
+import threading
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import numpy as np
+
+try:
+    from .engine import (topsis_kernel, rank_scores, best_k, normalizer,
+                         distance_order)
+    from .inputs import parse_criteria
+except ImportError:
+    from engine import (topsis_kernel, rank_scores, best_k, normalizer,
+                        distance_order)
+    from inputs import parse_criteria
+
+NPY = 'application/x-npy'
+
+
+class MicroBatcher:
+    """Collects small scoring requests and scores them in stacked batches.
+
+    Requests that arrive within batch_wait seconds of each other and share a
+    matrix shape, impacts, normalization and distance are stacked into one
+    (batch, rows, criteria) array and scored with a single kernel call.
+    """
+
+    def __init__(self, batch_size=64, batch_wait=0.002):
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self._pending = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True,
+                                        name='topsis-batcher')
+        self._thread.start()
+
+    def submit(self, matrix, weights, impacts, normalization='vector',
+               distance='euclidean'):
+        """Queue one matrix; the Future resolves to (scores, ranks)"""
+        future = Future()
+        self._pending.put((matrix, weights, impacts, (normalization, distance),
+                           future))
+        return future
+
+    def _collect(self):
+        batch = [self._pending.get()]
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._pending.get(timeout=self.batch_wait))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        # NaN scores are reported by rank_scores, not as numpy warnings
+        np.seterr(divide='ignore', invalid='ignore')
+        while True:
+            groups = {}
+            for item in self._collect():
+                matrix, _, impacts, method, _ = item
+                key = (matrix.shape, tuple(impacts), method)
+                groups.setdefault(key, []).append(item)
+
+            for (_, impacts, method), items in groups.items():
+                try:
+                    matrices = np.stack([item[0] for item in items])
+                    weights = np.stack([item[1] for item in items])
+                    scores = topsis_kernel(matrices, weights, list(impacts),
+                                           *method)
+                    ranks = rank_scores(scores)
+                except Exception:
+                    # One bad request (NaN scores, say) fails the stacked
+                    # call; score the group one by one so it fails alone
+                    for item in items:
+                        self._run_one(item, impacts, method)
+                    continue
+                for i, item in enumerate(items):
+                    item[4].set_result((scores[i], ranks[i]))
+
+    def _run_one(self, item, impacts, method):
+        matrix, weights, _, _, future = item
+        try:
+            scores = topsis_kernel(matrix, weights, list(impacts), *method)
+            future.set_result((scores, rank_scores(scores)))
+        except Exception as e:
+            future.set_exception(e)
+
+
+def _as_text(value):
+    """Accept weights/impacts as a list or as the CLI's comma-separated string"""
+    if isinstance(value, (list, tuple)):
+        return ','.join(str(v) for v in value)
+    return value if isinstance(value, str) else ''
+
+
+class ScoringHandler(BaseHTTPRequestHandler):
+    """POST /score with a JSON body or a .npy body; GET /health"""
+
+    server_version = 'TopsisServer/1.0'
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _reply(self, status, body, content_type='application/json'):
+        if content_type == 'application/json':
+            body = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if urlparse(self.path).path == '/health':
+            self._reply(200, {'status': 'ok'})
+        else:
+            self._reply(404, {'error': 'Not found'})
+
+    def _read_request(self):
+        """Matrix, weights, impacts, top_k and method from a JSON or .npy request"""
+        url = urlparse(self.path)
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length)
+
+        if self.headers.get('Content-Type', '').startswith(NPY):
+            params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+            matrix = np.load(io.BytesIO(body), allow_pickle=False)
+        else:
+            try:
+                params = json.loads(body or b'{}')
+            except ValueError:
+                raise ValueError("Request body must be JSON or a .npy array")
+            matrix = np.asarray(params.get('matrix'), dtype=float)
+
+        matrix = np.asarray(matrix, dtype=float)
+        if matrix.ndim != 2 or len(matrix) == 0 or matrix.shape[1] < 2:
+            raise ValueError("matrix must be 2-D with at least 2 criteria")
+        # As inputs.check_table: no missing (null) or infinite criteria
+        finite = np.isfinite(matrix).all(axis=0)
+        if not finite.all():
+            raise ValueError(f"Criterion {np.flatnonzero(~finite)[0] + 1} "
+                             "contains missing or non-finite values")
+
+        weights, impacts = parse_criteria(_as_text(params.get('weights')),
+                                          _as_text(params.get('impacts')),
+                                          matrix.shape[1])
+        top_k = params.get('top_k')
+        top_k = int(top_k) if top_k not in (None, '') else None
+        if top_k is not None and top_k < 1:
+            raise ValueError("top_k must be a positive integer")
+
+        normalization = params.get('normalization') or 'vector'
+        distance = params.get('distance') or 'euclidean'
+        normalizer(normalization)
+        distance_order(distance)
+        return (matrix, np.asarray(weights), impacts, top_k,
+                (normalization, distance))
+
+    def do_POST(self):
+        if urlparse(self.path).path != '/score':
+            self._reply(404, {'error': 'Not found'})
+            return
+
+        if not self.server.slots.acquire(timeout=self.server.queue_timeout):
+            self._reply(503, {'error': 'Server busy, please retry'})
+            return
+        try:
+            try:
+                matrix, weights, impacts, top_k, method = self._read_request()
+            except ValueError as e:
+                self._reply(400, {'error': str(e)})
+                return
+
+            try:
+                scores, ranks = self.server.batcher.submit(
+                    matrix, weights, impacts, *method).result()
+            except ValueError as e:
+                # Undefined (NaN) scores, e.g. from an all-zero column
+                self._reply(400, {'error': str(e)})
+                return
+            if top_k:
+                keep, top_ranks = best_k(scores, top_k)
+                scores, ranks = scores[keep], top_ranks
+            else:
+                keep = None
+
+            if NPY in self.headers.get('Accept', ''):
+                buf = io.BytesIO()
+                np.save(buf, np.column_stack([scores, ranks]))
+                self._reply(200, buf.getvalue(), NPY)
+            else:
+                body = {'scores': scores.tolist(), 'ranks': ranks.tolist()}
+                if keep is not None:
+                    body['rows'] = keep.tolist()
+                self._reply(200, body)
+        except Exception as e:
+            self._reply(500, {'error': str(e)})
+        finally:
+            self.server.slots.release()
+
+
+class ScoringServer(ThreadingHTTPServer):
+    """Long-running TOPSIS service that keeps imports and the batcher warm"""
+
+    daemon_threads = True
+
+    def __init__(self, address, max_concurrency=64, queue_timeout=1.0,
+                 batch_size=64, batch_wait=0.002, verbose=False):
+        super().__init__(address, ScoringHandler)
+        self.slots = threading.BoundedSemaphore(max_concurrency)
+        self.queue_timeout = queue_timeout
+        self.batcher = MicroBatcher(batch_size, batch_wait)
+        self.verbose = verbose
+
+
+def serve(host='127.0.0.1', port=8000, **options):
+    """Run the scoring service until interrupted"""
+    server = ScoringServer((host, port), **options)
+    print(f"TOPSIS scoring service on http://{host}:{server.server_port}/score")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
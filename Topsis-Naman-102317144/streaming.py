@@ -0,0 +1,270 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+try:
+    from .engine import (impact_mask, block_stats, merge_stats, scaling,
+                         normalizer, distance_order, working_dtype,
+                         ideal_solutions, score_blocks, rank_scores,
+                         select_top_k, top_k_ranks, segment_starts,
+                         grouped_topsis)
+    from .inputs import parse_criteria
+    from .formats import CSV, COMPRESSED_CSV, write_table
+    from .csvwriter import CsvWriter
+    from .extsort import ExternalRanker
+    from .profiling import get_profiler
+except ImportError:
+    from engine import (impact_mask, block_stats, merge_stats, scaling,
+                        normalizer, distance_order, working_dtype,
+                        ideal_solutions, score_blocks, rank_scores,
+                        select_top_k, top_k_ranks, segment_starts,
+                        grouped_topsis)
+    from inputs import parse_criteria
+    from formats import CSV, COMPRESSED_CSV, write_table
+    from csvwriter import CsvWriter
+    from extsort import ExternalRanker
+    from profiling import get_profiler
+
+DEFAULT_CHUNKSIZE = 100_000
+
+
+def _read_chunks(input_file, chunksize, columns=None):
+    """Stream the input CSV in chunks of rows"""
+    for chunk in pd.read_csv(input_file, chunksize=chunksize, usecols=columns):
+        yield chunk if columns is None else chunk[list(columns)]
+
+def _criteria(chunk, dtype=None):
+    """Numeric criteria of one chunk as a float array (float64 by default)"""
+    data = chunk.iloc[:, 1:]
+    for col in data.columns:
+        if not pd.api.types.is_numeric_dtype(data[col]):
+            raise ValueError(f"Column '{col}' contains non-numeric values")
+    values = data.to_numpy(dtype=dtype or float)
+    finite = np.isfinite(values).all(axis=0)
+    if not finite.all():
+        raise ValueError(f"Column '{data.columns[np.argmin(finite)]}' contains "
+                         f"missing or non-finite values")
+    return values
+
+def scan_stats(input_file, chunksize=DEFAULT_CHUNKSIZE, columns=None,
+               dtype=None):
+    """First pass: row count plus column_stats over all chunks"""
+    rows = 0
+    stats = None
+    for chunk in _read_chunks(input_file, chunksize, columns):
+        if len(chunk):
+            stats = merge_stats(stats, block_stats(_criteria(chunk, dtype)))
+        rows += len(chunk)
+
+    if stats is None:
+        raise ValueError("Input file has no rows")
+
+    return rows, stats
+
+def _group_runs(chunks, group_by):
+    """Re-cut chunks of a table sorted by group_by so no group spans two
+
+    The last group of each chunk is held back and joined to the next one,
+    so a piece holds whole groups; a group larger than a chunk is gathered
+    in memory. Raises ValueError if a group shows up again after it ended.
+    """
+    carry = None
+    finished = set()
+    for chunk in chunks:
+        if carry is not None:
+            chunk = pd.concat([carry, chunk], ignore_index=True)
+        codes, uniques = pd.factorize(chunk[group_by])
+        starts = segment_starts(codes)
+        labels = [uniques[c] if c >= 0 else None for c in codes[starts]]
+        if len(set(labels)) != len(labels) or finished.intersection(labels[:-1]):
+            raise ValueError(f"Chunked mode needs the input sorted by "
+                             f"'{group_by}'")
+        finished.update(labels[:-1])
+        if len(starts) > 1:
+            yield chunk.iloc[:starts[-1]]
+        carry = chunk.iloc[starts[-1]:]
+    if carry is not None and len(carry):
+        yield carry
+
+def _run_grouped(input_file, weights, impacts, output_file, chunksize, columns,
+                 normalization, distance, dtype, group_by, precision,
+                 compression):
+    """Single pass of run_topsis_chunked for a CSV sorted by group_by"""
+    rows = 0
+    writer = None
+    try:
+        for piece in _group_runs(_read_chunks(input_file, chunksize, columns),
+                                 group_by):
+            scores, ranks = grouped_topsis(
+                _criteria(piece.drop(columns=[group_by]), dtype),
+                pd.factorize(piece[group_by])[0], weights, impacts,
+                normalization, distance, dtype)
+            if writer is None:
+                writer = CsvWriter(output_file, precision, compression)
+            writer.write(piece, {'Topsis Score': scores, 'Rank': ranks})
+            rows += len(piece)
+    finally:
+        if writer is not None:
+            writer.close()
+    if rows == 0:
+        raise ValueError("Input file has no rows")
+    return rows
+
+def _stream_top_k(scored_chunks, k):
+    """Keep the k best rows across chunks, tracking ties at the cut-off"""
+    best = None
+    best_scores = np.empty(0)
+    threshold = None
+    ties_outside = 0
+
+    for chunk, scores in scored_chunks:
+        frame = chunk if best is None else pd.concat([best, chunk])
+        candidates = np.concatenate([best_scores, scores])
+        if not len(candidates):
+            continue
+
+        keep = select_top_k(candidates, k)
+        kth = candidates[keep].min()
+        dropped = (np.count_nonzero(candidates == kth)
+                   - np.count_nonzero(candidates[keep] == kth))
+        ties_outside = dropped + (ties_outside if kth == threshold else 0)
+        threshold = kth
+
+        best = frame.iloc[keep]
+        best_scores = candidates[keep]
+
+    best = best.assign(**{'Topsis Score': best_scores,
+                          'Rank': top_k_ranks(best_scores, ties_outside)})
+    order = np.argsort(-best_scores, kind='stable')
+    return best.iloc[order].reset_index(drop=True)
+
+def run_topsis_chunked(input_file, weights, impacts, output_file,
+                       chunksize=DEFAULT_CHUNKSIZE, top_k=None, columns=None,
+                       workers=None, normalization='vector',
+                       distance='euclidean', dtype=None, profile=None,
+                       group_by=None, precision=None, compression=None,
+                       external_sort=False):
+    """TOPSIS over a CSV streamed in chunks.
+
+    Pass one collects the column reductions, pass two scores each chunk.
+    Without top_k every row is then streamed once more and written with its
+    score and rank; with top_k only the best rows are kept and written.
+    workers scores the blocks of each chunk on a thread pool. Returns the
+    number of rows written. normalization and distance are as in
+    topsis_kernel. dtype (e.g. 'float32') converts each chunk to that
+    precision and scores it in place, halving the working memory. profile
+    times the scan, score, rank and write passes (see
+    profiling.get_profiler).
+
+    With group_by, the CSV must be sorted (or at least grouped) by that
+    column: each group is scored and ranked on its own in a single pass,
+    as soon as all of its rows have been read (see _group_runs).
+
+    Results are streamed out with a csvwriter.CsvWriter; precision and
+    compression are as there. Compressed CSV inputs are read as well.
+
+    Full ranking keeps every score in memory. With external_sort (True, or
+    a directory for the temporary files) the scores are spilled to disk and
+    ranked by an external merge sort instead (see extsort.ExternalRanker),
+    so memory no longer grows with the number of rows.
+    """
+
+    if not os.path.isfile(input_file):
+        raise FileNotFoundError(f"File '{input_file}' not found!")
+
+    if not input_file.lower().endswith(CSV + COMPRESSED_CSV):
+        raise ValueError("Chunked mode requires a CSV input file")
+
+    if top_k is None and not output_file.lower().endswith(CSV + COMPRESSED_CSV):
+        raise ValueError("Chunked mode writes full results as CSV only")
+
+    header = pd.read_csv(input_file, nrows=0, usecols=columns).columns
+    if len(header) < 3:
+        raise ValueError("Input file must have at least 3 columns")
+
+    if group_by is not None:
+        if group_by not in header[1:]:
+            raise ValueError(f"Group column '{group_by}' not found")
+        if top_k is not None:
+            raise ValueError("top_k cannot be combined with group_by")
+        if len(header) < 4:
+            raise ValueError("Input file must have at least 3 columns")
+        weight_list, impact_list = parse_criteria(weights, impacts,
+                                                  len(header) - 2)
+        profiler = get_profiler(profile)
+        with profiler.stage('grouped', cols=len(header) - 2) as stage:
+            rows = _run_grouped(input_file, weight_list, impact_list,
+                                output_file, chunksize, columns, normalization,
+                                distance, dtype, group_by, precision,
+                                compression)
+            stage.shape(rows)
+        return rows
+
+    weight_list, impact_list = parse_criteria(weights, impacts, len(header) - 1)
+    weight_arr = np.asarray(weight_list)
+    benefit = impact_mask(impact_list)
+    p = distance_order(distance)
+    normalizer(normalization)  # fail before reading the whole file
+    if dtype is not None:
+        dtype = working_dtype(dtype)
+    profiler = get_profiler(profile)
+    cols = len(header) - 1
+
+    # Pass 1: column reductions
+    with profiler.stage('scan', cols=cols) as stage:
+        rows, stats = scan_stats(input_file, chunksize, columns, dtype)
+        stage.shape(rows)
+    shift, scale = scaling(stats, normalization)
+    ideal_best, ideal_worst = ideal_solutions(scale, stats[1], stats[2],
+                                              weight_arr, benefit, shift)
+
+    def scored_chunks():
+        for chunk in _read_chunks(input_file, chunksize, columns):
+            yield chunk, score_blocks(_criteria(chunk, dtype), scale,
+                                      weight_arr, ideal_best, ideal_worst,
+                                      np.empty(len(chunk)), workers=workers,
+                                      shift=shift, p=p, dtype=dtype)
+
+    # Pass 2: scores
+    if top_k is not None:
+        with profiler.stage('score', rows, cols):
+            winners = _stream_top_k(scored_chunks(), top_k)
+        with profiler.stage('write', *winners.shape):
+            write_table(winners, output_file, precision, compression)
+        return len(winners)
+
+    ranker = scores = ranks = None
+    if external_sort:
+        ranker = ExternalRanker(None if external_sort is True else external_sort)
+    try:
+        with profiler.stage('score', rows, cols):
+            scores = None if ranker else np.empty(rows)
+            start = 0
+            for chunk, chunk_scores in scored_chunks():
+                if ranker:
+                    ranker.add(chunk_scores)
+                else:
+                    scores[start:start + len(chunk)] = chunk_scores
+                start += len(chunk)
+        with profiler.stage('rank', rows):
+            if ranker:
+                scores, ranks = ranker.scores(), ranker.ranks()
+            else:
+                ranks = rank_scores(scores)
+
+        # Write rows back in their original order
+        with profiler.stage('write', rows, len(header) + 2), \
+                CsvWriter(output_file, precision, compression) as writer:
+            start = 0
+            for chunk in _read_chunks(input_file, chunksize, columns):
+                stop = start + len(chunk)
+                writer.write(chunk, {'Topsis Score': scores[start:stop],
+                                     'Rank': ranks[start:stop]})
+                start = stop
+    finally:
+        if ranker:
+            scores = ranks = None  # release the memmaps before removing files
+            ranker.close()
+
+    return rows
@@ -1,130 +1,220 @@
-import pandas as pd
 import numpy as np
-import os
 
-def normalize_matrix(df):
-    """Normalize decision matrix"""
-    normalized = df.copy()
-    for col in df.columns:
-        sum_sq = np.sqrt((df[col] ** 2).sum())
-        normalized[col] = df[col] / sum_sq
-    return normalized
+try:
+    from .engine import (impact_mask, column_stats, scaling, euclidean_dist,
+                         minkowski_dist, distance_order, closeness, weigh,
+                         ideal_solutions, topsis_blockwise, grouped_topsis,
+                         rank_scores, best_k)
+    from .inputs import ParsedInput, parse_inputs, read_input, check_table
+    from .profiling import get_profiler
+    from .formats import write_table, check_top_k_output
+    from .mapped import run_topsis_mapped
+    from .streaming import run_topsis_chunked
+except ImportError:
+    from engine import (impact_mask, column_stats, scaling, euclidean_dist,
+                        minkowski_dist, distance_order, closeness, weigh,
+                        ideal_solutions, topsis_blockwise, grouped_topsis,
+                        rank_scores, best_k)
+    from inputs import ParsedInput, parse_inputs, read_input, check_table
+    from profiling import get_profiler
+    from formats import write_table, check_top_k_output
+    from mapped import run_topsis_mapped
+    from streaming import run_topsis_chunked
+
+def normalize_matrix(df, method='vector'):
+    """Normalize decision matrix (vector, minmax, max or sum)"""
+    if method == 'vector':
+        return df / np.sqrt((df ** 2).sum())
+    shift, scale = scaling(column_stats(df.to_numpy(dtype=float)), method)
+    return (df if shift is None else df - shift) / scale
 
 def calc_weighted_matrix(normalized_df, weights):
     """Apply weights"""
-    weighted = normalized_df.copy()
-    for i, col in enumerate(normalized_df.columns):
-        weighted[col] = normalized_df[col] * weights[i]
-    return weighted
+    return normalized_df * np.asarray(weights, dtype=float)
 
 def get_ideal_solutions(weighted_df, impacts):
     """Get ideal best and worst"""
-    ideal_best = []
-    ideal_worst = []
-    
-    for i, col in enumerate(weighted_df.columns):
-        if impacts[i] == '+':
-            ideal_best.append(weighted_df[col].max())
-            ideal_worst.append(weighted_df[col].min())
-        else:
-            ideal_best.append(weighted_df[col].min())
-            ideal_worst.append(weighted_df[col].max())
-    
-    return ideal_best, ideal_worst
+    benefit = impact_mask(impacts)
+    col_max = weighted_df.max().to_numpy()
+    col_min = weighted_df.min().to_numpy()
+    ideal_best = np.where(benefit, col_max, col_min)
+    ideal_worst = np.where(benefit, col_min, col_max)
+    return list(ideal_best), list(ideal_worst)
 
 def calc_euclidean_dist(weighted_df, ideal_solution):
     """Calculate euclidean distance"""
-    distances = []
-    for idx in range(len(weighted_df)):
-        row_vals = weighted_df.iloc[idx].values
-        dist = np.sqrt(sum((row_vals[i] - ideal_solution[i]) ** 2 
-                          for i in range(len(ideal_solution))))
-        distances.append(dist)
-    return distances
+    return euclidean_dist(np.asarray(weighted_df, dtype=float),
+                          np.asarray(ideal_solution, dtype=float))
+
+def calc_distance(weighted_df, ideal_solution, distance='euclidean'):
+    """Calculate a Minkowski distance (euclidean, manhattan, chebyshev, minkowski:p)"""
+    return minkowski_dist(np.asarray(weighted_df, dtype=float),
+                          np.asarray(ideal_solution, dtype=float),
+                          distance_order(distance))
 
 def topsis_score_calc(dist_best, dist_worst):
     """Calculate TOPSIS score"""
-    scores = []
-    for i in range(len(dist_best)):
-        score = dist_worst[i] / (dist_best[i] + dist_worst[i])
-        scores.append(score)
-    return scores
+    return closeness(np.asarray(dist_best, dtype=float),
+                     np.asarray(dist_worst, dtype=float))
 
-def validate_inputs(input_file, weights, impacts, output_file):
+def validate_inputs(input_file, weights, impacts, output_file, sheet=None):
     """Validate inputs"""
-    
-    if not os.path.isfile(input_file):
-        raise FileNotFoundError(f"File '{input_file}' not found!")
-    
-    if not (input_file.endswith('.csv') or input_file.endswith('.xlsx')):
-        raise ValueError("Input file must be CSV or Excel format")
-    
-    try:
-        if input_file.endswith('.csv'):
-            df = pd.read_csv(input_file)
-        else:
-            df = pd.read_excel(input_file)
-    except Exception as e:
-        raise Exception(f"Error reading file: {e}")
-    
-    if len(df.columns) < 3:
-        raise ValueError("Input file must have at least 3 columns")
-    
-    numeric_cols = df.columns[1:]
-    for col in numeric_cols:
-        if not pd.api.types.is_numeric_dtype(df[col]):
-            raise ValueError(f"Column '{col}' contains non-numeric values")
-    
-    try:
-        weight_list = [float(w.strip()) for w in weights.split(',')]
-        impact_list = [i.strip() for i in impacts.split(',')]
-    except:
-        raise ValueError("Invalid format for weights or impacts")
-    
-    num_criteria = len(numeric_cols)
-    if len(weight_list) != num_criteria:
-        raise ValueError(f"Number of weights doesn't match number of columns")
-    
-    if len(impact_list) != num_criteria:
-        raise ValueError(f"Number of impacts doesn't match number of columns")
-    
-    for imp in impact_list:
-        if imp not in ['+', '-']:
-            raise ValueError(f"Impact must be '+' or '-', got '{imp}'")
-    
+    parse_inputs(input_file, weights, impacts, sheet=sheet)
     return True
 
-def run_topsis(input_file, weights, impacts, output_file):
-    """Main TOPSIS function"""
-    
-    # Validate first
-    validate_inputs(input_file, weights, impacts, output_file)
-    
-    # Read file
-    if input_file.endswith('.csv'):
-        df = pd.read_csv(input_file)
+def compute_topsis(parsed, workers=None, top_k=None, cache=None,
+                   normalization='vector', distance='euclidean', dtype=None,
+                   profile=None):
+    """Score a ParsedInput and return the result table
+    
+    With workers set, row blocks are scored on a pool of that many threads.
+    With top_k set, only the best top_k rows are returned, best first.
+    A ResultCache reuses earlier scores and column norms of the same matrix.
+    normalization and distance pick entries of the engine registries.
+    dtype (e.g. 'float32') scores the rows block by block in that precision.
+    profile (see profiling.get_profiler) times the normalize, distances (or
+    a single score stage for the block and cache paths) and rank stages.
+    When parsed has a group_by column, each group is scored and ranked on
+    its own (see engine.grouped_topsis); workers and cache are not used.
+    """
+    
+    profiler = get_profiler(profile)
+    matrix = parsed.matrix
+    rows, cols = matrix.shape
+    
+    if parsed.group_by is not None:
+        if top_k is not None:
+            raise ValueError("top_k cannot be combined with group_by")
+        with profiler.stage('score', rows, cols):
+            topsis_scores, ranks = grouped_topsis(
+                matrix, parsed.groups, parsed.weights, parsed.impacts,
+                normalization, distance, dtype)
+        return parsed.df.assign(**{'Topsis Score': topsis_scores,
+                                   'Rank': ranks})
+    
+    if cache is not None:
+        with profiler.stage('score', rows, cols):
+            topsis_scores = cache.scores(matrix, parsed.weights, parsed.impacts,
+                                         normalization, distance, dtype)
+    elif workers or dtype is not None:
+        with profiler.stage('score', rows, cols):
+            topsis_scores = topsis_blockwise(matrix, parsed.weights,
+                                             parsed.impacts, workers=workers,
+                                             normalization=normalization,
+                                             distance=distance, dtype=dtype)
     else:
-        df = pd.read_excel(input_file)
-    
-    weight_list = [float(w.strip()) for w in weights.split(',')]
-    impact_list = [i.strip() for i in impacts.split(',')]
-    
-    fund_names = df.iloc[:, 0]
-    data_matrix = df.iloc[:, 1:]
-    
-    # TOPSIS steps
-    norm_matrix = normalize_matrix(data_matrix)
-    weighted_matrix = calc_weighted_matrix(norm_matrix, weight_list)
-    ideal_best, ideal_worst = get_ideal_solutions(weighted_matrix, impact_list)
-    dist_from_best = calc_euclidean_dist(weighted_matrix, ideal_best)
-    dist_from_worst = calc_euclidean_dist(weighted_matrix, ideal_worst)
-    topsis_scores = topsis_score_calc(dist_from_best, dist_from_worst)
-    
-    # Create result
-    result_df = df.copy()
-    result_df['Topsis Score'] = topsis_scores
-    result_df['Rank'] = pd.Series(topsis_scores).rank(ascending=False).astype(int)
-    
-    result_df.to_csv(output_file, index=False)
-    
+        # topsis_kernel, one stage at a time
+        weights = np.asarray(parsed.weights, dtype=float)
+        p = distance_order(distance)
+        with profiler.stage('normalize', rows, cols):
+            stats = column_stats(matrix)
+            shift, scale = scaling(stats, normalization)
+            ideal_best, ideal_worst = ideal_solutions(
+                scale, stats[1], stats[2], weights,
+                impact_mask(parsed.impacts), shift)
+            weighted = weigh(matrix, scale, weights, shift)
+        with profiler.stage('distances', rows, cols):
+            topsis_scores = closeness(minkowski_dist(weighted, ideal_best, p),
+                                      minkowski_dist(weighted, ideal_worst, p))
+        del weighted
+    
+    if top_k is not None:
+        with profiler.stage('rank', rows):
+            keep, ranks = best_k(topsis_scores, top_k)
+            result_df = parsed.df.iloc[keep].reset_index(drop=True)
+            result_df['Topsis Score'] = topsis_scores[keep]
+            result_df['Rank'] = ranks
+        return result_df
+    
+    # assign shares the input columns where pandas allows (copy-on-write)
+    with profiler.stage('rank', rows):
+        result_df = parsed.df.assign(**{'Topsis Score': topsis_scores,
+                                        'Rank': rank_scores(topsis_scores)})
+    return result_df
+
+def run_topsis(input_file, weights, impacts, output_file, chunksize=None,
+               columns=None, mmap=False, workers=None, top_k=None,
+               cache=None, normalization='vector', distance='euclidean',
+               dtype=None, profile=None, group_by=None, precision=None,
+               compression=None, sheet=None, external_sort=False):
+    """Main TOPSIS function
+    
+    Input and output formats follow the file extensions (see formats).
+    columns restricts the read to the named columns, the first being the
+    alternative names. input_file may also be a ParsedInput from
+    parse_inputs, in which case weights and impacts are taken from it.
+    With chunksize set, a CSV input is streamed in chunks of that many rows
+    (see run_topsis_chunked) and the number of rows written is returned.
+    With mmap set, or when input_file is an ndarray/np.memmap, a bare numeric
+    matrix is scored block by block without a DataFrame (see
+    run_topsis_mapped), also returning the number of rows. workers spreads
+    the row blocks over a thread pool in every mode. top_k keeps and writes
+    only the best top_k rows, with their scores and ranks, in every mode.
+    cache is an optional ResultCache used by the in-memory path.
+    normalization ('vector', 'minmax', 'max', 'sum') and distance
+    ('euclidean', 'manhattan', 'chebyshev', 'minkowski:p') apply in every
+    mode; see engine.NORMALIZATIONS and engine.DISTANCES. dtype='float32'
+    scores in single precision in every mode, halving the working memory;
+    ranks can then differ from float64 where scores are within about 1e-7.
+    profile turns on per-stage timing: True, a callable sink receiving each
+    profiling.StageStats, or a profiling.Profiler to read the stages from
+    afterwards. The returned DataFrame then carries them as
+    attrs['profile'].
+    group_by names a column splitting the rows into groups that are
+    normalized and ranked separately (Rank counts within the group); it is
+    not a criterion. With chunksize, the CSV must be sorted by that column.
+    precision (decimals for float cells) and compression ('gzip', 'zstd',
+    or implied by a .csv.gz/.csv.zst output) apply to CSV output in every
+    mode; see csvwriter.
+    sheet picks the worksheet of an Excel input by name or position
+    (default the first); see excel.read_sheet, and batch.sheet_jobs to
+    score several sheets.
+    external_sort (True, or a directory for the temporary files) ranks the
+    rows of a chunked run with an external merge sort, so its memory does
+    not grow with the number of rows; it needs chunksize.
+    """
+    
+    profiler = get_profiler(profile)
+    check_top_k_output(output_file, top_k)
+    if external_sort and chunksize is None:
+        raise ValueError("external_sort needs chunked mode (chunksize)")
+    if group_by is not None and columns is not None and group_by not in columns:
+        columns = list(columns) + [group_by]
+    
+    if mmap or isinstance(input_file, np.ndarray):
+        if group_by is not None:
+            raise ValueError("group_by needs a table input, not a bare matrix")
+        return run_topsis_mapped(input_file, weights, impacts, output_file,
+                                 workers=workers, top_k=top_k,
+                                 normalization=normalization, distance=distance,
+                                 dtype=dtype, profile=profiler,
+                                 precision=precision, compression=compression)
+    
+    if chunksize is not None:
+        return run_topsis_chunked(input_file, weights, impacts, output_file,
+                                  chunksize=chunksize, columns=columns,
+                                  workers=workers, top_k=top_k,
+                                  normalization=normalization,
+                                  distance=distance, dtype=dtype,
+                                  profile=profiler, group_by=group_by,
+                                  precision=precision, compression=compression,
+                                  external_sort=external_sort)
+    
+    # Read and validate once
+    if isinstance(input_file, ParsedInput):
+        parsed = input_file
+    else:
+        with profiler.stage('read') as stage:
+            df = read_input(input_file, columns, sheet)
+            stage.shape(*df.shape)
+        with profiler.stage('validate', *df.shape):
+            parsed = check_table(df, weights, impacts, group_by)
+    
+    result_df = compute_topsis(parsed, workers, top_k, cache, normalization,
+                               distance, dtype, profiler)
+    with profiler.stage('write', *result_df.shape):
+        write_table(result_df, output_file, precision, compression)
+    
+    if profiler.enabled:
+        result_df.attrs['profile'] = profiler.as_records()
     return result_df
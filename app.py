@@ -1,124 +1,120 @@
-from flask import Flask, request, render_template, flash, redirect, url_for
+from flask import (Flask, request, render_template, flash, redirect, url_for,
+                   jsonify, send_file)
+from werkzeug.utils import secure_filename
 import pandas as pd
-import numpy as np
 import os
-import smtplib
-from email.mime.multipart import MIMEMultipart
-from email.mime.text import MIMEText
-from email.mime.base import MIMEBase
-from email import encoders
+import io
 import re
+import sys
+import tempfile
+from jobs import JobQueue, QueueFull
+from mailer import SMTPPool
+
+# TOPSIS engine and result cache from the package source
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                'Topsis-Naman-102317144'))
+from cache import ResultCache, MemoryBackend
+from engine import rank_scores
+from inputs import check_table
 
 app = Flask(__name__)
 app.secret_key = 'topsis_secret_key_12345'
-app.config['UPLOAD_FOLDER'] = 'uploads'
-app.config['RESULT_FOLDER'] = 'results'
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
+app.config['SPOOL_MAX_SIZE'] = 4 * 1024 * 1024  # uploads/results above this spill to disk
+app.config['SPOOL_DIR'] = None  # spill directory, None for the system temp dir
+app.config['ANALYSIS_WORKERS'] = 2
+app.config['MAX_PENDING_JOBS'] = 50
+app.config['JOB_TTL'] = 3600  # seconds a finished job and its result are kept
+
+# Email configuration - Update with your Gmail credentials for sending emails,
+# or point SMTP_HOST/SMTP_PORT at a local test server with SMTP_STARTTLS=0
+# and an empty SMTP_USERNAME
+app.config['SMTP_HOST'] = os.environ.get('SMTP_HOST', 'smtp.gmail.com')
+app.config['SMTP_PORT'] = int(os.environ.get('SMTP_PORT', 587))
+app.config['SMTP_STARTTLS'] = os.environ.get('SMTP_STARTTLS', '1') != '0'
+app.config['SMTP_SENDER'] = os.environ.get('SMTP_SENDER', "nsingh1_be23@thapar.edu")  # Your email (use Gmail for sending)
+app.config['SMTP_USERNAME'] = os.environ.get('SMTP_USERNAME', app.config['SMTP_SENDER'])
+app.config['SMTP_PASSWORD'] = os.environ.get('SMTP_PASSWORD', "rzni rgwe ejjc elqr")  # Gmail App Password (generate from Google Account)
+app.config['SMTP_POOL_SIZE'] = 2
+app.config['CACHE_MAX_BYTES'] = 128 * 1024 * 1024
+
+# Analyses and email delivery run off the request thread. Delivery workers
+# only wait on the mail pool, which batches their messages per connection.
+job_queue = JobQueue(analysis_workers=app.config['ANALYSIS_WORKERS'],
+                     delivery_workers=8,
+                     max_pending=app.config['MAX_PENDING_JOBS'],
+                     ttl=app.config['JOB_TTL'])
+result_cache = ResultCache(MemoryBackend(max_bytes=app.config['CACHE_MAX_BYTES']))
+mail_pool = SMTPPool(app.config['SMTP_HOST'], app.config['SMTP_PORT'],
+                     username=app.config['SMTP_USERNAME'] or None,
+                     password=app.config['SMTP_PASSWORD'],
+                     starttls=app.config['SMTP_STARTTLS'],
+                     size=app.config['SMTP_POOL_SIZE'])
 
-# Create folders if they don't exist
-os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
-os.makedirs(app.config['RESULT_FOLDER'], exist_ok=True)
-
-def normalize_matrix(df):
-    """Normalize decision matrix"""
-    normalized = df.copy()
-    for col in df.columns:
-        sum_sq = np.sqrt((df[col] ** 2).sum())
-        normalized[col] = df[col] / sum_sq
-    return normalized
-
-def calc_weighted_matrix(normalized_df, weights):
-    """Apply weights"""
-    weighted = normalized_df.copy()
-    for i, col in enumerate(normalized_df.columns):
-        weighted[col] = normalized_df[col] * weights[i]
-    return weighted
-
-def get_ideal_solutions(weighted_df, impacts):
-    """Get ideal solutions"""
-    ideal_best = []
-    ideal_worst = []
-    
-    for i, col in enumerate(weighted_df.columns):
-        if impacts[i] == '+':
-            ideal_best.append(weighted_df[col].max())
-            ideal_worst.append(weighted_df[col].min())
+class ResultBuffer:
+    """Result file kept in memory, spilled to a temp file above max_size"""
+    
+    def __init__(self, filename, data, max_size, spill_dir=None):
+        self.filename = filename
+        self.size = len(data)
+        self._data = None
+        self._path = None
+        if self.size > max_size:
+            fd, self._path = tempfile.mkstemp(suffix='.csv', dir=spill_dir)
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
         else:
-            ideal_best.append(weighted_df[col].min())
-            ideal_worst.append(weighted_df[col].max())
-    
-    return ideal_best, ideal_worst
-
-def calc_euclidean_dist(weighted_df, ideal_solution):
-    """Calculate distance"""
-    distances = []
-    for idx in range(len(weighted_df)):
-        row_vals = weighted_df.iloc[idx].values
-        dist = np.sqrt(sum((row_vals[i] - ideal_solution[i]) ** 2 
-                          for i in range(len(ideal_solution))))
-        distances.append(dist)
-    return distances
-
-def topsis_score_calc(dist_best, dist_worst):
-    """Calculate TOPSIS score"""
-    scores = []
-    for i in range(len(dist_best)):
-        score = dist_worst[i] / (dist_best[i] + dist_worst[i])
-        scores.append(score)
-    return scores
-
-def run_topsis_analysis(input_file, weights, impacts):
-    """Run TOPSIS and return result file path"""
-    
-    # Read file
-    if input_file.endswith('.csv'):
-        df = pd.read_csv(input_file)
-    else:
-        df = pd.read_excel(input_file)
+            self._data = data
+    
+    def open(self):
+        """A fresh binary reader over the result"""
+        if self._path:
+            return open(self._path, 'rb')
+        return io.BytesIO(self._data)
+    
+    def cleanup(self):
+        self._data = None
+        if self._path and os.path.exists(self._path):
+            os.remove(self._path)
+
+def run_topsis_analysis(upload, filename, weights, impacts):
+    """Run TOPSIS on an uploaded stream and return a ResultBuffer"""
     
-    weight_list = [float(w.strip()) for w in weights.split(',')]
-    impact_list = [i.strip() for i in impacts.split(',')]
+    # Parse the upload directly, no copy on disk
+    upload.seek(0)
+    if filename.endswith('.csv'):
+        df = pd.read_csv(upload)
+    else:
+        df = pd.read_excel(upload)
     
-    fund_names = df.iloc[:, 0]
-    data_matrix = df.iloc[:, 1:]
+    # Same checks as the command line: numeric, complete criteria that
+    # match the weights and impacts
+    parsed = check_table(df, weights, impacts)
+    data_matrix = df.iloc[:, 1:].to_numpy(dtype=float)
     
-    # TOPSIS steps
-    norm_matrix = normalize_matrix(data_matrix)
-    weighted_matrix = calc_weighted_matrix(norm_matrix, weight_list)
-    ideal_best, ideal_worst = get_ideal_solutions(weighted_matrix, impact_list)
-    dist_from_best = calc_euclidean_dist(weighted_matrix, ideal_best)
-    dist_from_worst = calc_euclidean_dist(weighted_matrix, ideal_worst)
-    topsis_scores = topsis_score_calc(dist_from_best, dist_from_worst)
+    # TOPSIS steps, reusing earlier results for the same matrix and weights
+    topsis_scores = result_cache.scores(data_matrix, parsed.weights,
+                                        parsed.impacts)
     
     # Create result
     result_df = df.copy()
     result_df['Topsis Score'] = topsis_scores
-    result_df['Rank'] = pd.Series(topsis_scores).rank(ascending=False).astype(int)
+    result_df['Rank'] = rank_scores(topsis_scores)
     
-    # Save result
-    result_filename = f"result_{os.path.basename(input_file)}"
-    result_path = os.path.join(app.config['RESULT_FOLDER'], result_filename)
-    result_df.to_csv(result_path, index=False)
-    
-    return result_path
+    # Build the result file in memory
+    name = os.path.splitext(filename)[0]
+    data = result_df.to_csv(index=False).encode('utf-8')
+    return ResultBuffer(f"result_{name}.csv", data,
+                        app.config['SPOOL_MAX_SIZE'], app.config['SPOOL_DIR'])
 
 def validate_email(email):
     """Validate email format"""
     pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
     return re.match(pattern, email) is not None
 
-def send_email_with_attachment(recipient_email, attachment_path):
+def send_email_with_attachment(recipient_email, attachment):
     """Send result file via email"""
     
-    # Email configuration - Update with your Gmail credentials for sending emails
-    sender_email = "nsingh1_be23@thapar.edu"  # Your email (use Gmail for sending)
-    sender_password = "rzni rgwe ejjc elqr"  # Gmail App Password (generate from Google Account)
-    
-    msg = MIMEMultipart()
-    msg['From'] = sender_email
-    msg['To'] = recipient_email
-    msg['Subject'] = "TOPSIS Analysis Results"
-    
     body = """
     Hello,
     
@@ -137,25 +133,10 @@ def send_email_with_attachment(recipient_email, attachment_path):
     TOPSIS Analysis Team
     """
     
-    msg.attach(MIMEText(body, 'plain'))
-    
-    # Attach file
-    with open(attachment_path, 'rb') as attachment:
-        part = MIMEBase('application', 'octet-stream')
-        part.set_payload(attachment.read())
-        encoders.encode_base64(part)
-        part.add_header('Content-Disposition', 
-                       f"attachment; filename= {os.path.basename(attachment_path)}")
-        msg.attach(part)
-    
-    # Send email
+    # Queued on the shared pool; waits while it goes out in a batch
     try:
-        server = smtplib.SMTP('smtp.gmail.com', 587)
-        server.starttls()
-        server.login(sender_email, sender_password)
-        text = msg.as_string()
-        server.sendmail(sender_email, recipient_email, text)
-        server.quit()
+        mail_pool.send(app.config['SMTP_SENDER'], recipient_email,
+                       "TOPSIS Analysis Results", body, attachment)
         return True
     except Exception as e:
         print(f"Email error: {e}")
@@ -165,6 +146,22 @@ def send_email_with_attachment(recipient_email, attachment_path):
 def index():
     return render_template('index.html')
 
+def wants_json():
+    """True when the client asked for a JSON response"""
+    return request.accept_mimetypes.best == 'application/json'
+
+def respond(message, status=200, **data):
+    """Reply with JSON for API clients, or flash and redirect for the form"""
+    if wants_json():
+        return jsonify(message=message, **data), status
+    flash(message)
+    return redirect(url_for('index'))
+
+def remove_result(job):
+    """Free the result of an expired job"""
+    if job.result is not None:
+        job.result.cleanup()
+
 @app.route('/analyze', methods=['POST'])
 def analyze():
     try:
@@ -176,59 +173,81 @@ def analyze():
         
         # Validate inputs
         if not file:
-            flash('Please upload a file')
-            return redirect(url_for('index'))
+            return respond('Please upload a file', 400)
         
-        if not weights or not impacts or not email:
-            flash('All fields are required')
-            return redirect(url_for('index'))
+        if not weights or not impacts:
+            return respond('Weights and impacts are required', 400)
         
-        # Validate email format
-        if not validate_email(email):
-            flash('Invalid email format')
-            return redirect(url_for('index'))
+        # Validate email format (email is optional)
+        if email and not validate_email(email):
+            return respond('Invalid email format', 400)
         
         # Parse weights and impacts
         try:
             weight_list = [float(w.strip()) for w in weights.split(',')]
             impact_list = [i.strip() for i in impacts.split(',')]
         except:
-            flash('Invalid format for weights or impacts')
-            return redirect(url_for('index'))
+            return respond('Invalid format for weights or impacts', 400)
         
         # Check weights and impacts count match
         if len(weight_list) != len(impact_list):
-            flash('Number of weights must equal number of impacts')
-            return redirect(url_for('index'))
+            return respond('Number of weights must equal number of impacts', 400)
         
         # Validate impacts
         for imp in impact_list:
             if imp not in ['+', '-']:
-                flash('Impacts must be + or -')
-                return redirect(url_for('index'))
+                return respond('Impacts must be + or -', 400)
         
-        # Save uploaded file
-        filename = file.filename
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(filepath)
+        # Keep the upload in memory; only large files spill to disk
+        filename = secure_filename(file.filename)
+        upload = tempfile.SpooledTemporaryFile(max_size=app.config['SPOOL_MAX_SIZE'],
+                                               dir=app.config['SPOOL_DIR'])
+        file.save(upload)
         
-        # Run TOPSIS
-        result_path = run_topsis_analysis(filepath, weights, impacts)
-        
-        # Send email
-        if send_email_with_attachment(email, result_path):
-            flash('Analysis completed! Results sent to your email.')
-        else:
-            flash('Analysis completed but email sending failed. Please check email configuration.')
+        def analysis_job():
+            with upload:
+                return run_topsis_analysis(upload, filename, weights, impacts)
         
-        # Clean up uploaded file
-        os.remove(filepath)
+        # Queue the analysis and return straight away
+        try:
+            job_id = job_queue.submit(analysis_job, send_email_with_attachment,
+                                      email or None, on_expire=remove_result)
+        except QueueFull as e:
+            upload.close()
+            return respond(str(e), 503)
         
-        return redirect(url_for('index'))
+        status_url = url_for('job_status', job_id=job_id)
+        download_url = url_for('download_result', job_id=job_id)
+        return respond(f'Analysis submitted successfully! Job ID: {job_id}. '
+                       f'Check progress at {status_url} and download results '
+                       f'from {download_url}', 202, job_id=job_id,
+                       status_url=status_url, download_url=download_url)
         
     except Exception as e:
-        flash(f'Error: {str(e)}')
-        return redirect(url_for('index'))
+        return respond(f'Error: {str(e)}', 500)
+
+@app.route('/status/<job_id>')
+def job_status(job_id):
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify(error='Unknown job id'), 404
+    
+    data = job.to_dict()
+    if job.status == 'done':
+        data['download_url'] = url_for('download_result', job_id=job_id)
+    return jsonify(data)
+
+@app.route('/results/<job_id>')
+def download_result(job_id):
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify(error='Unknown job id'), 404
+    
+    if job.status != 'done':
+        return jsonify(job.to_dict()), 409
+    
+    return send_file(job.result.open(), mimetype='text/csv', as_attachment=True,
+                     download_name=job.result.filename)
 
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5000)
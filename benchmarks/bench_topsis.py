@@ -0,0 +1,215 @@
+"""Benchmark each TOPSIS stage across matrix sizes.
+
+Usage:
+    python benchmarks/bench_topsis.py --rows 100,10000,1000000 --cols 3,50,500 \
+        --output bench.json
+    python benchmarks/bench_topsis.py --output new.json --compare bench.json
+
+Each stage is timed (best of --repeat runs) and then run once more under
+tracemalloc to record its peak allocated memory. Results are written as
+JSON so runs from different releases can be compared. CLI startup (a
+fresh interpreter running `topsis --help` and a small CSV) is timed too,
+and float32 scoring is checked for rank agreement with float64.
+"""
+import sys
+import os
+import json
+import time
+import platform
+import subprocess
+import argparse
+import tempfile
+import tracemalloc
+from datetime import datetime, timezone
+
+# Add package directory to path
+repo_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+package_dir = os.path.join(repo_dir, 'Topsis-Naman-102317144')
+sys.path.insert(0, package_dir)
+
+import numpy as np
+import pandas as pd
+
+from topsis_calc import (normalize_matrix, calc_weighted_matrix, get_ideal_solutions,
+                         calc_euclidean_dist, topsis_score_calc)
+from engine import topsis_kernel, rank_scores
+from formats import read_table, write_table
+
+
+def make_table(rows, cols, seed=0):
+    """Synthetic decision table: a name column plus cols criteria"""
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame(rng.uniform(1, 100, size=(rows, cols)),
+                      columns=[f'C{j + 1}' for j in range(cols)])
+    df.insert(0, 'Name', np.arange(rows))
+    return df
+
+def measure(func, repeat):
+    """Best wall time over repeat runs, then peak traced memory of one run"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, best, peak
+
+def rank_agreement(reference, scores):
+    """How closely the ranks of scores follow those of reference scores"""
+    expected, ranks = rank_scores(reference), rank_scores(scores)
+    return {'rank_match': float(np.mean(ranks == expected)),
+            'max_rank_shift': int(np.abs(ranks - expected).max()),
+            'max_score_error': float(np.abs(scores - reference).max())}
+
+def bench_size(rows, cols, repeat, with_io):
+    """Time every stage for one matrix size"""
+    df = make_table(rows, cols)
+    data = df.iloc[:, 1:]
+    weights = [1.0] * cols
+    impacts = ['+' if j % 2 == 0 else '-' for j in range(cols)]
+    stages = {}
+
+    def record(name, func):
+        result, seconds, peak = measure(func, repeat)
+        stages[name] = {'seconds': seconds, 'peak_bytes': peak}
+        return result
+
+    norm = record('normalize_matrix', lambda: normalize_matrix(data))
+    weighted = record('calc_weighted_matrix', lambda: calc_weighted_matrix(norm, weights))
+    best, worst = record('get_ideal_solutions', lambda: get_ideal_solutions(weighted, impacts))
+    dist_best = record('calc_euclidean_dist', lambda: calc_euclidean_dist(weighted, best))
+    dist_worst = calc_euclidean_dist(weighted, worst)
+    scores = record('topsis_score_calc', lambda: topsis_score_calc(dist_best, dist_worst))
+    record('rank_scores', lambda: rank_scores(scores))
+
+    matrix = data.to_numpy(dtype=float)
+    exact = record('topsis_kernel', lambda: topsis_kernel(matrix, weights, impacts))
+    single = record('topsis_kernel_float32',
+                    lambda: topsis_kernel(matrix, weights, impacts, dtype='float32'))
+
+    if with_io:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'bench.csv')
+            record('write_csv', lambda: write_table(df, path))
+            record('read_csv', lambda: read_table(path))
+
+    return {'rows': rows, 'cols': cols, 'stages': stages,
+            'float32': rank_agreement(exact, single)}
+
+def bench_startup(repeat):
+    """Best wall time of fresh `topsis` processes: --help, then a small CSV"""
+    with tempfile.TemporaryDirectory() as tmp:
+        small = os.path.join(tmp, 'small.csv')
+        df = make_table(20, 4)
+        df['Name'] = [f'M{i}' for i in range(len(df))]
+        df.round(3).to_csv(small, index=False)
+        cases = {
+            'cli_help': ['--help'],
+            'cli_small_csv': [small, '1,1,1,1', '+,-,+,-',
+                              os.path.join(tmp, 'out.csv')],
+        }
+
+        startup = {}
+        for name, args in cases.items():
+            best = float('inf')
+            for _ in range(repeat):
+                start = time.perf_counter()
+                subprocess.run([sys.executable, '-m', 'Topsis-Naman-102317144'] + args,
+                               cwd=repo_dir, check=True, stdout=subprocess.DEVNULL)
+                best = min(best, time.perf_counter() - start)
+            startup[name] = {'seconds': best}
+    return startup
+
+def environment():
+    return {
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'machine': platform.machine(),
+        'cpus': os.cpu_count(),
+    }
+
+def compare(results, startup, baseline_file, tolerance):
+    """Print stages that got slower than the baseline by more than tolerance"""
+    with open(baseline_file) as f:
+        baseline = json.load(f)
+
+    old = {(r['rows'], r['cols'], stage): stats['seconds']
+           for r in baseline['results'] for stage, stats in r['stages'].items()}
+    regressions = 0
+    for r in results:
+        for stage, stats in r['stages'].items():
+            before = old.get((r['rows'], r['cols'], stage))
+            if before and stats['seconds'] > before * (1 + tolerance):
+                regressions += 1
+                print(f"REGRESSION {stage} rows={r['rows']} cols={r['cols']}: "
+                      f"{before:.4f}s -> {stats['seconds']:.4f}s")
+
+    for name, stats in startup.items():
+        before = baseline.get('startup', {}).get(name, {}).get('seconds')
+        if before and stats['seconds'] > before * (1 + tolerance):
+            regressions += 1
+            print(f"REGRESSION startup {name}: "
+                  f"{before:.4f}s -> {stats['seconds']:.4f}s")
+    return regressions
+
+def parse_sizes(text):
+    return [int(float(v)) for v in text.split(',')]
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark TOPSIS stages")
+    parser.add_argument('--rows', default='100,10000,1000000',
+                        help="comma-separated row counts (1e2 .. 1e7)")
+    parser.add_argument('--cols', default='3,50,500',
+                        help="comma-separated criteria counts (3 .. 500)")
+    parser.add_argument('--max-cells', type=float, default=5e7,
+                        help="skip sizes with more rows*cols than this")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--skip-io', action='store_true',
+                        help="do not time CSV read/write")
+    parser.add_argument('--skip-startup', action='store_true',
+                        help="do not time CLI startup")
+    parser.add_argument('--output', help="write JSON results to this file")
+    parser.add_argument('--compare', help="baseline JSON to check for regressions")
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help="allowed slowdown against the baseline (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    results = []
+    for rows in parse_sizes(args.rows):
+        for cols in parse_sizes(args.cols):
+            if rows * cols > args.max_cells:
+                print(f"skip rows={rows} cols={cols} (over --max-cells)")
+                continue
+            result = bench_size(rows, cols, args.repeat, not args.skip_io)
+            results.append(result)
+            for stage, stats in result['stages'].items():
+                print(f"rows={rows:>9} cols={cols:>4} {stage:<22}"
+                      f"{stats['seconds']:>10.4f}s {stats['peak_bytes'] / 2**20:>10.1f} MiB")
+            agreement = result['float32']
+            print(f"rows={rows:>9} cols={cols:>4} float32 ranks: "
+                  f"{agreement['rank_match']:.2%} equal, max shift "
+                  f"{agreement['max_rank_shift']}, max score error "
+                  f"{agreement['max_score_error']:.1e}")
+
+    startup = {} if args.skip_startup else bench_startup(args.repeat)
+    for name, stats in startup.items():
+        print(f"startup {name:<22}{stats['seconds']:>10.4f}s")
+
+    report = {'environment': environment(), 'results': results,
+              'startup': startup}
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Results saved to {args.output}")
+
+    if args.compare and compare(results, startup, args.compare, args.tolerance):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+import time
+import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class QueueFull(Exception):
+    """Raised when the job queue has no room for another job"""
+
+
+class Job:
+    """State of one submitted analysis"""
+
+    def __init__(self, job_id, email=None):
+        self.id = job_id
+        self.email = email
+        self.status = 'queued'      # queued -> running -> done / failed
+        self.delivery = None        # None, or pending -> sent / failed
+        self.result = None
+        self.error = None
+        self.created = time.time()
+        self.finished = None
+
+    def to_dict(self):
+        return {
+            'job_id': self.id,
+            'status': self.status,
+            'delivery': self.delivery,
+            'error': self.error,
+            'created': self.created,
+            'finished': self.finished,
+        }
+
+
+class JobQueue:
+    """In-process job queue with separate analysis and delivery pools.
+
+    analysis_workers bounds how many analyses run at once; max_pending bounds
+    how many may be queued or running before submit() raises QueueFull.
+    Email delivery runs on its own pool so a slow SMTP server never holds up
+    an analysis worker. Finished jobs are forgotten after ttl seconds.
+    """
+
+    def __init__(self, analysis_workers=2, delivery_workers=1, max_pending=100,
+                 ttl=3600):
+        self._analysis = ThreadPoolExecutor(max_workers=analysis_workers,
+                                            thread_name_prefix='topsis-job')
+        self._delivery = ThreadPoolExecutor(max_workers=delivery_workers,
+                                            thread_name_prefix='topsis-mail')
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self.ttl = ttl
+
+    def submit(self, analyze, deliver=None, email=None, on_expire=None):
+        """Queue a job and return its id without waiting for it.
+
+        analyze() returns the job result. If email is given,
+        deliver(email, result) then runs on the delivery pool and returns
+        True on success. on_expire(job) runs when the job is dropped after
+        ttl, e.g. to free its result.
+        """
+        if not self._slots.acquire(blocking=False):
+            raise QueueFull("Too many jobs in progress, please try again later")
+
+        self._prune(on_expire)
+        job = Job(uuid.uuid4().hex, email)
+        with self._lock:
+            self._jobs[job.id] = job
+
+        self._analysis.submit(self._run, job, analyze, deliver)
+        return job.id
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _run(self, job, analyze, deliver):
+        job.status = 'running'
+        try:
+            job.result = analyze()
+            job.status = 'done'
+        except Exception as e:
+            job.error = str(e)
+            job.status = 'failed'
+        finally:
+            job.finished = time.time()
+            self._slots.release()
+
+        if job.status == 'done' and job.email and deliver:
+            job.delivery = 'pending'
+            self._delivery.submit(self._deliver, job, deliver)
+
+    def _deliver(self, job, deliver):
+        try:
+            job.delivery = 'sent' if deliver(job.email, job.result) else 'failed'
+        except Exception as e:
+            job.delivery = 'failed'
+            print(f"Email error: {e}")
+
+    def _prune(self, on_expire):
+        cutoff = time.time() - self.ttl
+        with self._lock:
+            expired = [job for job in self._jobs.values()
+                       if job.finished and job.finished < cutoff
+                       and job.delivery != 'pending']
+            for job in expired:
+                del self._jobs[job.id]
+        if on_expire:
+            for job in expired:
+                on_expire(job)
+
+    def shutdown(self, wait=True):
+        self._analysis.shutdown(wait=wait)
+        self._delivery.shutdown(wait=wait)
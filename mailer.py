@@ -0,0 +1,267 @@
+import os
+import re
+import time
+import uuid
+import queue
+import base64
+import smtplib
+import threading
+from concurrent.futures import Future
+from email.utils import formatdate, make_msgid
+
+# 57 raw bytes encode to one 76-character base64 line
+ATTACHMENT_CHUNK = 57 * 1024
+
+
+def _dot_stuff(text):
+    """CRLF line endings with SMTP dot-stuffing for a text part"""
+    text = re.sub(r'(?:\r\n|\n|\r)', '\r\n', text)
+    return re.sub(r'(?m)^\.', '..', text)
+
+def _open_attachment(attachment):
+    """Filename and binary reader for a path or an object with filename/open()"""
+    if isinstance(attachment, str):
+        return os.path.basename(attachment), open(attachment, 'rb')
+    return attachment.filename, attachment.open()
+
+def _transient(error):
+    """Whether a failed send is worth retrying: a lost connection or a 4xx"""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        codes = [code for code, _ in error.recipients.values()]
+        return all(400 <= code < 500 for code in codes)
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 400 <= error.smtp_code < 500
+    return isinstance(error, (smtplib.SMTPServerDisconnected, OSError))
+
+def iter_message(sender, recipient, subject, body, attachment=None):
+    """Yield a MIME message as byte chunks, streaming the attachment.
+
+    attachment is a file path or an object with filename and open(). It is
+    base64-encoded one chunk at a time, so it is never held in memory as a
+    whole.
+    """
+    boundary = f"=={uuid.uuid4().hex}"
+    yield (f"From: {sender}\r\n"
+           f"To: {recipient}\r\n"
+           f"Subject: {subject}\r\n"
+           f"Date: {formatdate(localtime=True)}\r\n"
+           f"Message-ID: {make_msgid()}\r\n"
+           f"MIME-Version: 1.0\r\n"
+           f"Content-Type: multipart/mixed; boundary=\"{boundary}\"\r\n"
+           f"\r\n"
+           f"--{boundary}\r\n"
+           f"Content-Type: text/plain; charset=\"utf-8\"\r\n"
+           f"Content-Transfer-Encoding: 8bit\r\n"
+           f"\r\n"
+           f"{_dot_stuff(body)}\r\n").encode('utf-8')
+
+    if attachment is not None:
+        filename, f = _open_attachment(attachment)
+        yield (f"--{boundary}\r\n"
+               f"Content-Type: application/octet-stream\r\n"
+               f"Content-Transfer-Encoding: base64\r\n"
+               f"Content-Disposition: attachment; filename=\"{filename}\"\r\n"
+               f"\r\n").encode('ascii')
+        with f:
+            while True:
+                chunk = f.read(ATTACHMENT_CHUNK)
+                if not chunk:
+                    break
+                yield base64.encodebytes(chunk).replace(b'\n', b'\r\n')
+
+    yield f"--{boundary}--\r\n".encode('ascii')
+
+
+class SMTPPool:
+    """Pool of authenticated SMTP connections with batched, retried sends.
+
+    submit() queues a message and returns a Future. Sender threads, one per
+    pooled connection, take up to batch_size queued messages at a time and
+    send them over one connection. Failed sends are retried on a fresh
+    connection with exponential backoff. With starttls=False and no
+    credentials it works against a plain local stand-in server, e.g.
+    `python -m aiosmtpd -n -l localhost:8025`.
+    """
+
+    def __init__(self, host, port, username=None, password=None, starttls=True,
+                 size=2, batch_size=20, batch_wait=0.2, retries=3, backoff=1.0,
+                 timeout=30):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+
+        self._idle = queue.LifoQueue()
+        self._outbox = queue.Queue()
+        self._closed = False
+        self._threads = [threading.Thread(target=self._sender, daemon=True,
+                                          name=f'smtp-sender-{i}')
+                         for i in range(size)]
+        for thread in self._threads:
+            thread.start()
+
+    def _connect(self):
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.starttls:
+            server.starttls()
+        if self.username:
+            server.login(self.username, self.password)
+        return server
+
+    def _acquire(self):
+        """An idle connection that still answers NOOP, or a new one"""
+        while True:
+            try:
+                server = self._idle.get_nowait()
+            except queue.Empty:
+                return self._connect()
+            try:
+                if server.noop()[0] == 250:
+                    return server
+            except smtplib.SMTPException:
+                pass
+            except OSError:
+                pass
+            self._discard(server)
+
+    def _discard(self, server):
+        try:
+            server.quit()
+        except Exception:
+            try:
+                server.close()
+            except Exception:
+                pass
+
+    def _transmit(self, server, sender, recipient, chunks):
+        server.ehlo_or_helo_if_needed()
+        code, resp = server.mail(sender)
+        if code != 250:
+            raise smtplib.SMTPSenderRefused(code, resp, sender)
+        code, resp = server.rcpt(recipient)
+        if code not in (250, 251):
+            raise smtplib.SMTPRecipientsRefused({recipient: (code, resp)})
+        code, resp = server.docmd('DATA')
+        if code != 354:
+            raise smtplib.SMTPDataError(code, resp)
+        for chunk in chunks:
+            server.send(chunk)
+        server.send(b'.\r\n')
+        code, resp = server.getreply()
+        if code != 250:
+            raise smtplib.SMTPDataError(code, resp)
+
+    def _send_one(self, server, message):
+        """Send one message, reconnecting and backing off on failure.
+
+        Dropped connections and 4xx replies are retried; 5xx replies and
+        other SMTP errors are permanent and fail at once. Returns the
+        connection to keep using (None if it was dropped) and the error,
+        None once the message is sent.
+        """
+        sender, recipient, subject, body, attachment = message
+        for attempt in range(self.retries + 1):
+            try:
+                if server is None:
+                    server = self._connect()
+                self._transmit(server, sender, recipient,
+                               iter_message(sender, recipient, subject, body,
+                                            attachment))
+                return server, None
+            except (smtplib.SMTPException, OSError) as e:
+                if not _transient(e):
+                    return self._reset(server), e
+                if server is not None:
+                    self._discard(server)
+                    server = None
+                if attempt == self.retries:
+                    return None, e
+                time.sleep(self.backoff * 2 ** attempt)
+
+    def _reset(self, server):
+        """The connection after a refused message, or None if it broke"""
+        if server is None:
+            return None
+        try:
+            if server.rset()[0] == 250:
+                return server
+        except (smtplib.SMTPException, OSError):
+            pass
+        self._discard(server)
+        return None
+
+    def _next_batch(self):
+        first = self._outbox.get()
+        if first is None:
+            return None
+        batch = [first]
+        deadline = time.monotonic() + self.batch_wait
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._outbox.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                self._outbox.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _sender(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+
+            try:
+                server = self._acquire()
+            except (smtplib.SMTPException, OSError):
+                server = None
+
+            for message, future in batch:
+                try:
+                    server, error = self._send_one(server, message)
+                except Exception as e:
+                    if server is not None:
+                        self._discard(server)
+                    server, error = None, e
+                if error is None:
+                    future.set_result(True)
+                else:
+                    future.set_exception(error)
+
+            if server is not None:
+                self._idle.put(server)
+
+    def submit(self, sender, recipient, subject, body, attachment=None):
+        """Queue a message for delivery and return a Future"""
+        if self._closed:
+            raise RuntimeError("SMTP pool is closed")
+        future = Future()
+        self._outbox.put(((sender, recipient, subject, body, attachment),
+                          future))
+        return future
+
+    def send(self, sender, recipient, subject, body, attachment=None):
+        """Send a message and wait for it to be delivered"""
+        return self.submit(sender, recipient, subject, body,
+                           attachment).result()
+
+    def close(self):
+        """Finish queued messages, then stop the senders and connections"""
+        self._closed = True
+        for _ in self._threads:
+            self._outbox.put(None)
+        for thread in self._threads:
+            thread.join()
+        while not self._idle.empty():
+            self._discard(self._idle.get_nowait())
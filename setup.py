@@ -21,11 +21,16 @@ setup(
         "Intended Audience :: Education",
         "Topic :: Scientific/Engineering :: Mathematics",
     ],
-    python_requires=">=3.6",
+    python_requires=">=3.7",
     install_requires=[
         "pandas>=1.0.0",
         "numpy>=1.18.0",
     ],
+    extras_require={
+        "excel": ["openpyxl>=3.0.0"],
+        "arrow": ["pyarrow>=4.0.0"],
+        "zstd": ["zstandard>=0.15"],
+    },
     entry_points={
         'console_scripts': [
             'topsis=Topsis_Naman_102317144.__main__:main',
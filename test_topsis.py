@@ -1,13 +1,49 @@
 import sys
 import os
+import io
+import gzip
+import re
+import json
+import email
+import smtplib
+import socketserver
+import subprocess
+import tempfile
+import threading
+import time
+import urllib.request
 
 # Add package directory to path
 package_dir = os.path.join(os.path.dirname(__file__), 'Topsis-Naman-102317144')
 sys.path.insert(0, package_dir)
 
 from topsis_calc import run_topsis
+from inputs import parse_inputs
+import inputs
+from streaming import run_topsis_chunked
+import incremental
+from incremental import IncrementalTopsis
+from cache import ResultCache, MemoryBackend, DiskBackend
+from mapped import load_matrix, run_topsis_mapped
+from server import ScoringServer, MicroBatcher
+from fastpath import run_topsis_small
+from batch import BatchJob, read_manifest, glob_jobs, sheet_jobs, run_batch
+from excel import read_sheet, read_sheets
+import sensitivity
+from sensitivity import run_sensitivity
+from profiling import Profiler
+from extsort import ExternalRanker
+from csvwriter import write_csv
+from formats import read_table, write_table
+from engine import topsis_kernel, rank_scores, batch_topsis, topsis_blockwise
+import numpy as np
 import pandas as pd
 
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from jobs import JobQueue, QueueFull
+from mailer import SMTPPool, ATTACHMENT_CHUNK
+import app as web
+
 def test_basic_topsis():
     """Test basic TOPSIS functionality"""
     print("Testing basic TOPSIS...")
@@ -82,6 +118,1089 @@ def test_error_handling():
     
     print("✓ Error handling tests passed!\n")
 
+def test_missing_values():
+    """Test that missing criteria and NaN scores are rejected, not ranked"""
+    print("Testing missing values...")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'missing.csv')
+        with open(path, 'w') as f:
+            f.write("Name,X,Y,Z\nx,1,2,3\ny,,3,1\nz,4,5,6\n")
+        for options in ({}, {'chunksize': 2}, {'top_k': 1}):
+            try:
+                run_topsis(path, '1,1,1', '+,+,+', os.path.join(tmp, 'out.csv'),
+                           **options)
+                assert False, f"missing value should be rejected ({options})"
+            except ValueError as e:
+                assert "'X'" in str(e)
+    try:
+        rank_scores([0.5, np.nan])
+        assert False, "NaN scores should not be ranked"
+    except ValueError:
+        pass
+    
+    print("✓ Missing values are rejected\n")
+
+def _run_cli(*args):
+    """Run the topsis command from the repository root"""
+    return subprocess.run([sys.executable, '-m', 'Topsis-Naman-102317144', *args],
+                          cwd=os.path.dirname(os.path.abspath(__file__)),
+                          capture_output=True, text=True)
+
+def test_command_line():
+    """Test the command line with weights and impacts that start with '-'"""
+    print("Testing command line...")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        out = os.path.join(tmp, 'out.csv')
+        proc = _run_cli('data.csv', '1,1,1,1,1', '-,+,+,+,+', out)
+        assert proc.returncode == 0, proc.stdout
+        expected = run_topsis('data.csv', '1,1,1,1,1', '-,+,+,+,+',
+                              os.path.join(tmp, 'expected.csv'))
+        assert pd.read_csv(out)['Rank'].equals(expected['Rank'])
+        
+        proc = _run_cli('data.csv', '-1,1,1,1,1', '-,+,+,+,+', out,
+                        '--precision', '3')
+        assert proc.returncode == 0, proc.stdout
+        
+        proc = _run_cli('data.csv', '1,1,1,1,1', '-,+,+,+,+', out, '--bogus')
+        assert proc.returncode == 1
+        assert "unrecognized arguments: --bogus" in proc.stdout
+        
+        # A zero --top-k reaches run_topsis's check instead of the fast path
+        proc = _run_cli('data.csv', '1,1,1,1,1', '-,+,+,+,+', out, '--top-k', '0')
+        assert proc.returncode == 1 and "top_k" in proc.stdout, proc.stdout
+    
+    print("✓ Command line reads dash-led weights and impacts\n")
+
+def test_single_read():
+    """Test that run_topsis reads the input once and accepts a ParsedInput"""
+    print("Testing single read...")
+    
+    df = pd.DataFrame({'Name': ['A', 'B', 'C'], 'X': [1, 2, 3], 'Y': [6, 4, 5]})
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'in.csv')
+        out = os.path.join(tmp, 'out.csv')
+        df.to_csv(path, index=False)
+        
+        calls = []
+        original = inputs.read_table
+        def counting_read(*args, **kwargs):
+            calls.append(args)
+            return original(*args, **kwargs)
+        inputs.read_table = counting_read
+        try:
+            expected = run_topsis(path, '1,1', '+,-', out)
+        finally:
+            inputs.read_table = original
+        assert len(calls) == 1
+        
+        parsed = parse_inputs(path, '1,1', '+,-')
+        result = run_topsis(parsed, None, None, out)
+        assert result.equals(expected)
+        assert pd.read_csv(out).equals(pd.read_csv(path).assign(
+            **{'Topsis Score': expected['Topsis Score'], 'Rank': expected['Rank']}))
+    
+    print("✓ Input is read and parsed once\n")
+
+def test_vectorized_kernel():
+    """Test vectorized kernel against the row-by-row reference"""
+    print("Testing vectorized kernel...")
+    
+    rng = np.random.default_rng(7)
+    matrix = rng.uniform(1, 100, size=(200, 6))
+    weights = [1, 2, 1, 0.5, 3, 1]
+    impacts = ['+', '-', '+', '+', '-', '+']
+    
+    # Reference: the original per-column / per-row computation
+    norm = matrix / np.sqrt((matrix ** 2).sum(axis=0))
+    weighted = norm * weights
+    best = [weighted[:, j].max() if impacts[j] == '+' else weighted[:, j].min()
+            for j in range(6)]
+    worst = [weighted[:, j].min() if impacts[j] == '+' else weighted[:, j].max()
+             for j in range(6)]
+    d_best = [np.sqrt(sum((row[j] - best[j]) ** 2 for j in range(6))) for row in weighted]
+    d_worst = [np.sqrt(sum((row[j] - worst[j]) ** 2 for j in range(6))) for row in weighted]
+    expected = [w / (b + w) for b, w in zip(d_best, d_worst)]
+    
+    scores = topsis_kernel(matrix, weights, impacts)
+    assert np.allclose(scores, expected)
+    
+    tied = [0.5, 0.9, 0.5, 0.1, 0.9]
+    expected_ranks = pd.Series(tied).rank(ascending=False).astype(int).tolist()
+    assert rank_scores(tied).tolist() == expected_ranks
+    
+    print("✓ Vectorized kernel matches reference\n")
+
+def test_batch_scenarios():
+    """Test batch scoring against one kernel call per scenario"""
+    print("Testing batch scenarios...")
+    
+    rng = np.random.default_rng(11)
+    matrix = rng.uniform(1, 50, size=(100, 4))
+    weight_sets = rng.uniform(0.1, 5, size=(30, 4))
+    weight_sets[0, 2] = -1.0
+    impacts = ['+', '-', '+', '-']
+    
+    scores, ranks = batch_topsis(matrix, weight_sets, impacts)
+    assert scores.shape == ranks.shape == (30, 100)
+    for s, weights in enumerate(weight_sets):
+        expected = topsis_kernel(matrix, weights, impacts)
+        assert np.allclose(scores[s], expected)
+        assert (ranks[s] == rank_scores(expected)).all()
+    
+    print("✓ Batch scenarios match single runs\n")
+
+def test_file_formats():
+    """Test round trips through the Parquet, Feather, .npy and .npz formats"""
+    print("Testing file formats...")
+    
+    df = pd.DataFrame({'Fund': ['M1', 'M2', 'M3', 'M4'],
+                       'P1': [250.0, 200.0, 300.0, 275.0],
+                       'P2': [16.0, 32.0, 32.0, 8.0],
+                       'P3': [12.0, 8.0, 16.0, 4.0]})
+    with tempfile.TemporaryDirectory() as tmp:
+        src = os.path.join(tmp, 'in.csv')
+        df.to_csv(src, index=False)
+        expected = run_topsis(src, '1,1,2', '-,+,+', os.path.join(tmp, 'out.csv'))
+        
+        for ext in ('.parquet', '.feather', '.npz'):
+            path = os.path.join(tmp, 'in' + ext)
+            out = os.path.join(tmp, 'out' + ext)
+            write_table(df, path)
+            assert read_table(path).equals(df)
+            result = run_topsis(path, '1,1,2', '-,+,+', out)
+            assert read_table(out).equals(result)
+            assert result['Rank'].equals(expected['Rank'])
+        
+        subset = run_topsis(os.path.join(tmp, 'in.parquet'), '1,2', '-,+',
+                            os.path.join(tmp, 'sub.parquet'),
+                            columns=['Fund', 'P1', 'P3'])
+        assert list(subset.columns) == ['Fund', 'P1', 'P3', 'Topsis Score', 'Rank']
+        
+        matrix = os.path.join(tmp, 'matrix.npy')
+        np.save(matrix, df.iloc[:, 1:].to_numpy())
+        table = read_table(matrix)
+        assert list(table.columns) == ['Alternative', 'C1', 'C2', 'C3']
+        for options in ({}, {'mmap': True}):
+            out = os.path.join(tmp, 'result.npy')
+            run_topsis(matrix, '1,1,2', '-,+,+', out, **options)
+            saved = np.load(out)
+            assert saved.shape == (4, 2)
+            assert np.allclose(saved[:, 0], expected['Topsis Score'])
+            assert (saved[:, 1] == expected['Rank']).all()
+            
+            # A best-first top_k result would lose its alternatives in .npy
+            try:
+                run_topsis(matrix, '1,1,2', '-,+,+', out, top_k=2, **options)
+                assert False, "top_k into .npy should be rejected"
+            except ValueError as e:
+                assert ".npz" in str(e)
+        top = os.path.join(tmp, 'top.npz')
+        run_topsis_mapped(matrix, '1,1,2', '-,+,+', top, top_k=2)
+        assert list(read_table(top)['Rank']) == [1, 2]
+    
+    print("✓ File formats round-trip\n")
+
+def test_chunked_topsis():
+    """Test chunked mode against the in-memory run"""
+    print("Testing chunked TOPSIS...")
+    
+    rng = np.random.default_rng(3)
+    df = pd.DataFrame(rng.integers(1, 20, size=(250, 4)), columns=['A', 'B', 'C', 'D'])
+    df.insert(0, 'Name', [f'R{i}' for i in range(250)])
+    df.to_csv('chunk_input.csv', index=False)
+    
+    expected = run_topsis('chunk_input.csv', '1,2,1,1', '+,-,+,+', 'chunk_full.csv')
+    rows = run_topsis('chunk_input.csv', '1,2,1,1', '+,-,+,+', 'chunk_output.csv',
+                      chunksize=40)
+    result = pd.read_csv('chunk_output.csv')
+    assert rows == 250
+    assert np.allclose(result['Topsis Score'], expected['Topsis Score'])
+    assert (result['Rank'] == expected['Rank']).all()
+    
+    run_topsis_chunked('chunk_input.csv', '1,2,1,1', '+,-,+,+', 'chunk_top.csv',
+                       chunksize=40, top_k=10)
+    top = pd.read_csv('chunk_top.csv')
+    best = expected.sort_values('Topsis Score', ascending=False, kind='stable').head(10)
+    assert top['Name'].tolist() == best['Name'].tolist()
+    assert top['Rank'].tolist() == best['Rank'].tolist()
+    
+    top = run_topsis('chunk_input.csv', '1,2,1,1', '+,-,+,+', 'chunk_top.csv', top_k=10)
+    assert top['Name'].tolist() == best['Name'].tolist()
+    assert top['Rank'].tolist() == best['Rank'].tolist()
+    
+    for name in ['chunk_input.csv', 'chunk_full.csv', 'chunk_output.csv', 'chunk_top.csv']:
+        os.remove(name)
+    
+    print("✓ Chunked TOPSIS matches in-memory run\n")
+
+def test_incremental_scorer():
+    """Test incremental updates against a full recompute"""
+    print("Testing incremental scorer...")
+    
+    rng = np.random.default_rng(5)
+    weights = [1, 1, 2]
+    impacts = ['+', '-', '+']
+    scorer = IncrementalTopsis(weights, impacts, capacity=4)
+    table = {}
+    
+    for i in range(60):
+        table[i] = rng.uniform(1, 10, size=3)
+        scorer.add(i, table[i])
+    for i in range(0, 60, 7):
+        table[i] = rng.uniform(1, 10, size=3)
+        scorer.update(i, table[i])
+    for i in range(0, 60, 5):
+        del table[i]
+        scorer.remove(i)
+    
+    keys = list(table)
+    expected = topsis_kernel(np.array([table[k] for k in keys]), weights, impacts)
+    scores = scorer.scores()
+    assert len(scorer) == len(keys)
+    assert np.allclose(scores[keys].to_numpy(), expected)
+    assert (scorer.ranks()[keys].to_numpy() == rank_scores(expected)).all()
+    
+    # Under minmax only the extremes matter: a row inside every range is
+    # scored alone, a new extreme rescores every row
+    scorer = IncrementalTopsis(weights, impacts, normalization='minmax')
+    table = {i: rng.uniform(1, 10, size=3) for i in range(20)}
+    for key, values in table.items():
+        scorer.add(key, values)
+    scorer.scores()
+    scored = []
+    score_rows = incremental.score_rows
+    incremental.score_rows = lambda rows, *args: (scored.append(len(rows)),
+                                                  score_rows(rows, *args))[1]
+    try:
+        for key, values in ((20, [5.0, 5.0, 5.0]), (21, [5.0, 5.0, 20.0])):
+            table[key] = np.array(values)
+            scorer.add(key, values)
+            scores = scorer.scores()
+    finally:
+        incremental.score_rows = score_rows
+    assert scored == [1, 22]
+    keys = list(table)
+    expected = topsis_kernel(np.array([table[k] for k in keys]), weights,
+                             impacts, 'minmax')
+    assert np.allclose(scores[keys].to_numpy(), expected)
+    
+    # Moving a column extreme in place still rescores the older rows
+    for normalization in ('minmax', 'max', 'sum'):
+        for removed in range(3):
+            table = {0: [2, 2], 1: [3, 1], 2: [1, 2]}
+            scorer = IncrementalTopsis([1, 1], ['+', '+'],
+                                       normalization=normalization)
+            for key, values in table.items():
+                scorer.add(key, values)
+            scorer.scores()
+            del table[removed]
+            scorer.remove(removed)
+            table.update({3: [3, 2], 4: [2, 3]})
+            for key in (3, 4):
+                scorer.add(key, table[key])
+            keys = list(table)
+            expected = topsis_kernel(np.array([table[k] for k in keys]),
+                                     [1, 1], ['+', '+'], normalization)
+            assert np.allclose(scorer.scores()[keys].to_numpy(), expected)
+    
+    print("✓ Incremental scorer matches full recompute\n")
+
+def test_mapped_matrix():
+    """Test memory-mapped blockwise scoring of a .npy matrix"""
+    print("Testing memory-mapped matrix...")
+    
+    rng = np.random.default_rng(9)
+    matrix = rng.uniform(1, 10, size=(500, 3))
+    np.save('mapped_input.npy', matrix)
+    
+    rows = run_topsis_mapped('mapped_input.npy', '1,2,1', '+,-,+', 'mapped_output.npy',
+                             block_rows=64)
+    result = np.load('mapped_output.npy')
+    expected = topsis_kernel(matrix, [1, 2, 1], ['+', '-', '+'])
+    assert rows == 500
+    assert isinstance(load_matrix('mapped_input.npy'), np.memmap)
+    assert np.allclose(result[:, 0], expected)
+    assert (result[:, 1] == rank_scores(expected)).all()
+    
+    os.remove('mapped_input.npy')
+    os.remove('mapped_output.npy')
+    
+    print("✓ Memory-mapped matrix matches in-memory kernel\n")
+
+def test_parallel_blocks():
+    """Test that threaded block scoring is deterministic"""
+    print("Testing parallel blocks...")
+    
+    rng = np.random.default_rng(13)
+    matrix = rng.uniform(1, 10, size=(1000, 5))
+    weights = [1, 1, 2, 1, 1]
+    impacts = ['+', '-', '+', '+', '-']
+    
+    serial = topsis_blockwise(matrix, weights, impacts, block_rows=50)
+    parallel = topsis_blockwise(matrix, weights, impacts, block_rows=50, workers=4)
+    assert np.array_equal(serial, parallel)
+    assert np.allclose(parallel, topsis_kernel(matrix, weights, impacts))
+    
+    print("✓ Parallel blocks match serial run\n")
+
+def test_result_cache():
+    """Test cached scores and eviction"""
+    print("Testing result cache...")
+    
+    rng = np.random.default_rng(17)
+    matrix = rng.uniform(1, 10, size=(50, 3))
+    impacts = ['+', '-', '+']
+    cache = ResultCache(MemoryBackend())
+    
+    first = cache.scores(matrix, [1, 2, 1], impacts)
+    again = cache.scores(matrix.copy(), [2, 4, 2], impacts)
+    other = cache.scores(matrix, [1, 1, 1], impacts)
+    assert (cache.hits, cache.misses) == (1, 2)
+    assert np.allclose(first, topsis_kernel(matrix, [1, 2, 1], impacts))
+    assert np.array_equal(first, again)
+    assert np.allclose(other, topsis_kernel(matrix, [1, 1, 1], impacts))
+    
+    small = MemoryBackend(max_items=2)
+    for i in range(3):
+        small.set(str(i), np.zeros(4))
+    assert small.get('0') is None and small.get('2') is not None
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        disk = ResultCache(DiskBackend(tmp))
+        disk.scores(matrix, [1, 2, 1], impacts)
+        assert np.array_equal(ResultCache(DiskBackend(tmp)).scores(matrix, [1, 2, 1], impacts), first)
+    
+    print("✓ Result cache works\n")
+
+def test_fast_path():
+    """Test the pandas-free path for small CSVs against run_topsis"""
+    print("Testing small CSV fast path...")
+    
+    test_data = {
+        'Model': ['M1', 'M2', 'M3', 'M4', 'M5'],
+        'Price': [250, 200, 300, 275, 225],
+        'Storage': [16, 16, 32, 32, 16],
+        'Camera': [12.5, 8, 16, 8, 16],
+        'Looks': [5, 3, 4, 4, 2]
+    }
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        input_file = os.path.join(tmp, 'input.csv')
+        fast_file = os.path.join(tmp, 'fast.csv')
+        full_file = os.path.join(tmp, 'full.csv')
+        pd.DataFrame(test_data).to_csv(input_file, index=False)
+        
+        assert run_topsis_small(input_file, "1,1,1,1", "-,+,+,+", fast_file) == 5
+        run_topsis(input_file, "1,1,1,1", "-,+,+,+", full_file)
+        with open(fast_file) as a, open(full_file) as b:
+            assert a.read() == b.read()
+        
+        # Values pandas may parse differently fall back to run_topsis
+        pd.DataFrame({'Model': ['M1', 'M2'], 'A': [0.1234567890123456, 2.0],
+                      'B': [1, 2]}).to_csv(input_file, index=False)
+        assert run_topsis_small(input_file, "1,1", "+,+", fast_file) is None
+    
+    print("✓ Fast path matches run_topsis\n")
+
+def test_batch_jobs():
+    """Test manifest and glob batches in one process"""
+    print("Testing batch mode...")
+    
+    df = pd.DataFrame({
+        'Model': ['M1', 'M2', 'M3'],
+        'Price': [250, 200, 300],
+        'Storage': [16, 32, 32],
+        'Camera': [12, 8, 16]
+    })
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in ('a.csv', 'b.csv'):
+            df.to_csv(os.path.join(tmp, name), index=False)
+        
+        manifest = os.path.join(tmp, 'jobs.jsonl')
+        with open(manifest, 'w') as f:
+            f.write(json.dumps({'input': 'a.csv', 'weights': '1,1,1',
+                                'impacts': '-,+,+', 'output': 'ra.csv'}) + '\n')
+            f.write(json.dumps({'input': 'b.csv', 'weights': '1,1',
+                                'impacts': '-,+', 'output': 'rb.csv'}) + '\n')
+        
+        results = run_batch(read_manifest(manifest), max_jobs=2)
+        assert results[0].error is None and results[0].rows == 3
+        assert "Number of weights" in results[1].error
+        expected = run_topsis(os.path.join(tmp, 'a.csv'), "1,1,1", "-,+,+",
+                              os.path.join(tmp, 'expected.csv'))
+        result = pd.read_csv(os.path.join(tmp, 'ra.csv'))
+        assert list(result['Rank']) == list(expected['Rank'])
+        
+        jobs = glob_jobs(os.path.join(tmp, '?.csv'), "1,1,1", "-,+,+",
+                         os.path.join(tmp, 'out'))
+        results = run_batch(jobs, top_k=2)
+        assert [r.rows for r in results] == [2, 2]
+        assert os.path.exists(os.path.join(tmp, 'out', 'result_b.csv'))
+        
+        # precision=0 is an option, not a plain run
+        results = run_batch(jobs, precision=0, top_k=None)
+        assert [r.rows for r in results] == [3, 3]
+        result = pd.read_csv(os.path.join(tmp, 'out', 'result_a.csv'))
+        assert (result['Topsis Score'] == result['Topsis Score'].round()).all()
+    
+    print("✓ Batch mode works\n")
+
+def test_sensitivity():
+    """Test Monte Carlo rank statistics and weight thresholds"""
+    print("Testing sensitivity analysis...")
+    
+    rng = np.random.default_rng(11)
+    matrix = rng.uniform(1, 10, size=(40, 3))
+    impacts = ['+', '-', '+']
+    result = run_sensitivity(matrix, [1, 2, 1], impacts, samples=300, top_k=3, seed=5)
+    
+    _, ranks = batch_topsis(matrix, result.samples, impacts)
+    assert np.allclose(result.ranks['Mean Rank'], ranks.mean(axis=0))
+    assert np.array_equal(result.ranks['Worst Rank'], ranks.max(axis=0))
+    assert np.allclose(result.ranks['P(Top 3)'], (ranks <= 3).mean(axis=0))
+    
+    best = np.argmax(topsis_kernel(matrix, [1, 2, 1], impacts))
+    for j, factor in enumerate(result.thresholds['Upper Factor']):
+        if pd.isna(factor):
+            continue
+        for scale, same in ((factor * 0.999, True), (factor * 1.001, False)):
+            weights = [1.0, 2.0, 1.0]
+            weights[j] *= scale
+            assert (np.argmax(topsis_kernel(matrix, weights, impacts)) == best) == same
+    
+    # Sample ranks match rank_scores with exact ties and ratios ulps apart
+    pow_best = rng.uniform(1, 2, size=(50, 200))
+    pow_worst = np.ones_like(pow_best)
+    pow_best[::2, 10] = pow_best[::2, 20]
+    pow_best[::3, 30] = np.nextafter(pow_best[::3, 40], 3)
+    pow_worst[::5, 50] = 0
+    with np.errstate(divide='ignore'):
+        closeness = -(pow_best / pow_worst)
+    assert np.array_equal(sensitivity._sample_ranks(pow_best, pow_worst),
+                          rank_scores(closeness))
+    
+    print("✓ Sensitivity analysis works\n")
+
+def test_normalizations_and_distances():
+    """Test every normalization and distance against a direct computation"""
+    print("Testing normalizations and distances...")
+    
+    rng = np.random.default_rng(4)
+    matrix = rng.uniform(1, 10, size=(30, 3))
+    weights, impacts = [1, 2, 1], ['+', '-', '+']
+    w = np.array(weights, dtype=float)
+    benefit = np.array([True, False, True])
+    shifts = {'vector': 0, 'minmax': matrix.min(axis=0), 'max': 0, 'sum': 0}
+    scales = {'vector': np.sqrt(np.square(matrix).sum(axis=0)),
+              'minmax': np.ptp(matrix, axis=0), 'max': matrix.max(axis=0),
+              'sum': matrix.sum(axis=0)}
+    
+    for normalization in ('vector', 'minmax', 'max', 'sum'):
+        v = (matrix - shifts[normalization]) / scales[normalization] * w
+        best = np.where(benefit, v.max(axis=0), v.min(axis=0))
+        worst = np.where(benefit, v.min(axis=0), v.max(axis=0))
+        for distance, p in (('euclidean', 2), ('manhattan', 1),
+                            ('chebyshev', np.inf), ('minkowski:3', 3)):
+            d_best = np.linalg.norm(v - best, ord=p, axis=1)
+            d_worst = np.linalg.norm(v - worst, ord=p, axis=1)
+            expected = d_worst / (d_best + d_worst)
+            
+            scores = topsis_kernel(matrix, weights, impacts, normalization, distance)
+            assert np.allclose(scores, expected)
+            assert np.allclose(topsis_blockwise(matrix, weights, impacts,
+                                                block_rows=7,
+                                                normalization=normalization,
+                                                distance=distance), expected)
+            batch_scores, _ = batch_topsis(matrix, [weights, weights], impacts,
+                                           normalization, distance)
+            assert np.allclose(batch_scores, expected)
+    
+    # Under minmax a constant column adds nothing, as if it were dropped
+    constant = np.column_stack([matrix, np.full(len(matrix), 4.0)])
+    for distance in ('euclidean', 'chebyshev'):
+        expected = topsis_kernel(matrix, weights, impacts, 'minmax', distance)
+        args = (constant, weights + [1], impacts + ['-'])
+        assert np.allclose(topsis_kernel(*args, 'minmax', distance), expected)
+        assert np.allclose(topsis_blockwise(*args, block_rows=7,
+                                            normalization='minmax',
+                                            distance=distance), expected)
+        assert np.allclose(batch_topsis(*args, 'minmax', distance)[0], expected)
+    
+    for bad in ({'normalization': 'zscore'}, {'distance': 'minkowski:0.5'}):
+        try:
+            topsis_kernel(matrix, weights, impacts, **bad)
+            assert False, f"{bad} should be rejected"
+        except ValueError:
+            pass
+    
+    print("✓ All normalizations and distances match\n")
+
+def test_float32_mode():
+    """Test reduced-precision scoring against float64 in every mode"""
+    print("Testing float32 mode...")
+    
+    rng = np.random.default_rng(8)
+    matrix = rng.uniform(1, 100, size=(500, 4)).round(3)
+    weights, impacts = [1, 2, 1, 1], ['+', '-', '+', '-']
+    expected = topsis_kernel(matrix, weights, impacts)
+    
+    scores = topsis_kernel(matrix, weights, impacts, dtype='float32')
+    assert np.allclose(scores, expected, atol=1e-5)
+    assert np.allclose(topsis_kernel(matrix, weights, impacts, dtype='float64'),
+                       expected)
+    assert np.abs(rank_scores(scores) - rank_scores(expected)).max() <= 1
+    
+    single = matrix.astype(np.float32)
+    before = single.copy()
+    topsis_blockwise(single, weights, impacts, block_rows=64, dtype='float32')
+    assert np.array_equal(single, before), "input must not be modified"
+    
+    df = pd.DataFrame(matrix, columns=['A', 'B', 'C', 'D'])
+    df.insert(0, 'Name', [f'R{i}' for i in range(len(df))])
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'in.csv')
+        df.to_csv(path, index=False)
+        for options in ({}, {'chunksize': 70}, {'workers': 2}):
+            out = os.path.join(tmp, 'out.csv')
+            run_topsis(path, '1,2,1,1', '+,-,+,-', out, dtype='float32', **options)
+            result = pd.read_csv(out)
+            assert np.allclose(result['Topsis Score'], expected, atol=1e-5)
+            assert (result['A'] == df['A']).all()
+        run_topsis(matrix, '1,2,1,1', '+,-,+,-', os.path.join(tmp, 'out.npy'),
+                   dtype='float32')
+        assert np.allclose(np.load(os.path.join(tmp, 'out.npy'))[:, 0],
+                           expected, atol=1e-5)
+    
+    try:
+        topsis_kernel(matrix, weights, impacts, dtype='int32')
+        assert False, "integer dtype should be rejected"
+    except ValueError:
+        pass
+    
+    print("✓ float32 mode matches float64\n")
+
+def test_profiling():
+    """Test per-stage profiling in the in-memory and chunked modes"""
+    print("Testing profiling...")
+    
+    rng = np.random.default_rng(2)
+    df = pd.DataFrame(rng.uniform(1, 10, size=(50, 3)).round(3),
+                      columns=['A', 'B', 'C'])
+    df.insert(0, 'Name', [f'R{i}' for i in range(len(df))])
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'in.csv')
+        out = os.path.join(tmp, 'out.csv')
+        df.to_csv(path, index=False)
+        
+        plain = run_topsis(path, '1,2,1', '+,-,+', out)
+        assert 'profile' not in plain.attrs
+        
+        seen = []
+        result = run_topsis(path, '1,2,1', '+,-,+', out, profile=seen.append)
+        names = [s['name'] for s in result.attrs['profile']]
+        assert names == ['read', 'validate', 'normalize', 'distances', 'rank', 'write']
+        assert [s.name for s in seen] == names
+        assert all(s.rows == 50 and s.wall >= 0 and s.cpu >= 0 for s in seen)
+        assert seen[0].cols == 4 and seen[2].cols == 3
+        assert result.equals(plain)
+        
+        profiler = Profiler(memory=False)
+        run_topsis(path, '1,2,1', '+,-,+', out, chunksize=20, profile=profiler)
+        assert [s.name for s in profiler.stages] == ['scan', 'score', 'rank', 'write']
+        assert all(s.peak_bytes == 0 for s in profiler.stages)
+        assert 'total' in profiler.report()
+    
+    print("✓ Profiling works\n")
+
+def test_group_by():
+    """Test group-wise ranking against one run per group"""
+    print("Testing group_by...")
+    
+    rng = np.random.default_rng(6)
+    df = pd.DataFrame({
+        'Fund': [f'F{i}' for i in range(60)],
+        'Family': np.repeat(['x', 'y', 'z'], [25, 5, 30]),
+        'P1': rng.integers(1, 50, 60),
+        'P2': rng.uniform(1, 5, 60).round(2),
+        'P3': rng.integers(1, 9, 60),
+    })
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'in.csv')
+        out = os.path.join(tmp, 'out.csv')
+        df.to_csv(path, index=False)
+        
+        result = run_topsis(path, '1,2,1', '+,-,+', out, group_by='Family')
+        assert list(result.columns) == list(df.columns) + ['Topsis Score', 'Rank']
+        for family, rows in df.groupby('Family'):
+            alone = os.path.join(tmp, 'one.csv')
+            rows.drop(columns='Family').to_csv(alone, index=False)
+            alone = run_topsis(alone, '1,2,1', '+,-,+', alone)
+            got = result[result['Family'] == family]
+            assert np.allclose(got['Topsis Score'], alone['Topsis Score'])
+            assert (got['Rank'].to_numpy() == alone['Rank'].to_numpy()).all()
+        
+        chunked = os.path.join(tmp, 'chunked.csv')
+        run_topsis(path, '1,2,1', '+,-,+', chunked, chunksize=7, group_by='Family')
+        assert open(chunked).read() == open(out).read()
+        
+        shuffled = os.path.join(tmp, 'shuffled.csv')
+        df.sample(frac=1, random_state=1).to_csv(shuffled, index=False)
+        try:
+            run_topsis(shuffled, '1,2,1', '+,-,+', chunked, chunksize=7,
+                       group_by='Family')
+            assert False, "unsorted input should be rejected in chunked mode"
+        except ValueError:
+            pass
+    
+    print("✓ Group-wise ranking matches separate runs\n")
+
+def test_csv_writer():
+    """Test the chunked CSV writer against DataFrame.to_csv"""
+    print("Testing CSV writer...")
+    
+    df = pd.DataFrame({
+        'Name': ['a', 'b,c', 'say "hi"', None],
+        'F64': [0.1, 1e-20, np.nan, 123456789.125],
+        'F32': np.array([0.1, 2.5, np.nan, 3], dtype=np.float32),
+        'Int': [1, -2, 3, 4],
+        'Nullable': pd.array([1, None, 3, 4], dtype='Int64'),
+        'Flag': [True, False, True, True],
+        'When': pd.to_datetime(['2024-01-01', None, '2024-03-01', '2024-04-01']),
+        'Cat': pd.Categorical(['x', 'y', None, 'x']),
+        'Mixed': pd.Series([1.23456, 'x', 2.5, None], dtype=object),
+    })
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'out.csv')
+        write_csv(df, path)
+        assert open(path).read() == df.to_csv(index=False)
+        
+        write_csv(df, path, precision=3)
+        assert open(path).read() == df.to_csv(index=False, float_format='%.3f')
+        
+        write_csv(df, path, extra={'Rank': np.arange(1, 5)})
+        assert open(path).read() == df.assign(Rank=np.arange(1, 5)).to_csv(index=False)
+        
+        data = pd.DataFrame({'Fund': ['M1', 'M2', 'M3', 'M4'],
+                             'P1': [250, 200, 300, 275],
+                             'P2': [16, 32, 32, 8]})
+        src = os.path.join(tmp, 'in.csv')
+        data.to_csv(src, index=False)
+        plain = os.path.join(tmp, 'plain.csv')
+        run_topsis(src, '1,1', '-,+', plain)
+        for kwargs in ({}, {'chunksize': 3}):
+            packed = os.path.join(tmp, 'packed.csv.gz')
+            run_topsis(src, '1,1', '-,+', packed, **kwargs)
+            assert gzip.open(packed, 'rt').read() == open(plain).read()
+            assert pd.read_csv(packed).equals(pd.read_csv(plain))
+    
+    print("✓ CSV writer matches to_csv\n")
+
+def test_excel_sheets():
+    """Test the streaming Excel reader, sheet selection and sheet jobs"""
+    print("Testing Excel sheets...")
+    
+    first = pd.DataFrame({'Fund': ['M1', 'M2', 'NA', 'M4'],
+                          'P1': [250, 200, 300, 275],
+                          'P2': [16.5, 32.0, None, 8.25],
+                          'Note': ['a', 'b,c', '7', None]})
+    second = pd.DataFrame({'Fund': ['X', 'Y', 'Z'], 'P1': [1.0, 2.0, 3.0],
+                           'P2': [3, 1, 2], 'Note': ['x', 'y', 'z']})
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'book.xlsx')
+        with pd.ExcelWriter(path) as writer:
+            first.to_excel(writer, sheet_name='funds', index=False)
+            second.to_excel(writer, sheet_name='more', index=False)
+        
+        for sheet in (None, 'more', 1):
+            expected = pd.read_excel(path, sheet_name=sheet or 0)
+            assert read_sheet(path, sheet).equals(expected)
+        assert read_sheet(path, columns=['Fund', 'P2']).equals(
+            pd.read_excel(path, usecols=['Fund', 'P2']))
+        sheets = read_sheets(path, workers=2)
+        assert list(sheets) == ['funds', 'more']
+        assert sheets['more'].equals(pd.read_excel(path, sheet_name='more'))
+        try:
+            read_sheet(path, 'missing')
+            assert False, "unknown sheet should be rejected"
+        except ValueError:
+            pass
+        
+        # Blank rows, an empty column, numeric text and a cell past the
+        # header come out as pandas reads them
+        import openpyxl
+        book = openpyxl.Workbook()
+        for row in ([None] * 4, ['Fund', 'P1', 'Empty', 'Text'],
+                    ['M1', 1, None, '5'], [None] * 4,
+                    ['M3', 3, None, '6.5', None, 9], [None] * 4):
+            book.active.append(row)
+        gaps = os.path.join(tmp, 'gaps.xlsx')
+        book.save(gaps)
+        result = read_sheet(gaps)
+        assert result.equals(pd.read_excel(gaps))
+        assert len(result) == 4 and result.columns[-1] == 'Unnamed: 5'
+        book.active.delete_rows(1)
+        book.save(gaps)
+        result = read_sheet(gaps, columns=['Fund', 'Empty', 'Text'])
+        assert result.equals(pd.read_excel(gaps, usecols=['Fund', 'Empty', 'Text']))
+        assert result['Fund'].isna().tolist() == [False, True, False]
+        assert result['Empty'].dtype == result['Text'].dtype == np.float64
+        
+        out = os.path.join(tmp, 'out.csv')
+        result = run_topsis(path, '1,1', '-,+', out, columns=['Fund', 'P1', 'P2'],
+                            sheet='more')
+        plain = os.path.join(tmp, 'more.csv')
+        second.drop(columns='Note').to_csv(plain, index=False)
+        assert result['Rank'].equals(run_topsis(plain, '1,1', '-,+', plain)['Rank'])
+        
+        jobs = sheet_jobs([BatchJob(path, '1,1', '-,+', out)], ['*'])
+        assert [(j.sheet, os.path.basename(j.output_file)) for j in jobs] == \
+            [('funds', 'out_funds.csv'), ('more', 'out_more.csv')]
+        results = run_batch(jobs[1:], 2, processes=True,
+                            columns=['Fund', 'P1', 'P2'])
+        assert results[0].error is None and results[0].rows == 3
+        assert pd.read_csv(jobs[1].output_file).equals(pd.read_csv(out))
+    
+    print("✓ Excel sheets are read like pd.read_excel\n")
+
+def test_external_sort():
+    """Test external merge sort ranking against in-memory ranking"""
+    print("Testing external sort ranking...")
+    
+    rng = np.random.default_rng(7)
+    scores = rng.integers(0, 40, 5000) / 40
+    with ExternalRanker(run_rows=700, merge_rows=64) as ranker:
+        for start in range(0, len(scores), 333):
+            ranker.add(scores[start:start + 333])
+        assert np.array_equal(ranker.scores(), scores)
+        assert (ranker.ranks() == rank_scores(scores)).all()
+        try:
+            ranker.add([0.5, np.nan])
+            assert False, "NaN scores should be rejected"
+        except ValueError:
+            pass
+    
+    df = pd.DataFrame({'Fund': [f'F{i}' for i in range(500)],
+                       'P1': rng.integers(1, 5, 500),
+                       'P2': rng.integers(1, 3, 500)})
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'in.csv')
+        out = os.path.join(tmp, 'out.csv')
+        spilled = os.path.join(tmp, 'spilled.csv')
+        df.to_csv(path, index=False)
+        run_topsis(path, '1,1', '+,-', out, chunksize=64)
+        run_topsis(path, '1,1', '+,-', spilled, chunksize=64, external_sort=tmp)
+        assert open(spilled).read() == open(out).read()
+        assert sorted(os.listdir(tmp)) == ['in.csv', 'out.csv', 'spilled.csv']
+    
+    print("✓ External sort ranks match rank_scores\n")
+
+def _wait_for(condition, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out waiting"
+        time.sleep(0.01)
+
+def test_web_jobs():
+    """Test the web service's job queue endpoints"""
+    print("Testing web jobs...")
+    
+    client = web.app.test_client()
+    json_accept = {'Accept': 'application/json'}
+    original = web.job_queue
+    queue = web.job_queue = JobQueue(analysis_workers=1, max_pending=2)
+    try:
+        with open('data.csv', 'rb') as f:
+            csv_bytes = f.read()
+        resp = client.post('/analyze', headers=json_accept, data={
+            'file': (io.BytesIO(csv_bytes), 'data.csv'),
+            'weights': '1,1,1,1,1', 'impacts': '+,+,-,+,+'})
+        assert resp.status_code == 202
+        job_id = resp.get_json()['job_id']
+        
+        _wait_for(lambda: client.get(f'/status/{job_id}').get_json()['status']
+                  in ('done', 'failed'))
+        status = client.get(f'/status/{job_id}').get_json()
+        assert status['status'] == 'done', status
+        assert status['download_url'] == f'/results/{job_id}'
+        
+        resp = client.get(f'/results/{job_id}')
+        assert resp.status_code == 200
+        result = pd.read_csv(io.BytesIO(resp.data))
+        with tempfile.TemporaryDirectory() as tmp:
+            expected = run_topsis('data.csv', '1,1,1,1,1', '+,+,-,+,+',
+                                  os.path.join(tmp, 'out.csv'))
+        assert (result['Rank'] == expected['Rank']).all()
+        assert np.allclose(result['Topsis Score'], expected['Topsis Score'])
+        
+        for url in ('/status/nope', '/results/nope'):
+            assert client.get(url).status_code == 404
+        
+        # A running job cannot be downloaded yet; a full queue answers 503
+        release = threading.Event()
+        blocked = queue.submit(release.wait)
+        waiting = queue.submit(release.wait)
+        assert client.get(f'/results/{blocked}').status_code == 409
+        resp = client.post('/analyze', headers=json_accept, data={
+            'file': (io.BytesIO(csv_bytes), 'data.csv'),
+            'weights': '1,1,1,1,1', 'impacts': '+,+,-,+,+'})
+        assert resp.status_code == 503
+        try:
+            queue.submit(lambda: None)
+            assert False, "a full queue should raise QueueFull"
+        except QueueFull:
+            pass
+        release.set()
+        _wait_for(lambda: queue.get(waiting).status == 'done')
+    finally:
+        web.job_queue = original
+        queue.shutdown()
+    
+    # Uploads get the command line's validation errors
+    bad = pd.read_csv('data.csv')
+    bad.iloc[2, 3] = np.nan
+    try:
+        web.run_topsis_analysis(io.BytesIO(bad.to_csv(index=False).encode()),
+                                'data.csv', '1,1,1,1,1', '+,+,-,+,+')
+        assert False, "a missing value should be rejected"
+    except ValueError as e:
+        assert "missing or non-finite" in str(e)
+    try:
+        web.run_topsis_analysis(io.BytesIO(csv_bytes), 'data.csv', '1,1,1',
+                                '+,+,-')
+        assert False, "a weight count mismatch should be rejected"
+    except ValueError:
+        pass
+    
+    # Results above SPOOL_MAX_SIZE spill to a file that cleanup() removes
+    max_size = web.app.config['SPOOL_MAX_SIZE']
+    web.app.config['SPOOL_MAX_SIZE'] = 64
+    try:
+        result = web.run_topsis_analysis(io.BytesIO(csv_bytes), 'data.csv',
+                                         '1,1,1,1,1', '+,+,-,+,+')
+    finally:
+        web.app.config['SPOOL_MAX_SIZE'] = max_size
+    assert result._data is None and os.path.exists(result._path)
+    with result.open() as f:
+        spilled = pd.read_csv(f)
+    assert len(spilled) == len(bad) and result.size > 64
+    result.cleanup()
+    assert not os.path.exists(result._path)
+    small = web.ResultBuffer('small.csv', b'a,b\n', max_size)
+    assert small._path is None and small.open().read() == b'a,b\n'
+    
+    # Finished jobs are dropped after ttl, and on_expire sees each one
+    expired = []
+    queue = JobQueue(ttl=0)
+    try:
+        first = queue.submit(lambda: 'result')
+        _wait_for(lambda: queue.get(first).status == 'done')
+        time.sleep(0.01)
+        queue.submit(lambda: None, on_expire=expired.append)
+        assert [job.id for job in expired] == [first]
+        assert expired[0].result == 'result' and queue.get(first) is None
+    finally:
+        queue.shutdown()
+    
+    print("✓ Web job endpoints work\n")
+
+class _StubSMTPHandler(socketserver.StreamRequestHandler):
+    """Minimal SMTP dialogue that records each message's raw DATA"""
+    
+    def reply(self, line):
+        self.wfile.write(line + b'\r\n')
+    
+    def handle(self):
+        server = self.server
+        with server.lock:
+            server.connections += 1
+            number = server.connections
+        self.reply(b'220 stub ready')
+        for line in self.rfile:
+            command = line.strip().upper()
+            if command.startswith((b'EHLO', b'HELO')):
+                self.reply(b'250 stub')
+            elif command == b'DATA':
+                if server.drop_first and number == 1:
+                    return  # hang up mid-transaction
+                self.reply(b'354 end with .')
+                data = []
+                for body_line in self.rfile:
+                    if body_line == b'.\r\n':
+                        break
+                    data.append(body_line)
+                with server.lock:
+                    server.messages.append((number, b''.join(data)))
+                self.reply(b'250 queued')
+            elif command == b'QUIT':
+                self.reply(b'221 bye')
+                return
+            elif command.startswith(b'RCPT'):
+                recipient = line.strip().split(b':', 1)[1].strip(b'<>')
+                with server.lock:
+                    replies = server.rcpt_replies.get(recipient.decode(), [])
+                    self.reply(replies.pop(0) if replies else b'250 ok')
+            else:
+                self.reply(b'250 ok')
+
+class _StubSMTP(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    
+    def __init__(self, drop_first=False):
+        super().__init__(('127.0.0.1', 0), _StubSMTPHandler)
+        self.drop_first = drop_first
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.messages = []
+        self.rcpt_replies = {}  # recipient: replies to give before 250
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+    
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+def test_smtp_pool():
+    """Test the pooled SMTP sender against a local stub server"""
+    print("Testing SMTP pool...")
+    
+    body = "Results attached.\n.starts with a dot\n..two dots\nend"
+    payload = np.random.default_rng(9).bytes(3 * ATTACHMENT_CHUNK + 100)
+    with tempfile.TemporaryDirectory() as tmp:
+        attachment = os.path.join(tmp, 'result.csv')
+        with open(attachment, 'wb') as f:
+            f.write(payload)
+        
+        server = _StubSMTP()
+        pool = SMTPPool('127.0.0.1', server.server_address[1], starttls=False,
+                        size=1, batch_wait=0.5, backoff=0.01)
+        try:
+            futures = [pool.submit('from@example.com', f'to{i}@example.com',
+                                   'TOPSIS', body, attachment) for i in range(3)]
+            assert all(f.result(timeout=10) for f in futures)
+        finally:
+            pool.close()
+            server.stop()
+        # One batch, one connection
+        assert server.connections == 1
+        assert [number for number, _ in server.messages] == [1, 1, 1]
+        
+        raw = server.messages[0][1]
+        assert b'\r\n..starts with a dot\r\n...two dots\r\n' in raw
+        message = email.message_from_bytes(re.sub(rb'(?m)^\.', b'', raw))
+        text, attached = message.get_payload()
+        assert text.get_payload(decode=True).decode().replace('\r\n', '\n') == body
+        assert attached.get_filename() == 'result.csv'
+        assert attached.get_payload(decode=True) == payload
+        
+        # A connection dropped mid-send is retried on a fresh one
+        server = _StubSMTP(drop_first=True)
+        pool = SMTPPool('127.0.0.1', server.server_address[1], starttls=False,
+                        size=1, batch_wait=0.01, backoff=0.01)
+        try:
+            assert pool.send('from@example.com', 'to@example.com', 'TOPSIS', body)
+        finally:
+            pool.close()
+            server.stop()
+        assert server.connections == 2
+        assert [number for number, _ in server.messages] == [2]
+        
+        # A 4xx reply is retried, a 5xx one fails at once and leaves the
+        # connection to the rest of the batch
+        server = _StubSMTP()
+        server.rcpt_replies = {'later@example.com': [b'451 try again'],
+                               'nobody@example.com': [b'550 no such user']}
+        pool = SMTPPool('127.0.0.1', server.server_address[1], starttls=False,
+                        size=1, batch_wait=0.5, backoff=5)
+        try:
+            start = time.monotonic()
+            refused, after = (pool.submit('from@example.com', recipient,
+                                          'TOPSIS', body)
+                              for recipient in ('nobody@example.com',
+                                                'to@example.com'))
+            try:
+                refused.result(timeout=10)
+                assert False, "a 550 should not be retried"
+            except smtplib.SMTPRecipientsRefused:
+                pass
+            assert after.result(timeout=10)
+            assert time.monotonic() - start < 5
+            assert server.connections == 1
+            
+            pool.backoff = 0.01
+            assert pool.send('from@example.com', 'later@example.com', 'TOPSIS',
+                             body)
+        finally:
+            pool.close()
+            server.stop()
+        assert server.connections == 2 and len(server.messages) == 2
+    
+    print("✓ SMTP pool batches, stuffs dots, encodes and retries\n")
+
+def test_scoring_server():
+    """Test the HTTP scoring service with JSON and .npy requests"""
+    print("Testing scoring server...")
+    
+    server = ScoringServer(('127.0.0.1', 0))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/score"
+    matrix = [[250, 16, 12], [200, 32, 8], [300, 32, 16], [275, 8, 4]]
+    expected = topsis_kernel(np.array(matrix, dtype=float), [1, 1, 2], ['-', '+', '+'])
+    
+    try:
+        body = json.dumps({'matrix': matrix, 'weights': '1,1,2', 'impacts': ['-', '+', '+']})
+        with urllib.request.urlopen(url, body.encode()) as resp:
+            result = json.load(resp)
+        assert np.allclose(result['scores'], expected)
+        assert result['ranks'] == rank_scores(expected).tolist()
+        
+        buf = io.BytesIO()
+        np.save(buf, np.array(matrix, dtype=float))
+        req = urllib.request.Request(url + "?weights=1,1,2&impacts=-,%2B,%2B&top_k=2",
+                                     buf.getvalue(), {'Content-Type': 'application/x-npy',
+                                                      'Accept': 'application/x-npy'})
+        with urllib.request.urlopen(req) as resp:
+            top = np.load(io.BytesIO(resp.read()))
+        assert top.shape == (2, 2) and list(top[:, 1]) == [1, 2]
+        
+        bad = json.dumps({'matrix': matrix, 'weights': '1,1', 'impacts': '+,+'})
+        try:
+            urllib.request.urlopen(url, bad.encode())
+            assert False, "mismatched weights should be rejected"
+        except urllib.error.HTTPError as e:
+            assert e.code == 400
+        
+        # Missing values and all-zero columns are the client's to fix
+        for rows, message in (([[1, None, 2], [3, 4, 5]], "missing"),
+                              ([[1, 0, 2], [3, 0, 5]], "undefined")):
+            bad = json.dumps({'matrix': rows, 'weights': '1,1,1',
+                              'impacts': '+,+,+'})
+            try:
+                urllib.request.urlopen(url, bad.encode())
+                assert False, f"{rows} should be rejected"
+            except urllib.error.HTTPError as e:
+                assert e.code == 400 and message in json.load(e)['error']
+    finally:
+        server.shutdown()
+        server.server_close()
+    
+    # A request with NaN scores fails alone, not its whole batch
+    batcher = MicroBatcher(batch_wait=0.2)
+    degenerate = np.array(matrix, dtype=float)
+    degenerate[:, 1] = 0
+    good = batcher.submit(np.array(matrix, dtype=float), np.array([1, 1, 2.0]),
+                          ['-', '+', '+'])
+    bad = batcher.submit(degenerate, np.array([1, 1, 2.0]), ['-', '+', '+'])
+    assert np.allclose(good.result(timeout=10)[0], expected)
+    try:
+        bad.result(timeout=10)
+        assert False, "NaN scores should not be ranked"
+    except ValueError:
+        pass
+    
+    print("✓ Scoring server works\n")
+
 if __name__ == "__main__":
     print("="*50)
     print("TOPSIS Package Test Suite")
@@ -89,6 +1208,30 @@ if __name__ == "__main__":
     
     test_basic_topsis()
     test_error_handling()
+    test_missing_values()
+    test_command_line()
+    test_single_read()
+    test_vectorized_kernel()
+    test_batch_scenarios()
+    test_file_formats()
+    test_chunked_topsis()
+    test_incremental_scorer()
+    test_mapped_matrix()
+    test_parallel_blocks()
+    test_result_cache()
+    test_fast_path()
+    test_batch_jobs()
+    test_sensitivity()
+    test_normalizations_and_distances()
+    test_float32_mode()
+    test_profiling()
+    test_group_by()
+    test_csv_writer()
+    test_excel_sheets()
+    test_external_sort()
+    test_web_jobs()
+    test_smtp_pool()
+    test_scoring_server()
     
     print("="*50)
     print("All tests passed! ✓")
@@ -5,51 +5,31 @@ import os
 
 def normalize_matrix(df):
     """Normalize the decision matrix using root of sum of squares"""
-    normalized = df.copy()
-    for col in df.columns:
-        sum_sq = np.sqrt((df[col] ** 2).sum())
-        normalized[col] = df[col] / sum_sq
-    return normalized
+    return df / np.sqrt((df ** 2).sum())
 
 def calc_weighted_matrix(normalized_df, weights):
     """Apply weights to normalized matrix"""
-    weighted = normalized_df.copy()
-    for i, col in enumerate(normalized_df.columns):
-        weighted[col] = normalized_df[col] * weights[i]
-    return weighted
+    return normalized_df * np.asarray(weights, dtype=float)
 
 def get_ideal_solutions(weighted_df, impacts):
     """Calculate ideal best and worst solutions"""
-    ideal_best = []
-    ideal_worst = []
-    
-    for i, col in enumerate(weighted_df.columns):
-        if impacts[i] == '+':
-            ideal_best.append(weighted_df[col].max())
-            ideal_worst.append(weighted_df[col].min())
-        else:
-            ideal_best.append(weighted_df[col].min())
-            ideal_worst.append(weighted_df[col].max())
-    
+    benefit = np.asarray(impacts) == '+'
+    col_max = weighted_df.max().to_numpy()
+    col_min = weighted_df.min().to_numpy()
+    ideal_best = np.where(benefit, col_max, col_min)
+    ideal_worst = np.where(benefit, col_min, col_max)
     return ideal_best, ideal_worst
 
 def calc_euclidean_dist(weighted_df, ideal_solution):
     """Calculate euclidean distance from ideal solution"""
-    distances = []
-    for idx in range(len(weighted_df)):
-        row_vals = weighted_df.iloc[idx].values
-        dist = np.sqrt(sum((row_vals[i] - ideal_solution[i]) ** 2 
-                          for i in range(len(ideal_solution))))
-        distances.append(dist)
-    return distances
+    diff = weighted_df.to_numpy(dtype=float) - np.asarray(ideal_solution, dtype=float)
+    return np.sqrt((diff ** 2).sum(axis=1))
 
 def topsis_score_calc(dist_best, dist_worst):
     """Calculate final TOPSIS score"""
-    scores = []
-    for i in range(len(dist_best)):
-        score = dist_worst[i] / (dist_best[i] + dist_worst[i])
-        scores.append(score)
-    return scores
+    dist_best = np.asarray(dist_best, dtype=float)
+    dist_worst = np.asarray(dist_worst, dtype=float)
+    return dist_worst / (dist_best + dist_worst)
 
 def validate_inputs(input_file, weights, impacts, output_file):
     """Validate all inputs before processing"""